@@ -4,33 +4,124 @@ from rich.console import Console
 from rich.markdown import Markdown
 from rich.panel import Panel
 
-from trogon.typer import init_tui
+from .lazy import LazyTyperGroup
+
+
+class SupriyaMusicGroup(LazyTyperGroup):
+    # Imported only when invoked; see lazy.py
+    lazy_commands = {
+        "bench": (
+            "supriya_music.bench:bench",
+            "Time the toolkit's hot paths and compare with the previous run.",
+        ),
+        "dirt": (
+            "supriya_music.dirt:dirt",
+            "Play Tidal's /dirt/play events on supriya instead of SuperDirt.",
+        ),
+        "fake-scsynth": (
+            "supriya_music.fakesynth:fake_scsynth",
+            "Run a silent scsynth stand-in for headless testing.",
+        ),
+        "hello": ("supriya_music.hello:hello", "Play a short sine wave example."),
+        "info": (
+            "supriya_music.info:info_app",
+            "Display information about Supriya Music Toolkit.",
+        ),
+        "midi": (
+            "supriya_music.midi:midi",
+            "Play the toolkit's SynthDefs from MIDI input or a MIDI file.",
+        ),
+        "serve": (
+            "supriya_music.daemon:serve_app",
+            "Run a shared scsynth for --attach mode.",
+        ),
+        "pattern": (
+            "supriya_music.pattern:show",
+            "List the events of a Tidal mini-notation pattern.",
+        ),
+        "sweep": (
+            "supriya_music.sweep:sweep",
+            "Render every combination of a parameter grid in parallel.",
+        ),
+    }
 
-from .hello import hello
-from .info import info_app
-from .example_1 import main as example1_main
-from .example_2 import main as example2_main
 
 app = typer.Typer(
     name="supriya music",
     help="Supriya music toolkit command line interface.",
     no_args_is_help=False,
-)
-app.add_typer(
-    info_app, name="info", help="Display information about Supriya Music Toolkit."
+    cls=SupriyaMusicGroup,
 )
 
 console = Console()
 
-app.command(name="hello")(hello)
+
+def _render_synthdef(name, path, at, duration, preview):
+    """Render one synth following an --at timeline, without a GUI or server"""
+    import time
+
+    from .render import (
+        RenderFailed,
+        parse_timeline,
+        render_preview_file,
+        render_score,
+        timeline_score,
+    )
+    from .synthdefs import registry
+
+    try:
+        timeline = parse_timeline(at)
+    except ValueError as e:
+        console.print(f"[red]Invalid --at entry: {e}[/red]")
+        raise typer.Exit(1)
+    engine = "NumPy preview" if preview else "non-realtime"
+    console.print(f"Rendering {name} to {path} ({engine})...")
+    start = time.perf_counter()
+    try:
+        if preview:
+            render_preview_file(registry[name], timeline, path, duration)
+        else:
+            render_score(
+                timeline_score(registry[name], timeline, duration), path, duration
+            )
+    except (RenderFailed, RuntimeError) as e:
+        console.print(str(e), style="red", markup=False)
+        raise typer.Exit(1)
+    console.print(
+        f"[bold green]Rendered {path} in {time.perf_counter() - start:.2f} s.[/bold green]"
+    )
 
 
 @app.command()
-def example_1():
+def example_1(
+    attach: bool = typer.Option(
+        False, "--attach", help="Use the shared server started by 'serve'."
+    ),
+    render: Path = typer.Option(
+        None, "--render", help="Render sine_synth to a sound file instead."
+    ),
+    at: list[str] = typer.Option(
+        None, "--at", help="Timeline entry for --render, e.g. '1.5:param=value'."
+    ),
+    duration: float = typer.Option(
+        4.0, "--duration", help="Length of the --render output in seconds."
+    ),
+    preview: bool = typer.Option(
+        False, "--preview", help="Render --render with NumPy instead of scsynth."
+    ),
+    metrics: bool = typer.Option(
+        False, "--metrics", help="Record OSC traffic and round-trip metrics."
+    ),
+):
     """Launch the PyQt6 GUI for real-time synth control."""
+    if render is not None:
+        _render_synthdef("sine_synth", render, at or [], duration, preview)
+        return
     try:
         # Import here to avoid PyQt6 dependency when not using GUI
-        exit_code = example1_main()
+        from .example_1 import main as example1_main
+
+        exit_code = example1_main(attach=attach, metrics=metrics)
         if exit_code != 0:
             console.print(
                 f"[red]GUI application exited with error code: {exit_code}[/red]"
@@ -48,11 +139,35 @@ def example_1():
 
 
 @app.command()
-def example_2():
+def example_2(
+    attach: bool = typer.Option(
+        False, "--attach", help="Use the shared server started by 'serve'."
+    ),
+    render: Path = typer.Option(
+        None, "--render", help="Render sine_test to a sound file instead."
+    ),
+    at: list[str] = typer.Option(
+        None, "--at", help="Timeline entry for --render, e.g. '1.5:param=value'."
+    ),
+    duration: float = typer.Option(
+        4.0, "--duration", help="Length of the --render output in seconds."
+    ),
+    preview: bool = typer.Option(
+        False, "--preview", help="Render --render with NumPy instead of scsynth."
+    ),
+    metrics: bool = typer.Option(
+        False, "--metrics", help="Record OSC traffic and round-trip metrics."
+    ),
+):
     """Launch the PyQt6 GUI for noise-modulated synth control."""
+    if render is not None:
+        _render_synthdef("sine_test", render, at or [], duration, preview)
+        return
     try:
         # Import here to avoid PyQt6 dependency when not using GUI
-        exit_code = example2_main()
+        from .example_2 import main as example2_main
+
+        exit_code = example2_main(attach=attach, metrics=metrics)
         if exit_code != 0:
             console.print(
                 f"[red]GUI application exited with error code: {exit_code}[/red]"
@@ -100,7 +215,13 @@ def main(ctx: typer.Context):
             )
 
 
-init_tui(app)
+@app.command(name="tui")
+def tui(ctx: typer.Context):
+    """Open Textual TUI."""
+    # Textual is heavy, so only import it for this command
+    from trogon import Trogon
+
+    Trogon(typer.main.get_group(app), click_context=ctx).run()
 
 
 if __name__ == "__main__":
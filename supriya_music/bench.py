@@ -0,0 +1,319 @@
+"""
+Micro-benchmarks for the toolkit's hot paths.
+
+Each benchmark times a small piece of work, repeated until a round takes
+long enough to measure, over several rounds:
+
+- ``synthdef:<name>``: building and compiling one of the three project
+  SynthDefs, as the registry does when its cache is stale;
+- ``n_set:drag``: encoding and sending the ``/n_set`` flood of a slider drag
+  in example 2, one message per ``valueChanged``;
+- ``n_set:bundle``: the same drag coalesced into one bundle, as the
+  parameter dispatcher sends it;
+- ``upload:wavetable``: encoding a 32768-value wavetable into the
+  ``/b_setn`` chunks ``buffers.upload`` sends;
+- ``startup``: ``python -m supriya_music --help`` in a fresh interpreter;
+- ``startup:<command>``: a fresh interpreter loading the command and the
+  modules it imports before doing any work, i.e. its startup cost;
+- ``devices``: audio device enumeration behind ``info devices``.
+
+Results of every run are saved, and each benchmark's median is compared
+with the previous run's; a slowdown beyond the threshold is reported as a
+regression.
+"""
+
+import json
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from pathlib import Path
+from typing import Optional
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from .config import CACHE_DIR
+
+console = Console()
+
+RESULTS_PATH = Path(CACHE_DIR) / "benchmarks" / "last.json"
+HISTORY_PATH = Path(CACHE_DIR) / "benchmarks" / "history.jsonl"
+
+# Modules the eager commands import inside their bodies before doing any work
+COMMAND_IMPORTS = {
+    "example-1": ["supriya_music.example_1"],
+    "example-2": ["supriya_music.example_2"],
+    "tui": ["trogon"],
+}
+
+LOAD_COMMAND = """
+import importlib, sys
+import typer
+from supriya_music.app import app
+group = typer.main.get_group(app)
+if sys.argv[1] in group.lazy_commands:
+    group.load_command(sys.argv[1])
+for module in sys.argv[2:]:
+    importlib.import_module(module)
+"""
+
+# Slider positions of a drag across example 2's noise_hz range
+DRAG_VALUES = [1.0 + 0.25 * i for i in range(120)]
+
+
+class Skip(Exception):
+    """Raised by a benchmark's setup when it cannot run here"""
+
+
+def _synthdef_benchmark(name):
+    def setup():
+        from supriya import synthdef
+
+        from . import synthdefs
+
+        builder = getattr(synthdefs, name)
+        return lambda: synthdef()(builder).compile()
+
+    return setup
+
+
+def _n_set_benchmark(bundled):
+    def setup():
+        from supriya.osc import OscBundle, OscMessage
+
+        # A bound socket nobody reads, standing in for scsynth
+        sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sink.bind(("127.0.0.1", 0))
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        address = sink.getsockname()
+
+        def drag():
+            for value in DRAG_VALUES:
+                sender.sendto(
+                    OscMessage("/n_set", 1000, "noise_hz", value).to_datagram(),
+                    address,
+                )
+
+        def coalesced():
+            bundle = OscBundle(
+                contents=[
+                    OscMessage(
+                        "/n_set",
+                        1000,
+                        "noise_hz",
+                        DRAG_VALUES[-1],
+                        "amp_noise_hz",
+                        12.0,
+                        "note_offset",
+                        50.0,
+                    )
+                ]
+            )
+            sender.sendto(bundle.to_datagram(), address)
+
+        return coalesced if bundled else drag
+
+    return setup
+
+
+def _upload_benchmark():
+    import numpy as np
+
+    from .buffers import CHUNK, _Datagram
+
+    values = np.sin(np.linspace(0, 2 * np.pi, 32768)).astype(">f4")
+
+    def encode():
+        for start in range(0, len(values), CHUNK):
+            _Datagram(0, start, values[start : start + CHUNK]).to_datagram()
+
+    return encode
+
+
+def _startup_benchmark(command=None):
+    def setup():
+        if command is None:
+            arguments = [sys.executable, "-m", "supriya_music", "--help"]
+        else:
+            arguments = [
+                sys.executable,
+                "-c",
+                LOAD_COMMAND,
+                command,
+                *COMMAND_IMPORTS.get(command, []),
+            ]
+
+        def run():
+            return subprocess.run(
+                arguments,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+
+        # One untimed run, so a command that can't load here is skipped
+        result = run()
+        if result.returncode != 0:
+            raise Skip(result.stderr.strip().splitlines()[-1])
+        return run
+
+    return setup
+
+
+def _devices():
+    try:
+        import sounddevice as sd
+    except (ImportError, OSError) as e:
+        raise Skip(f"sounddevice unavailable: {e}")
+    return sd.query_devices
+
+
+def benchmarks():
+    """``{name: setup}``; each setup returns the callable to time"""
+    from .app import app
+
+    found = {}
+    for name in ("simple_sine", "sine_synth", "sine_test"):
+        found[f"synthdef:{name}"] = _synthdef_benchmark(name)
+    found["n_set:drag"] = _n_set_benchmark(bundled=False)
+    found["n_set:bundle"] = _n_set_benchmark(bundled=True)
+    found["upload:wavetable"] = _upload_benchmark
+    found["startup"] = _startup_benchmark()
+    for command in typer.main.get_group(app).list_commands(None):
+        found[f"startup:{command}"] = _startup_benchmark(command)
+    found["devices"] = _devices
+    return found
+
+
+def measure(function, rounds=5, minimum=0.2):
+    """Seconds per call: each round loops ``function`` for at least ``minimum``"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    # autorange stops at 0.2 s; scale up to the requested round length
+    number = max(1, int(number * minimum / 0.2))
+    times = [total / number for total in timer.repeat(repeat=rounds, number=number)]
+    return {
+        "median": statistics.median(times),
+        "min": min(times),
+        "rounds": rounds,
+        "loops": number,
+    }
+
+
+def _load_previous():
+    try:
+        return json.loads(RESULTS_PATH.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _save(run):
+    RESULTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    RESULTS_PATH.write_text(json.dumps(run, indent=2))
+    with open(HISTORY_PATH, "a") as file:
+        file.write(json.dumps(run) + "\n")
+
+
+def _format(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def bench(
+    select: Optional[str] = typer.Option(
+        None, "--select", "-k", help="Only run benchmarks whose name contains this."
+    ),
+    rounds: int = typer.Option(5, "--rounds", help="Rounds per benchmark."),
+    threshold: float = typer.Option(
+        0.1, "--threshold", help="Slowdown versus the previous run to report."
+    ),
+    save: bool = typer.Option(
+        True, "--save/--no-save", help="Keep this run as the next baseline."
+    ),
+    strict: bool = typer.Option(
+        False, "--strict", help="Exit with an error if anything regressed."
+    ),
+):
+    """Time the toolkit's hot paths and compare them with the previous run."""
+    import supriya
+
+    previous = _load_previous()
+    run = {
+        "time": time.time(),
+        "python": platform.python_version(),
+        "supriya": supriya.__version__,
+        "host": platform.node(),
+        "results": {},
+    }
+    if previous and (previous.get("host"), previous.get("python")) != (
+        run["host"],
+        run["python"],
+    ):
+        console.print(
+            "[yellow]The previous run was on another host or Python; "
+            "comparisons may not mean much.[/yellow]"
+        )
+    baseline = (previous or {}).get("results", {})
+
+    table = Table(title="Benchmarks", show_header=True, header_style="bold magenta")
+    for column, justify in (
+        ("Benchmark", "left"),
+        ("Median", "right"),
+        ("Min", "right"),
+        ("Previous", "right"),
+        ("Change", "right"),
+    ):
+        table.add_column(column, justify=justify)
+
+    regressions = []
+    for name, setup in benchmarks().items():
+        if select and select not in name:
+            continue
+        try:
+            function = setup()
+        except Skip as e:
+            table.add_row(name, "skipped", "", "", str(e))
+            continue
+        # Startup benchmarks take a fraction of a second each; don't loop them
+        minimum = 0.0 if name.startswith("startup") else 0.2
+        result = run["results"][name] = measure(function, rounds, minimum)
+        before = baseline.get(name, {}).get("median")
+        if before:
+            change = result["median"] / before - 1
+            style = "red" if change > threshold else "green" if change < 0 else ""
+            change_text = (
+                f"[{style}]{change:+.1%}[/{style}]" if style else f"{change:+.1%}"
+            )
+            if change > threshold:
+                regressions.append(name)
+        else:
+            change_text = "new"
+        table.add_row(
+            name,
+            _format(result["median"]),
+            _format(result["min"]),
+            _format(before) if before else "",
+            change_text,
+        )
+    console.print(table)
+
+    if save and run["results"]:
+        # Keep earlier results for benchmarks this run didn't select
+        run["results"] = {**baseline, **run["results"]}
+        _save(run)
+    if regressions:
+        console.print(
+            f"[bold red]{len(regressions)} regressed by more than "
+            f"{threshold:.0%}: {', '.join(regressions)}[/bold red]"
+        )
+        if strict:
+            raise typer.Exit(1)
+    elif baseline:
+        console.print("[bold green]No regressions.[/bold green]")
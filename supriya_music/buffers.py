@@ -0,0 +1,330 @@
+"""
+Uploading NumPy arrays into server buffers.
+
+``upload`` gets a wavetable, an envelope or any generated signal into a
+buffer without sending it a value at a time:
+
+- small arrays go as ``/b_setn`` messages of up to ``CHUNK`` values, each
+  well inside a UDP datagram and encoded straight from the array's bytes.
+  They are sent ``WINDOW`` at a time, each window followed by a ``/sync``,
+  so a long upload never overruns scsynth's socket buffer;
+- arrays of more than ``file_threshold`` values, on a server on this
+  machine, are written once as a 32-bit float WAV file to a RAM-backed
+  directory (``/dev/shm`` where there is one) and read by the server with
+  ``/b_allocRead`` (or ``/b_read`` into an existing buffer). The file is
+  deleted once the server has read it.
+
+``upload`` returns at once with an ``Upload`` whose ``future`` resolves,
+from supriya's OSC thread, when the server has acknowledged the last
+request, or raises ``UploadFailed`` if the server answered one with
+``/fail``; ``wait()`` blocks for it instead.
+"""
+
+import concurrent.futures
+import ipaddress
+import logging
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+from .config import CONFIG
+
+# Values per /b_setn message: about 40 KB, well under UDP's 64 KB
+CHUNK = 8192
+# /b_setn messages sent before waiting for the server to catch up
+WINDOW = 4
+
+
+class UploadFailed(Exception):
+    pass
+
+
+class _Datagram:
+    """
+    A ``/b_setn`` message encoded straight from an array's bytes.
+
+    ``Server.send`` passes it through as is; captures attached to the
+    server (such as ``--metrics``) see an ``address`` and ``contents`` like
+    an ``OscMessage``'s, decoded only if they look at them.
+    """
+
+    __slots__ = ("datagram", "header", "values")
+
+    address = "/b_setn"
+
+    def __init__(self, buffer_id, start, values):
+        self.header = (buffer_id, start, len(values))
+        self.values = values
+        tags = b",iii" + b"f" * len(values)
+        tags += b"\0" * (4 - len(tags) % 4)
+        self.datagram = b"".join(
+            (b"/b_setn\0", tags, struct.pack(">iii", *self.header), values.tobytes())
+        )
+
+    def __repr__(self):
+        return f"{type(self).__name__}(<{len(self.datagram)} bytes>)"
+
+    @property
+    def contents(self):
+        return (*self.header, *self.values.tolist())
+
+    def to_osc(self):
+        return self
+
+    def to_datagram(self):
+        return self.datagram
+
+
+class Upload:
+    """An upload in flight: its buffer and a future set once the server has it"""
+
+    def __init__(self, buffer, frame_count, channel_count, method, start):
+        self.buffer = buffer
+        self.frame_count = frame_count
+        self.channel_count = channel_count
+        self.method = method
+        self.future = concurrent.futures.Future()
+        self.elapsed = None
+        self._start = start
+
+    def __repr__(self):
+        state = f"{self.elapsed * 1000:.1f} ms" if self.done() else "pending"
+        if self.future.done() and self.future.exception():
+            state = "failed"
+        return (
+            f"{type(self).__name__}(buffer={self.buffer and int(self.buffer)}, "
+            f"{self.frame_count}x{self.channel_count} via {self.method}, {state})"
+        )
+
+    def done(self):
+        return self.future.done()
+
+    def wait(self, timeout=None):
+        """Block until the server has the data; returns the buffer"""
+        return self.future.result(timeout)
+
+    def _finish(self):
+        self.elapsed = time.perf_counter() - self._start
+        if not self.future.done():
+            self.future.set_result(self.buffer)
+
+    def _fail(self, exception):
+        self.elapsed = time.perf_counter() - self._start
+        if not self.future.done():
+            self.future.set_exception(exception)
+
+
+def upload(server, array, buffer=None, sample_rate=None, file_threshold=None):
+    """
+    Copy ``array`` (frames, or frames by channels) into a server buffer.
+
+    Allocates a buffer of the array's shape unless ``buffer`` is given, in
+    which case the array is written from its first frame once the server
+    has confirmed it is large enough. Returns an ``Upload`` straight away;
+    if the server rejects a request, its future raises ``UploadFailed``.
+    """
+    start = time.perf_counter()
+    settings = CONFIG.get("buffers") or {}
+    if file_threshold is None:
+        file_threshold = settings.get("file_threshold", WINDOW * CHUNK)
+    array = np.asarray(array)
+    if array.ndim not in (1, 2) or not array.size:
+        raise ValueError(
+            f"Expected a non-empty array of frames or frames by channels, "
+            f"got shape {array.shape}"
+        )
+    frame_count = len(array)
+    channel_count = 1 if array.ndim == 1 else array.shape[1]
+    to_file = array.size > file_threshold and _is_local(server.options.ip_address)
+    # Interleaved 32-bit floats, little-endian for WAV and big-endian for
+    # OSC; only copied if the array isn't already laid out that way
+    data = np.ascontiguousarray(array, dtype="<f4" if to_file else ">f4")
+    transfer = Upload(
+        buffer, frame_count, channel_count, "file" if to_file else "b_setn", start
+    )
+
+    if to_file:
+        sample_rate = (
+            sample_rate
+            or server.options.sample_rate
+            or (CONFIG.get("audio") or {}).get("sample_rate", 44100)
+        )
+        path = _write_wav(data, channel_count, sample_rate)
+        # Deleted however the upload ends; by then the server is done with it
+        transfer.future.add_done_callback(lambda future: _unlink(path))
+
+        def allocate():
+            transfer.buffer = server.add_buffer(file_path=path)
+
+        def read_into():
+            server.send(_read_message(buffer, path))
+
+        def write():
+            if buffer is None:
+                _after_sync(
+                    server, transfer, "/b_allocRead", transfer._finish, allocate
+                )
+            else:
+                _after_sync(server, transfer, "/b_read", transfer._finish, read_into)
+
+    else:
+        values = data.reshape(-1)
+
+        def allocate():
+            transfer.buffer = server.add_buffer(
+                channel_count=channel_count, frame_count=frame_count
+            )
+
+        def send_window(offset=0):
+            if offset >= len(values):
+                transfer._finish()
+                return
+            buffer_id = int(transfer.buffer)
+            end = min(offset + WINDOW * CHUNK, len(values))
+
+            def send():
+                for index in range(offset, end, CHUNK):
+                    server.send(
+                        _Datagram(buffer_id, index, values[index : index + CHUNK])
+                    )
+
+            _after_sync(server, transfer, "/b_setn", lambda: send_window(end), send)
+
+        def write():
+            if buffer is None:
+                # The allocation is asynchronous; /b_setn may only follow once
+                # it's done
+                _after_sync(server, transfer, "/b_alloc", send_window, allocate)
+            else:
+                send_window()
+
+    if buffer is None:
+        _guarded(transfer, write)()
+    else:
+        _check_size(server, transfer, write)
+    return transfer
+
+
+def _guarded(transfer, procedure):
+    """``procedure``, failing the upload rather than raising"""
+
+    def guarded(*args):
+        try:
+            procedure(*args)
+        except Exception as e:
+            transfer._fail(e)
+
+    return guarded
+
+
+def _after_sync(server, transfer, command, procedure, send=None):
+    """
+    Call ``send``, then ``/sync``, and ``procedure`` when the sync comes back.
+
+    A ``/fail`` for ``command`` before then fails the upload instead.
+    scsynth's ``/fail`` replies don't reliably name the buffer, so a failed
+    ``command`` from another client in the meantime fails it as well.
+    """
+    if transfer.done():
+        return
+    sync_id = server._get_next_sync_id()
+
+    def on_reply(message):
+        if message.address == "/fail":
+            reason = " ".join(map(str, message.contents[1:]))
+            transfer._fail(UploadFailed(f"{command} failed: {reason}"))
+        else:
+            procedure()
+
+    server.register_osc_callback(
+        pattern=("/synced", sync_id),
+        procedure=_guarded(transfer, on_reply),
+        failure_pattern=("/fail", command),
+        once=True,
+    )
+    if send is not None:
+        send()
+    server.send(["/sync", sync_id])
+
+
+def _check_size(server, transfer, procedure):
+    """Call ``procedure`` once ``/b_query`` shows the buffer fits the array"""
+    buffer_id = int(transfer.buffer)
+
+    def on_info(message):
+        if message.address == "/fail":
+            raise UploadFailed(f"/b_query failed for buffer {buffer_id}")
+        _, frames, channels, _ = message.contents[:4]
+        if channels != transfer.channel_count or frames < transfer.frame_count:
+            raise UploadFailed(
+                f"Buffer {buffer_id} holds {frames}x{channels}, which can't take "
+                f"{transfer.frame_count}x{transfer.channel_count}"
+            )
+        procedure()
+
+    server.register_osc_callback(
+        pattern=("/b_info", buffer_id),
+        procedure=_guarded(transfer, on_info),
+        failure_pattern=("/fail", "/b_query"),
+        once=True,
+    )
+    server.send(["/b_query", buffer_id])
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except OSError as e:
+        logging.warning(f"Failed to delete {path}: {e}")
+
+
+def _read_message(buffer, path):
+    from supriya.osc import OscMessage
+
+    # Whole file into the buffer from its first frame, closing the file after
+    return OscMessage("/b_read", int(buffer), path, 0, -1, 0, 0)
+
+
+def _is_local(ip_address):
+    if ip_address == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(ip_address).is_loopback
+    except ValueError:
+        return False
+
+
+def _write_wav(data, channel_count, sample_rate):
+    """Write 32-bit float WAV to a RAM-backed directory; returns its path"""
+    directory = "/dev/shm" if os.access("/dev/shm", os.W_OK) else None
+    frame_count = len(data)
+    size = data.nbytes
+    header = b"".join(
+        (
+            struct.pack("<4sI4s", b"RIFF", 4 + 26 + 12 + 8 + size, b"WAVE"),
+            # WAVE_FORMAT_IEEE_FLOAT, with the fact chunk non-PCM formats carry
+            struct.pack(
+                "<4sIHHIIHHH",
+                b"fmt ",
+                18,
+                3,
+                channel_count,
+                int(sample_rate),
+                int(sample_rate) * channel_count * 4,
+                channel_count * 4,
+                32,
+                0,
+            ),
+            struct.pack("<4sII", b"fact", 4, frame_count),
+            struct.pack("<4sI", b"data", size),
+        )
+    )
+    with tempfile.NamedTemporaryFile(
+        dir=directory, prefix="supriya-music-", suffix=".wav", delete=False
+    ) as file:
+        file.write(header)
+        file.write(memoryview(data).cast("B"))
+    return file.name
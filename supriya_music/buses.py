@@ -0,0 +1,43 @@
+"""
+Synth parameters held on control buses.
+
+With ``synth.set(...)`` every parameter change costs one ``/n_set`` per
+sounding synth. ``MappedControls`` keeps each parameter on a control bus
+instead and maps synths to those buses, so a change is a single ``/c_set``
+however many synths follow it, and synths started later pick up the
+current values from their first control period.
+"""
+
+
+class MappedControls:
+    """Named control buses that any number of synths can be mapped to"""
+
+    def __init__(self, server, **values):
+        self.server = server
+        self.values = dict(values)
+        self.bus_group = server.add_bus_group(count=len(values))
+        self.buses = dict(zip(values, self.bus_group))
+        self.bus_group.set([float(value) for value in values.values()])
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.values!r})"
+
+    def set(self, **values):
+        """Write new values: one ``/c_set`` each, however many synths are mapped"""
+        for name, value in values.items():
+            self.buses[name].set(float(value))
+        self.values.update(values)
+
+    def settings(self):
+        """``add_synth`` keyword arguments that start a synth already mapped"""
+        return {name: bus.map_symbol() for name, bus in self.buses.items()}
+
+    def map(self, *nodes):
+        """Map existing nodes' controls to the buses with ``/n_map``"""
+        with self.server.at():
+            for node in nodes:
+                node.map(**self.buses)
+
+    def free(self):
+        """Return the buses to the allocator; mapped synths keep the last values"""
+        self.bus_group.free()
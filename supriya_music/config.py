@@ -17,3 +17,9 @@ except (FileNotFoundError, Exception) as e  :
         f"Could not load configuration from {CONFIG_PATH}: {e}"
     )
     CONFIG = {}
+
+# Runtime state and caches shared between invocations (daemon state, ...)
+CACHE_DIR = os.environ.get(
+    "SUPRIYA_MUSIC_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "supriya_music"),
+)
@@ -0,0 +1,339 @@
+"""
+Persistent shared scsynth daemon.
+
+``python -m supriya_music serve`` boots one configured scsynth and keeps it
+running, recording its PID, port and client partitioning in a state file.
+Other commands can then ``--attach`` to it: they connect as an additional
+client with their own client ID (and therefore their own node IDs, buses,
+buffers and default group) instead of booting and quitting scsynth themselves.
+"""
+
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+
+import supriya
+import typer
+from rich.console import Console
+from rich.table import Table
+from supriya.contexts.responses import StatusInfo
+from supriya.enums import BootStatus
+from supriya.exceptions import ServerCannotBoot
+
+from .config import CACHE_DIR, CONFIG, CONFIG_PATH
+from .negotiate import BootNegotiator
+from .synthdefs import registry
+
+STATE_PATH = Path(CACHE_DIR) / "server.json"
+
+# Options an attaching client needs to partition IDs the same way the daemon does
+SHARED_OPTIONS = (
+    "ip_address",
+    "port",
+    "maximum_logins",
+    "initial_node_id",
+    "audio_bus_channel_count",
+    "input_bus_channel_count",
+    "output_bus_channel_count",
+    "control_bus_channel_count",
+    "buffer_count",
+)
+
+
+serve_app = typer.Typer(
+    name="serve",
+    help="Run a shared scsynth that other commands can --attach to.",
+)
+
+console = Console()
+
+
+class DaemonNotRunning(Exception):
+    pass
+
+
+def read_state():
+    """Return the daemon's recorded state, or None if no daemon was started"""
+    try:
+        return json.loads(STATE_PATH.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def ping(ip_address, port, timeout=1.0):
+    """Send ``/status`` from a throwaway socket; return (StatusInfo, seconds)"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        start = time.perf_counter()
+        sock.sendto(supriya.OscMessage("/status").to_datagram(), (ip_address, port))
+        while True:
+            datagram, _ = sock.recvfrom(65536)
+            message = supriya.OscMessage.from_datagram(datagram)
+            if message.address == "/status.reply":
+                return StatusInfo.from_osc(message), time.perf_counter() - start
+
+
+def attach_server(server=None):
+    """Connect to the running daemon as an extra client"""
+    state = read_state()
+    if state is None or not pid_alive(state["scsynth_pid"]):
+        raise DaemonNotRunning(
+            "No shared server running; start one with 'python -m supriya_music serve'."
+        )
+    server = server or supriya.Server()
+    server.connect(options=supriya.Options(**state["options"]))
+    seed_node_state(server)
+    return server
+
+
+def allocate_node_ids(server, count=1):
+    """
+    Reserve ``count`` consecutive node IDs from this client's range.
+
+    Returns the first. supriya only hands out IDs one at a time as nodes are
+    added, through its private allocator; there is no public way to reserve a
+    block for nodes that will be created later, so this is the one place that
+    reaches into it.
+    """
+    return server._node_id_allocator.allocate_node_id(count)
+
+
+def seed_node_state(server):
+    """
+    Fill in supriya's node bookkeeping on a server it connected to.
+
+    supriya follows ``/n_go`` and friends to track which nodes exist, but only
+    records the root and default groups when it boots the server itself. After
+    ``connect`` its ``/n_go`` handler raises ``KeyError`` for any node added to
+    a group it hasn't seen, which also skips every other callback registered
+    for that notification, so the existing tree is seeded from a
+    ``/g_queryTree`` first.
+    """
+    from supriya.contexts.responses import QueryTreeGroup
+
+    tree = server.query_tree(include_controls=False)
+    # Private state, but there's no public way to seed it
+    with server._lock:
+        stack = [(tree, None)]
+        while stack:
+            node, parent_id = stack.pop()
+            if parent_id is not None:
+                server._node_parents[node.node_id] = parent_id
+                server._node_active.setdefault(node.node_id, True)
+            if isinstance(node, QueryTreeGroup):
+                children = server._node_children.setdefault(node.node_id, [])
+                for child in node.children:
+                    if child.node_id not in children:
+                        children.append(child.node_id)
+                    stack.append((child, node.node_id))
+
+
+def open_server(console, attach=False, server=None):
+    """
+    Attach to the shared server, or boot one with the configured options.
+
+    Prints what it is doing on ``console`` and exits with an explanation when
+    no server can be had.
+    """
+    if attach:
+        console.print("Attaching to the shared server started by 'serve'.")
+        try:
+            return attach_server(server)
+        except DaemonNotRunning as e:
+            console.print(f"[bold red]{e}[/bold red]")
+            sys.exit(1)
+
+    if CONFIG.get("audio"):
+        console.print(f"Booting server with audio configuration from {CONFIG_PATH}.")
+    else:
+        console.print(
+            "No audio configuration found, booting server with default options."
+        )
+    server = server or supriya.Server()
+    registry.prepare_boot()
+    try:
+        # Tries the configured options first, then fallbacks such as other
+        # sample rates or default devices, remembering whichever boots
+        BootNegotiator().boot(
+            server,
+            on_attempt=lambda settings: console.print(
+                "Attempting Configuration:", settings
+            ),
+        )
+    except (ServerCannotBoot, RuntimeError) as e:
+        console.print(str(e), style="bold red", markup=False)
+        console.print(
+            f"[bold red]Failed to boot server with provided options, doublecheck your configuration in {CONFIG_PATH}.[/bold red]"
+        )
+        console.print(
+            "[bold red]For more information try running 'supriya_music info devices' (`python -m supriya_music info devices`) to "
+            "list available audio devices.[/bold red]"
+        )
+        sys.exit(1)
+    return server
+
+
+def release_server(server):
+    """Quit a server this process booted, or tidy up and detach from a shared one"""
+    if server.boot_status != BootStatus.ONLINE:
+        return
+    if server.is_owner:
+        server.quit()
+        return
+    # Only touch this client's own default group; other clients keep playing
+    server.default_group.free_children()
+    server.sync()
+    server.disconnect()
+
+
+def boot_overrides(port=None):
+    """Options the daemon needs on top of whichever audio settings boot"""
+    overrides = {
+        "maximum_logins": (CONFIG.get("server") or {}).get("maximum_logins", 8)
+    }
+    if port is not None:
+        overrides["port"] = port
+    return overrides
+
+
+@serve_app.callback(invoke_without_command=True)
+def serve(
+    ctx: typer.Context,
+    port: int = typer.Option(None, "--port", "-p", help="UDP port for scsynth."),
+):
+    """Boot a shared scsynth and keep it running until interrupted."""
+    if ctx.invoked_subcommand is not None:
+        return
+
+    state = read_state()
+    if state is not None and pid_alive(state["scsynth_pid"]):
+        console.print(
+            f"[yellow]Shared server already running on port {state['options']['port']} "
+            f"(pid {state['scsynth_pid']}).[/yellow]"
+        )
+        raise typer.Exit(1)
+
+    console.print(f"Booting shared server with configuration from {CONFIG_PATH}.")
+    server = supriya.Server()
+    try:
+        # Attached clients then find the toolkit's SynthDefs already loaded
+        registry.prepare_boot()
+        BootNegotiator(overrides=boot_overrides(port)).boot(
+            server,
+            on_attempt=lambda settings: console.print(
+                "Attempting Configuration:", settings
+            ),
+        )
+    except Exception as e:
+        console.print(f"[bold red]Failed to boot shared server: {e}[/bold red]")
+        raise typer.Exit(1)
+
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    STATE_PATH.write_text(
+        json.dumps(
+            {
+                "pid": os.getpid(),
+                "scsynth_pid": server.process_protocol.process.pid,
+                "started": time.time(),
+                "options": {
+                    name: getattr(server.options, name) for name in SHARED_OPTIONS
+                },
+            },
+            indent=2,
+        )
+    )
+
+    # `serve stop` sends SIGTERM; treat it like Ctrl-C so scsynth quits cleanly
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    options = server.options
+    console.print(
+        f"[bold green]Shared server running on {options.ip_address}:{options.port} "
+        f"(pid {server.process_protocol.process.pid}, "
+        f"{options.maximum_logins} clients). Press Ctrl-C to stop.[/bold green]"
+    )
+    try:
+        server.exit_future.result()
+    except KeyboardInterrupt:
+        console.print("Stopping shared server...")
+        server.quit()
+    finally:
+        STATE_PATH.unlink(missing_ok=True)
+
+
+@serve_app.command(name="status")
+def status(
+    timeout: float = typer.Option(
+        1.0, "--timeout", "-t", help="Seconds to wait for /status.reply."
+    )
+):
+    """Health-check the shared server."""
+    state = read_state()
+    if state is None:
+        console.print("[yellow]No shared server has been started.[/yellow]")
+        raise typer.Exit(1)
+
+    options = state["options"]
+    table = Table(show_header=False)
+    table.add_row("Port", f"{options['ip_address']}:{options['port']}")
+    table.add_row("Daemon PID", str(state["pid"]))
+    table.add_row("scsynth PID", str(state["scsynth_pid"]))
+    table.add_row("Clients", str(options["maximum_logins"]))
+    table.add_row("Uptime", f"{time.time() - state['started']:.0f} s")
+
+    healthy = pid_alive(state["scsynth_pid"])
+    if healthy:
+        try:
+            info, elapsed = ping(options["ip_address"], options["port"], timeout)
+        except OSError:
+            healthy = False
+        else:
+            table.add_row("Round trip", f"{elapsed * 1000:.2f} ms")
+            table.add_row(
+                "CPU (avg/peak)",
+                f"{info.average_cpu_usage:.1f}% / {info.peak_cpu_usage:.1f}%",
+            )
+            table.add_row("Synths / groups", f"{info.synth_count} / {info.group_count}")
+            table.add_row("SynthDefs", str(info.synthdef_count))
+    table.add_row(
+        "Health", "[green]ok[/green]" if healthy else "[red]unreachable[/red]"
+    )
+    console.print(table)
+    if not healthy:
+        raise typer.Exit(1)
+
+
+@serve_app.command(name="stop")
+def stop():
+    """Stop the shared server."""
+    state = read_state()
+    if state is None:
+        console.print("[yellow]No shared server has been started.[/yellow]")
+        raise typer.Exit(1)
+    if pid_alive(state["pid"]):
+        os.kill(state["pid"], signal.SIGTERM)
+    elif pid_alive(state["scsynth_pid"]):
+        # The daemon died without cleaning up; ask scsynth to quit directly
+        options = state["options"]
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(
+                supriya.OscMessage("/quit").to_datagram(),
+                (options["ip_address"], options["port"]),
+            )
+        STATE_PATH.unlink(missing_ok=True)
+    else:
+        STATE_PATH.unlink(missing_ok=True)
+    console.print("[bold green]Shared server stopped.[/bold green]")
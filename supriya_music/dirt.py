@@ -0,0 +1,448 @@
+"""
+SuperDirt-compatible ``/dirt/play`` receiver.
+
+Tidal sends every event to SuperDirt on port 57120 as a ``/dirt/play``
+message of alternating names and values, inside a bundle stamped with the
+time the event should sound. ``DirtReceiver`` listens on that port instead
+and plays the events on scsynth directly: ``s`` names one of the toolkit's
+SynthDefs or a folder of samples (``n`` picks the file), and parameters
+such as ``note``, ``gain``, ``pan``, ``speed`` and ``sustain`` map onto the
+SynthDef's controls.
+
+Dense patterns deliver many events per frame, so the receiver does as
+little per event as it can:
+
+- every datagram already waiting on the socket is decoded before anything
+  is sent, and events whose timetags fall within one control block (the
+  finest resolution scsynth starts synths at) share one timestamped bundle;
+- bundles are encoded straight into reused buffers from precompiled
+  message layouts, without creating supriya request or proxy objects;
+- node IDs are taken from the client's allocator in blocks.
+"""
+
+import functools
+import logging
+import select
+import socket
+import struct
+import time
+from itertools import chain
+from pathlib import Path
+from typing import Optional
+
+import typer
+from rich.console import Console
+
+from .config import CONFIG
+
+# Seconds between the NTP epoch (1900) and the Unix epoch (1970)
+NTP_DELTA = 2208988800
+# Largest datagram sent to scsynth; bigger batches are split
+MAX_DATAGRAM = 8192
+
+console = Console()
+
+
+def _pad(text):
+    """OSC string: null-terminated and padded to a multiple of four bytes"""
+    data = text.encode("utf-8") + b"\0"
+    return data + b"\0" * (-len(data) % 4)
+
+
+def _timetag(seconds):
+    return int((seconds + NTP_DELTA) * 4294967296)
+
+
+class _Message:
+    """
+    Precompiled OSC message layout.
+
+    ``arguments`` are either constant strings or the types ``int`` and
+    ``float`` as placeholders; ``pack_into`` fills the placeholders in order
+    and writes the encoded message straight into a buffer.
+    """
+
+    def __init__(self, address, *arguments):
+        tags = ","
+        fields = [None, None]
+        formats = []
+        self._slots = []
+        for argument in arguments:
+            if isinstance(argument, str):
+                tags += "s"
+                fields.append(_pad(argument))
+                formats.append(f"{len(fields[-1])}s")
+            else:
+                tags += "i" if argument is int else "f"
+                self._slots.append(len(fields))
+                fields.append(0)
+                formats.append("i" if argument is int else "f")
+        fields[0], fields[1] = _pad(address), _pad(tags)
+        self._fields = fields
+        self._struct = struct.Struct(
+            f">{len(fields[0])}s{len(fields[1])}s" + "".join(formats)
+        )
+        self.size = self._struct.size
+
+    def pack_into(self, buffer, offset, *values):
+        fields = self._fields
+        for slot, value in zip(self._slots, values):
+            fields[slot] = value
+        self._struct.pack_into(buffer, offset, *fields)
+
+
+_N_SET_GATE = _Message("/n_set", int, "gate", float)
+_N_FREE = _Message("/n_free", int)
+
+
+class _Bundle:
+    """A bundle being filled in a reusable buffer"""
+
+    def __init__(self):
+        self.buffer = bytearray(MAX_DATAGRAM)
+        self.buffer[:8] = b"#bundle\0"
+        self.size = 16
+        self.seconds = None
+
+    def reset(self, seconds):
+        struct.pack_into(">Q", self.buffer, 8, _timetag(seconds))
+        self.seconds = seconds
+        self.size = 16
+
+    def add(self, message, *values):
+        """Append a message; False when it doesn't fit"""
+        if self.size + 4 + message.size > MAX_DATAGRAM:
+            return False
+        struct.pack_into(">i", self.buffer, self.size, message.size)
+        message.pack_into(self.buffer, self.size + 4, *values)
+        self.size += 4 + message.size
+        return True
+
+
+class _NodeIds:
+    """Node IDs handed out from blocks reserved in one allocator call"""
+
+    def __init__(self, allocate, block_size=1024):
+        self.allocate = allocate
+        self.block_size = block_size
+        self._next = self._end = 0
+
+    def __call__(self):
+        if self._next == self._end:
+            self._next = self.allocate(self.block_size)
+            self._end = self._next + self.block_size
+        node_id = self._next
+        self._next += 1
+        return node_id
+
+
+class _Instrument:
+    """How events for one ``s`` value become a synth"""
+
+    def __init__(self, synthdef_name, controls, gated):
+        self.controls = controls
+        self.gated = gated
+        self.message = _Message(
+            "/s_new",
+            synthdef_name,
+            int,
+            int,
+            int,
+            *chain.from_iterable((name, float) for name, _ in controls),
+        )
+
+
+def _decode(data, offset, end, seconds, events):
+    """Append ``(seconds, address, arguments)`` for each message in a packet"""
+    if data.startswith(b"#bundle\0", offset):
+        (timetag,) = struct.unpack_from(">Q", data, offset + 8)
+        if timetag != 1:
+            seconds = timetag / 4294967296 - NTP_DELTA
+        offset += 16
+        while offset < end:
+            (size,) = struct.unpack_from(">i", data, offset)
+            _decode(data, offset + 4, offset + 4 + size, seconds, events)
+            offset += 4 + size
+        return
+    stop = data.index(0, offset)
+    address = data[offset:stop].decode()
+    offset = (stop + 4) & ~3
+    stop = data.index(0, offset)
+    tags = data[offset + 1 : stop]
+    offset = (stop + 4) & ~3
+    arguments = []
+    for tag in tags:
+        if tag == 0x66:  # f
+            arguments.append(struct.unpack_from(">f", data, offset)[0])
+            offset += 4
+        elif tag == 0x69:  # i
+            arguments.append(struct.unpack_from(">i", data, offset)[0])
+            offset += 4
+        elif tag == 0x73:  # s
+            stop = data.index(0, offset)
+            arguments.append(data[offset:stop].decode())
+            offset = (stop + 4) & ~3
+        elif tag == 0x64:  # d
+            arguments.append(struct.unpack_from(">d", data, offset)[0])
+            offset += 8
+        elif tag == 0x68:  # h
+            arguments.append(struct.unpack_from(">q", data, offset)[0])
+            offset += 8
+        else:
+            raise ValueError(f"Unsupported OSC type tag {chr(tag)!r}")
+    events.append((seconds, address, arguments))
+
+
+class DirtReceiver:
+    """Plays ``/dirt/play`` events arriving on ``sock`` on the server at ``target``"""
+
+    def __init__(
+        self,
+        sock,
+        target,
+        group_id,
+        allocate_node_ids,
+        synthdefs,
+        samples=None,
+        latency=None,
+        sample_rate=None,
+    ):
+        settings = CONFIG.get("dirt") or {}
+        self.socket = sock
+        self.target = target
+        self.group_id = group_id
+        self.synthdefs = synthdefs
+        # A SampleLibrary, loading buffers the first time they're played
+        self.samples = samples
+        # Added to events sent without a timetag
+        self.latency = latency if latency is not None else settings.get("latency", 0.1)
+        rate = sample_rate or (CONFIG.get("audio") or {}).get("sample_rate", 44100)
+        # scsynth starts synths on control-block boundaries, so events closer
+        # together than a block can share a bundle without changing the audio
+        self.window = 64 / rate
+        self.events = 0
+        self.bundles = 0
+        self.late = 0
+        self.ignored = 0
+
+        self._node_id = _NodeIds(allocate_node_ids)
+        self._instruments = {}
+        self._unknown = set()
+        self._pending = {}
+        self._spare = []
+        self._receive_buffer = bytearray(65536)
+        self._decoded = []
+
+    def instrument(self, name):
+        """The instrument for an ``s`` value, or None when nothing matches"""
+        try:
+            return self._instruments[name]
+        except KeyError:
+            pass
+        instrument = None
+        if name in self.synthdefs:
+            synthdef = self.synthdefs[name]
+            controls = [
+                (control, parameter.value[0])
+                for control, (parameter, _) in synthdef.parameters.items()
+                if control != "gate"
+            ]
+            instrument = _Instrument(
+                synthdef.name, controls, "gate" in synthdef.parameters
+            )
+        self._instruments[name] = instrument
+        return instrument
+
+    def play(self, seconds, parameters):
+        """Queue the requests for one event stamped for ``seconds``"""
+        name = parameters.get("s")
+        sample = self.samples and self.samples.get(name, int(parameters.get("n", 0)))
+        if sample:
+            buffer_id, channels = sample
+            instrument = self.instrument(f"dirt_sample_{channels}")
+            parameters["buffer_id"] = buffer_id
+            parameters.setdefault("rate", parameters.get("speed", 1.0))
+        else:
+            instrument = self.instrument(name)
+        if instrument is None:
+            self.ignored += 1
+            if name not in self._unknown:
+                self._unknown.add(name)
+                logging.warning(f"No synthdef or sample folder named {name!r}")
+            return
+
+        if "freq" in parameters:
+            parameters["frequency"] = parameters["freq"]
+        elif not sample and ("note" in parameters or "n" in parameters):
+            # Tidal's note 0 is middle C in octave 5
+            note = parameters.get("note", 0) + parameters.get("n", 0)
+            note += 60 + (parameters.get("octave", 5) - 5) * 12
+            parameters["frequency"] = 440.0 * 2 ** ((note - 69) / 12)
+        if "gain" in parameters or "amp" in parameters:
+            # As SuperDirt does: gain is a curve on top of the amplitude
+            parameters["amplitude"] = (
+                parameters.get("amp", 0.4) * parameters.get("gain", 1.0) ** 4
+            )
+
+        node_id = self._node_id()
+        self._add(
+            seconds,
+            instrument.message,
+            node_id,
+            0,
+            self.group_id,
+            *(
+                parameters.get(control, default)
+                for control, default in instrument.controls
+            ),
+        )
+        if sample and "sustain" not in parameters:
+            # Samples free themselves when they finish playing
+            return
+        sustain = parameters.get("sustain")
+        if sustain is None:
+            sustain = parameters.get("delta", 1.0) * parameters.get("legato", 1.0)
+        if instrument.gated:
+            self._add(seconds + sustain, _N_SET_GATE, node_id, 0.0)
+        else:
+            self._add(seconds + sustain, _N_FREE, node_id)
+
+    def _add(self, seconds, message, *values):
+        key = round(seconds / self.window)
+        bundle = self._pending.get(key)
+        if bundle is None or not bundle.add(message, *values):
+            if bundle is not None:
+                self._send(bundle)
+            bundle = self._spare.pop() if self._spare else _Bundle()
+            bundle.reset(seconds)
+            self._pending[key] = bundle
+            bundle.add(message, *values)
+
+    def _send(self, bundle):
+        self.socket.sendto(memoryview(bundle.buffer)[: bundle.size], self.target)
+        self.bundles += 1
+
+    def flush(self):
+        """Send every pending bundle"""
+        for bundle in self._pending.values():
+            self._send(bundle)
+            self._spare.append(bundle)
+        self._pending.clear()
+
+    def handle(self, data, end):
+        """Decode one datagram and queue its ``/dirt/play`` events"""
+        decoded = self._decoded
+        decoded.clear()
+        try:
+            _decode(data, 0, end, None, decoded)
+        except (ValueError, IndexError, struct.error) as e:
+            logging.warning(f"Ignoring malformed OSC packet: {e}")
+            return
+        now = time.time()
+        for seconds, address, arguments in decoded:
+            if address != "/dirt/play":
+                # e.g. /fail or /done replies from scsynth to this socket
+                continue
+            if seconds is None:
+                seconds = now + self.latency
+            elif seconds < now:
+                self.late += 1
+            self.events += 1
+            self.play(seconds, dict(zip(arguments[::2], arguments[1::2])))
+
+    def poll(self, timeout=None):
+        """Wait for packets, handle all that are waiting, then send the bundles"""
+        if not select.select([self.socket], [], [], timeout)[0]:
+            return
+        while True:
+            try:
+                size = self.socket.recv_into(self._receive_buffer)
+            except BlockingIOError:
+                break
+            self.handle(self._receive_buffer, size)
+        self.flush()
+
+    def serve_forever(self):
+        self.socket.setblocking(False)
+        while True:
+            self.poll()
+
+
+def dirt(
+    port: Optional[int] = typer.Option(
+        None, "--port", "-p", help="UDP port to listen on (SuperDirt uses 57120)."
+    ),
+    samples: Optional[Path] = typer.Option(
+        None, "--samples", help="Folder of sample folders, e.g. Dirt-Samples."
+    ),
+    attach: bool = typer.Option(
+        False, "--attach", help="Use the shared server started by 'serve'."
+    ),
+):
+    """Play Tidal's /dirt/play events on supriya instead of SuperDirt."""
+    from .daemon import allocate_node_ids, open_server, release_server
+    from .samples import SampleIndex, SampleLibrary
+    from .synthdefs import registry
+
+    settings = CONFIG.get("dirt") or {}
+    port = port or settings.get("port", 57120)
+    samples = samples or settings.get("samples")
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.bind(("127.0.0.1", port))
+    except OSError as e:
+        console.print(
+            f"[bold red]Cannot listen on port {port}: {e}. "
+            "Is SuperDirt already running?[/bold red]"
+        )
+        raise typer.Exit(1)
+
+    server = open_server(console, attach)
+    try:
+        registry.load(server)
+        library = None
+        if samples:
+            index = SampleIndex(samples).load()
+            library = SampleLibrary(server, index)
+            console.print(
+                f"Indexed {len(index)} samples in {len(index.banks)} folders "
+                f"({index.scanned} rescanned); loading them as they're played."
+            )
+        group = server.add_group()
+        server.sync()
+
+        receiver = DirtReceiver(
+            sock,
+            (server.options.ip_address, server.options.port),
+            int(group),
+            # Node IDs come from this client's own range, a block at a time
+            functools.partial(allocate_node_ids, server),
+            {name: registry[name] for name in registry},
+            library,
+            sample_rate=server.options.sample_rate,
+        )
+        console.print(
+            f"[bold green]Listening for /dirt/play on port {port}. "
+            "Press Ctrl-C to stop.[/bold green]"
+        )
+        start = time.perf_counter()
+        try:
+            receiver.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        elapsed = time.perf_counter() - start
+        console.print(
+            f"Played {receiver.events} events in {receiver.bundles} bundles "
+            f"over {elapsed:.0f} s ({receiver.late} late, {receiver.ignored} ignored)."
+        )
+        if library:
+            console.print(
+                f"Samples: {library.loads} loaded, {library.hits} reused, "
+                f"{library.evictions} evicted."
+            )
+            library.free()
+        group.free()
+    finally:
+        sock.close()
+        release_server(server)
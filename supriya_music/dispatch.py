@@ -0,0 +1,83 @@
+"""
+Coalescing parameter dispatcher for the real-time controllers.
+
+Slider handlers call ``dispatcher.set(synth, frequency=...)`` as often as Qt
+emits ``valueChanged``. Only the latest value per control is kept, and pending
+changes are flushed at most ``max_rate`` times per second, with every changed
+control on a node packed into a single ``/n_set``. Anything with a
+``set(**controls)`` method works in place of a node; the examples pass their
+``MappedControls``, which turns each flush into ``/c_set`` on control buses.
+"""
+
+import logging
+import threading
+import time
+
+
+class ParameterDispatcher:
+    """Latest-value-wins ``/n_set`` dispatcher with a bounded send rate"""
+
+    def __init__(self, server, max_rate=60.0):
+        self.server = server
+        self.interval = 1.0 / max_rate if max_rate else 0.0
+
+        # Statistics, useful to see how much traffic was coalesced away
+        self.change_count = 0
+        self.flush_count = 0
+
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+        self._last_flush = 0.0
+        self._thread = threading.Thread(
+            target=self._run, name="ParameterDispatcher", daemon=True
+        )
+        self._thread.start()
+
+    def set(self, node, **controls):
+        """Queue control changes for a node, replacing any unsent values"""
+        with self._lock:
+            self._pending.setdefault(node, {}).update(controls)
+            self.change_count += len(controls)
+        self._wakeup.set()
+
+    def discard(self, node):
+        """Drop any unsent changes for a node, e.g. right before freeing it"""
+        with self._lock:
+            self._pending.pop(node, None)
+
+    def flush(self):
+        """Send all pending changes now, one ``/n_set`` per node in one bundle"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            with self.server.at():
+                for node, controls in pending.items():
+                    node.set(**controls)
+            self.flush_count += 1
+        except Exception as e:
+            logging.warning(f"Failed to dispatch parameter changes: {e}")
+
+    def close(self):
+        """Flush outstanding changes and stop the dispatcher thread"""
+        self._closed.set()
+        self._wakeup.set()
+        self._thread.join(timeout=1.0)
+        self.flush()
+
+    def _run(self):
+        while not self._closed.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._closed.is_set():
+                break
+            # Leading edge goes out immediately; anything arriving inside the
+            # interval waits for the next slot and is coalesced meanwhile
+            delay = self._last_flush + self.interval - time.monotonic()
+            if delay > 0 and self._closed.wait(delay):
+                break
+            self.flush()
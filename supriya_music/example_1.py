@@ -15,39 +15,60 @@ from PyQt6.QtWidgets import (
     QWidget,
     QPushButton,
     QLabel,
-    QMessageBox,
     QSlider,
     QGridLayout,
 )
-from PyQt6.QtCore import QTimer, pyqtSignal, Qt
+from PyQt6.QtCore import pyqtSignal, Qt
 from PyQt6.QtGui import QFont
 from rich import print as rprint
-from rich.console import Console
-from rich.panel import Panel
-from rich.syntax import Syntax
+
+from .buses import MappedControls
+from .config import CONFIG
+from .daemon import release_server
+from .dispatch import ParameterDispatcher
+from .metrics import OscMetrics
+from .nodetree import NodeTreeMirror
+from .qtboot import ServerBooter
+from .scope import ScopeReader, ScopeTap, ScopeWidget
+from .status import StatusPoller
+from .synthdefs import registry
+from .terminal import AsyncConsole
 
 
 class SupriyaController(QMainWindow):
     """Main window for controlling Supriya synths"""
 
-    def __init__(self):
+    # Server /status samples, delivered from the poller thread to the GUI thread
+    status_sampled = pyqtSignal(object)
+
+    def __init__(self, attach=False, metrics=False):
         super().__init__()
+        self.attach = attach
+        self.metrics_enabled = metrics
+        self.metrics = None
         self.server = None
         self.synth = None
-        self.sine_synthdef = None
-        self.console = Console()
+        self.dispatcher = None
+        self.controls = None
+        self.node_tree = None
+        self.scope_tap = None
+        self.scope_reader = None
+        self.status_poller = None
+        self.booter = None
+        self.console = AsyncConsole()
 
         # Current synth parameters
         self.current_frequency = 440
         self.current_amplitude = 0.1
 
         self.setup_ui()
+        self.set_controls_enabled(False)
         self.setup_supriya()
 
     def setup_ui(self):
         """Initialize the user interface"""
         self.setWindowTitle("Supriya Real-time Control - Example 1")
-        self.setGeometry(100, 100, 400, 300)
+        self.setGeometry(100, 100, 400, 520)
 
         # Central widget and main layout
         central_widget = QWidget()
@@ -65,6 +86,11 @@ class SupriyaController(QMainWindow):
         self.status_label.setStyleSheet("QLabel { color: #666; margin: 5px; }")
         main_layout.addWidget(self.status_label)
 
+        # Server load, updated from /status while the server is up
+        self.health_label = QLabel("Server load: -")
+        self.health_label.setStyleSheet("QLabel { color: #666; margin: 5px; }")
+        main_layout.addWidget(self.health_label)
+
         # Synth info
         self.synth_info_label = QLabel("Synth: None active")
         self.synth_info_label.setStyleSheet("QLabel { color: #333; margin: 5px; }")
@@ -201,6 +227,10 @@ class SupriyaController(QMainWindow):
 
         main_layout.addLayout(sliders_layout)
 
+        # Output scope and spectrum, live once the server is up
+        self.scope = ScopeWidget()
+        main_layout.addWidget(self.scope)
+
         # Instructions
         instructions = QLabel(
             "Instructions:\n"
@@ -217,25 +247,16 @@ class SupriyaController(QMainWindow):
         # Spacer
         main_layout.addStretch()
 
-    def show_code_panel(self, title, code, description=None):
-        """Display a panel with relevant Supriya code"""
-        # Display description if provided
-        if description:
-            self.console.print(f"[dim]{description}[/dim]")
-
-        # Display syntax-highlighted code in a panel
-        syntax = Syntax(code, "python", theme="monokai", line_numbers=True)
-        self.console.print(
-            Panel(
-                syntax, title=f"📝 {title}", border_style="bright_cyan", padding=(1, 2)
-            )
-        )
-        self.console.print()  # Add spacing
+    def show_code_panel(self, title, code, description=None, key=None):
+        """Display a panel with relevant Supriya code; ``key`` for live values"""
+        self.console.code_panel(title, code, description, key=key)
 
     def setup_supriya(self):
         """Initialize Supriya server and SynthDef"""
         try:
-            rprint("[bold blue]🎵 Initializing Supriya server...[/bold blue]")
+            self.console.print(
+                "[bold blue]🎵 Initializing Supriya server...[/bold blue]"
+            )
 
             # Show server setup code
             server_code = """# Create and boot SuperCollider server
@@ -247,9 +268,17 @@ server.boot()"""
                 "Creating and booting the SuperCollider audio server:",
             )
 
-            # Create and boot server
+            # Create the server; it boots in the background so the window stays live
             self.server = supriya.Server()
-            self.server.boot()
+            if self.metrics_enabled:
+                # Count the GUI's OSC traffic from the first boot message on
+                self.metrics = OscMetrics(self.server).start()
+                self.console.print(
+                    f"[dim]Writing OSC metrics to {self.metrics.directory}[/dim]"
+                )
+            self.booter = ServerBooter(self.server, attach=self.attach, parent=self)
+            self.booter.booted.connect(self.on_server_booted)
+            self.booter.failed.connect(self.on_server_boot_failed)
 
             # Show SynthDef creation code
             synthdef_code = """# Define sine wave SynthDef using decorator syntax
@@ -272,39 +301,72 @@ server.add_synthdefs(sine_synth)"""
                 "Defining a sine wave synthesizer with frequency and amplitude control:",
             )
 
-            # Define the sine wave SynthDef (using new decorator syntax from tutorial)
-            @supriya.synthdef()
-            def sine_synth(amplitude=0.1, frequency=440):
-                sine = supriya.ugens.SinOsc.ar(frequency=frequency)
-                scaled_sine = sine * amplitude
-                supriya.ugens.Out.ar(bus=0, source=scaled_sine)
-
-            # Add SynthDef to server
-            self.sine_synthdef = sine_synth
-            self.server.add_synthdefs(self.sine_synthdef)
+            # sine_synth itself is registered in synthdefs.py; its compiled form
+            # is cached on disk and loaded by scsynth in bulk while booting
 
-            self.update_status("✅ Server ready - SuperCollider connected")
-            rprint(
-                "[bold green]✅ Supriya server initialized successfully![/bold green]"
-            )
+            self.update_status("⏳ Booting SuperCollider server...")
+            self.booter.start()
 
         except Exception as e:
-            error_msg = f"❌ Failed to initialize Supriya: {str(e)}"
-            self.update_status(error_msg)
-            rprint(f"[bold red]{error_msg}[/bold red]")
-
-            # Show error dialog
-            QMessageBox.critical(
-                self,
-                "Supriya Error",
-                f"Failed to connect to SuperCollider server:\n\n{str(e)}\n\n"
-                "Make sure SuperCollider is installed and try again.\n\n"
-                "Application will now exit.",
-            )
+            self.on_server_boot_failed(str(e))
+
+    def on_server_booted(self, server):
+        """Finish setup once the server has booted and loaded its SynthDefs"""
+        # Slider changes are coalesced and rate-limited before reaching the server
+        self.dispatcher = ParameterDispatcher(
+            self.server,
+            max_rate=(CONFIG.get("control") or {}).get("max_rate", 60),
+        )
 
-            # Exit the application since server boot failed
-            QApplication.quit()
-            sys.exit(1)
+        # Parameters live on control buses that synths are mapped to, so a
+        # slider change is one /c_set however many synths are playing
+        self.controls = MappedControls(
+            self.server,
+            frequency=self.current_frequency,
+            amplitude=self.current_amplitude,
+        )
+
+        # Mirror the node tree from notifications instead of querying it
+        self.node_tree = NodeTreeMirror(
+            self.server,
+            reconcile_interval=(CONFIG.get("control") or {}).get(
+                "reconcile_interval", 10
+            ),
+        ).start()
+
+        # Tap the main outputs for the scope, which reads them on its own thread
+        self.scope_tap = ScopeTap(self.server).start()
+        self.scope_reader = ScopeReader(self.scope_tap).start()
+        self.node_tree.track(self.scope_tap.synth)
+        self.scope.attach(self.scope_reader)
+
+        # Watch the server's load so overload shows before audio drops out
+        self.status_poller = StatusPoller.for_server(self.server)
+        self.status_sampled.connect(self.on_status_sampled)
+        self.status_poller.subscribe(self.status_sampled.emit)
+        self.status_poller.start()
+
+        self.set_controls_enabled(True)
+        self.update_status("✅ Server ready - SuperCollider connected")
+        self.console.print(
+            "[bold green]✅ Supriya server initialized successfully![/bold green]"
+        )
+
+    def on_server_boot_failed(self, message):
+        """Report a failed boot; controls stay locked"""
+        error_msg = f"❌ Failed to initialize Supriya: {message}"
+        self.update_status(error_msg)
+        self.status_label.setStyleSheet("QLabel { color: #C0392B; margin: 5px; }")
+        self.console.print(f"[bold red]{error_msg}[/bold red]")
+        self.console.print(
+            "[yellow]Make sure SuperCollider is installed, then restart the controller.[/yellow]"
+        )
+
+    def set_controls_enabled(self, enabled):
+        """Lock or unlock the synth controls"""
+        self.start_button.setEnabled(enabled and self.synth is None)
+        self.freq_slider.setEnabled(enabled)
+        self.amp_slider.setEnabled(enabled)
 
     def on_frequency_changed(self, value):
         """Handle frequency slider changes"""
@@ -319,7 +381,7 @@ server.add_synthdefs(sine_synth)"""
                     value % 50 == 0 or value == 110 or value == 1760
                 ):  # Show occasionally
                     update_code = f"""# Real-time parameter control
-synth.set(frequency={value})  # Update frequency while playing
+controls.set(frequency={value})  # One /c_set on the frequency bus
 
 # This immediately changes the pitch without stopping the synth
 # Very useful for live performance and interaction"""
@@ -327,13 +389,16 @@ synth.set(frequency={value})  # Update frequency while playing
                         "Real-time Control",
                         update_code,
                         "Updating synth parameters while playing:",
+                        key="frequency",
                     )
 
-                self.synth.set(frequency=value)
+                self.dispatcher.set(self.controls, frequency=value)
                 self.update_synth_info()
-                rprint(f"[cyan]🎵 Frequency updated to {value} Hz[/cyan]")
+                self.console.print(
+                    f"[cyan]🎵 Frequency updated to {value} Hz[/cyan]", key="frequency"
+                )
             except Exception as e:
-                rprint(f"[red]❌ Error updating frequency: {e}[/red]")
+                self.console.print(f"[red]❌ Error updating frequency: {e}[/red]")
 
     def on_amplitude_changed(self, value):
         """Handle amplitude slider changes"""
@@ -348,7 +413,7 @@ synth.set(frequency={value})  # Update frequency while playing
                 # Show amplitude control code occasionally
                 if value % 10 == 0:  # Show every 10th value
                     amp_code = f"""# Volume control in real-time
-synth.set(amplitude={amplitude:.2f})  # Set volume (0.0 = silent, 1.0 = full)
+controls.set(amplitude={amplitude:.2f})  # Set volume (0.0 = silent, 1.0 = full)
 
 # Amplitude changes are immediate and smooth
 # Perfect for creating fade-ins, fade-outs, and dynamic expression"""
@@ -356,13 +421,17 @@ synth.set(amplitude={amplitude:.2f})  # Set volume (0.0 = silent, 1.0 = full)
                         "Volume Control",
                         amp_code,
                         "Real-time amplitude/volume adjustment:",
+                        key="amplitude",
                     )
 
-                self.synth.set(amplitude=amplitude)
+                self.dispatcher.set(self.controls, amplitude=amplitude)
                 self.update_synth_info()
-                rprint(f"[magenta]🔊 Amplitude updated to {amplitude:.2f}[/magenta]")
+                self.console.print(
+                    f"[magenta]🔊 Amplitude updated to {amplitude:.2f}[/magenta]",
+                    key="amplitude",
+                )
             except Exception as e:
-                rprint(f"[red]❌ Error updating amplitude: {e}[/red]")
+                self.console.print(f"[red]❌ Error updating amplitude: {e}[/red]")
 
     def update_synth_info(self):
         """Update the synth info display"""
@@ -378,36 +447,45 @@ synth.set(amplitude={amplitude:.2f})  # Set volume (0.0 = silent, 1.0 = full)
         """Start a sine wave synth with current slider values"""
         try:
             if self.synth is not None:
-                rprint(
+                self.console.print(
                     "[yellow]⚠️  Synth already running, freeing existing synth first[/yellow]"
                 )
                 self.synth.free()
+                self.node_tree.forget(self.synth)
 
-            rprint(
+            self.console.print(
                 f"[bold cyan]🎵 Starting synth at {self.current_frequency} Hz, amplitude {self.current_amplitude:.2f}...[/bold cyan]"
             )
 
             # Show synth creation code
-            create_code = f"""# Create and start a synth instance
-synth = server.add_synth(
-    sine_synth,  # The SynthDef we created
+            create_code = f"""# Keep the parameters on control buses
+controls = MappedControls(
+    server,
     frequency={self.current_frequency},  # Hz
     amplitude={self.current_amplitude:.2f}   # Volume (0.0-1.0)
 )
 
-# The synth is now playing and can be controlled in real-time"""
+# Create a synth whose controls read those buses ("c0", "c1", ...)
+synth = server.add_synth(sine_synth, **controls.settings())
+
+# The synth is now playing and follows every controls.set(...)"""
             self.show_code_panel(
                 "Synth Creation",
                 create_code,
                 "Creating a synth instance with specific parameters:",
             )
 
-            # Create synth with current slider parameters
-            self.synth = self.server.add_synth(
-                self.sine_synthdef,
-                amplitude=self.current_amplitude,
-                frequency=self.current_frequency,
-            )
+            # Create synth mapped to the buses, which are brought up to date
+            # with sliders moved while nothing was playing
+            with self.server.at():
+                self.controls.set(
+                    frequency=self.current_frequency,
+                    amplitude=self.current_amplitude,
+                )
+                self.synth = self.server.add_synth(
+                    registry["sine_synth"], **self.controls.settings()
+                )
+            self.node_tree.track(self.synth, parent=self.server.default_group)
 
             # Update UI
             self.update_synth_info()
@@ -418,22 +496,22 @@ synth = server.add_synth(
             self.freq_slider.setEnabled(True)
             self.amp_slider.setEnabled(True)
 
-            rprint("[bold green]✅ Synth started successfully![/bold green]")
-            rprint(f"[dim]Server tree: {self.server.query_tree()}[/dim]")
+            self.console.print("[bold green]✅ Synth started successfully![/bold green]")
+            self.console.print(f"[dim]Server tree: {self.node_tree.snapshot()}[/dim]")
 
         except Exception as e:
             error_msg = f"❌ Failed to start synth: {str(e)}"
             self.update_status(error_msg)
-            rprint(f"[bold red]{error_msg}[/bold red]")
+            self.console.print(f"[bold red]{error_msg}[/bold red]")
 
     def free_synth(self):
         """Free (stop) the current synth"""
         try:
             if self.synth is None:
-                rprint("[yellow]⚠️  No synth to free[/yellow]")
+                self.console.print("[yellow]⚠️  No synth to free[/yellow]")
                 return
 
-            rprint("[bold yellow]🔇 Freeing synth...[/bold yellow]")
+            self.console.print("[bold yellow]🔇 Freeing synth...[/bold yellow]")
 
             # Show synth cleanup code
             cleanup_code = """# Stop and remove synth from server
@@ -450,8 +528,9 @@ synth = None
                 "Properly stopping and cleaning up synth resources:",
             )
 
-            # Free the synth
+            # Free the synth; the buses keep the slider values for the next one
             self.synth.free()
+            self.node_tree.forget(self.synth)
             self.synth = None
 
             # Update UI
@@ -463,44 +542,74 @@ synth = None
             # Keep sliders enabled for setting next synth parameters
             # (they still update the current_* values)
 
-            rprint("[bold green]✅ Synth freed successfully![/bold green]")
-            rprint(f"[dim]Server tree: {self.server.query_tree()}[/dim]")
+            self.console.print("[bold green]✅ Synth freed successfully![/bold green]")
+            self.console.print(f"[dim]Server tree: {self.node_tree.snapshot()}[/dim]")
 
         except Exception as e:
             error_msg = f"❌ Failed to free synth: {str(e)}"
             self.update_status(error_msg)
-            rprint(f"[bold red]{error_msg}[/bold red]")
+            self.console.print(f"[bold red]{error_msg}[/bold red]")
+
+    def on_status_sampled(self, sample):
+        """Show the server's latest load, coloured by how close it is to overload"""
+        color = {"ok": "#2E7D32", "warn": "#F18F01", "overload": "#C0392B"}[
+            self.status_poller.level()
+        ]
+        late = "" if sample.late is None else f" · {sample.late} late"
+        self.health_label.setText(
+            f"Server load: {sample.average_cpu:.1f}% avg / {sample.peak_cpu:.1f}% peak"
+            f" · {sample.synths} synths · {sample.ugens} UGens{late}"
+        )
+        self.health_label.setStyleSheet(f"QLabel {{ color: {color}; margin: 5px; }}")
 
     def update_status(self, message):
         """Update the status label"""
         self.status_label.setText(f"Status: {message}")
-        rprint(f"[dim]Status: {message}[/dim]")
+        self.console.print(f"[dim]Status: {message}[/dim]", key="status")
 
     def closeEvent(self, event):
         """Handle application closure"""
-        rprint("[bold blue]🔄 Shutting down Supriya controller...[/bold blue]")
+        self.console.print(
+            "[bold blue]🔄 Shutting down Supriya controller...[/bold blue]"
+        )
+
+        # Stop dispatching parameter changes, mirroring the node tree, scoping
+        # and polling the server's status
+        if self.dispatcher is not None:
+            self.dispatcher.close()
+        if self.node_tree is not None:
+            self.node_tree.stop()
+        if self.scope_reader is not None:
+            self.scope.detach()
+            self.scope_reader.stop()
+            self.scope_tap.stop()
+        if self.status_poller is not None:
+            self.status_poller.stop()
 
         # Free any active synth
         if self.synth is not None:
             try:
                 self.synth.free()
-                rprint("[green]✅ Synth freed on shutdown[/green]")
+                self.console.print("[green]✅ Synth freed on shutdown[/green]")
             except Exception as e:
-                rprint(f"[red]❌ Error freeing synth on shutdown: {e}[/red]")
+                self.console.print(f"[red]❌ Error freeing synth on shutdown: {e}[/red]")
 
-        # Quit server
+        # Quit the server, or just detach when sharing the `serve` daemon
         if self.server is not None:
             try:
-                self.server.quit()
-                rprint("[green]✅ Supriya server shutdown[/green]")
+                release_server(self.server)
+                self.console.print("[green]✅ Supriya server shutdown[/green]")
             except Exception as e:
-                rprint(f"[red]❌ Error shutting down server: {e}[/red]")
+                self.console.print(f"[red]❌ Error shutting down server: {e}[/red]")
+        if self.metrics is not None:
+            self.metrics.stop()
 
-        rprint("[bold blue]👋 Goodbye![/bold blue]")
+        self.console.print("[bold blue]👋 Goodbye![/bold blue]")
+        self.console.close()
         event.accept()
 
 
-def main():
+def main(attach=False, metrics=False):
     """Main application entry point"""
     rprint("[bold blue]🎵 Starting Supriya Real-time Control Example 1[/bold blue]")
 
@@ -512,7 +621,7 @@ def main():
     app.setOrganizationName("Strudel Music")
 
     # Create and show main window
-    controller = SupriyaController()
+    controller = SupriyaController(attach=attach, metrics=metrics)
     controller.show()
 
     # Run the application
@@ -15,27 +15,47 @@ from PyQt6.QtWidgets import (
     QWidget,
     QPushButton,
     QLabel,
-    QMessageBox,
     QSlider,
     QGridLayout,
 )
-from PyQt6.QtCore import QTimer, pyqtSignal, Qt
+from PyQt6.QtCore import pyqtSignal, Qt
 from PyQt6.QtGui import QFont
 from rich import print as rprint
-from rich.console import Console
-from rich.panel import Panel
-from rich.syntax import Syntax
+
+from .buses import MappedControls
+from .config import CONFIG
+from .daemon import release_server
+from .dispatch import ParameterDispatcher
+from .metrics import OscMetrics
+from .nodetree import NodeTreeMirror
+from .qtboot import ServerBooter
+from .scope import ScopeReader, ScopeTap, ScopeWidget
+from .status import StatusPoller
+from .synthdefs import registry
+from .terminal import AsyncConsole
 
 
 class SupriyaController(QMainWindow):
     """Main window for controlling Supriya synths with noise modulation"""
 
-    def __init__(self):
+    # Server /status samples, delivered from the poller thread to the GUI thread
+    status_sampled = pyqtSignal(object)
+
+    def __init__(self, attach=False, metrics=False):
         super().__init__()
+        self.attach = attach
+        self.metrics_enabled = metrics
+        self.metrics = None
         self.server = None
         self.synth = None
-        self.sine_test_synthdef = None
-        self.console = Console()
+        self.dispatcher = None
+        self.controls = None
+        self.node_tree = None
+        self.scope_tap = None
+        self.scope_reader = None
+        self.status_poller = None
+        self.booter = None
+        self.console = AsyncConsole()
 
         # Current synth parameters
         self.current_noise_hz = 8.0
@@ -43,12 +63,13 @@ class SupriyaController(QMainWindow):
         self.current_note_offset = 50.0
 
         self.setup_ui()
+        self.set_controls_enabled(False)
         self.setup_supriya()
 
     def setup_ui(self):
         """Initialize the user interface"""
         self.setWindowTitle("Supriya Real-time Control - Example 2 (Noise Modulated)")
-        self.setGeometry(100, 100, 450, 400)
+        self.setGeometry(100, 100, 450, 620)
 
         # Central widget and main layout
         central_widget = QWidget()
@@ -66,6 +87,11 @@ class SupriyaController(QMainWindow):
         self.status_label.setStyleSheet("QLabel { color: #666; margin: 5px; }")
         main_layout.addWidget(self.status_label)
 
+        # Server load, updated from /status while the server is up
+        self.health_label = QLabel("Server load: -")
+        self.health_label.setStyleSheet("QLabel { color: #666; margin: 5px; }")
+        main_layout.addWidget(self.health_label)
+
         # Synth info
         self.synth_info_label = QLabel("Synth: None active")
         self.synth_info_label.setStyleSheet("QLabel { color: #333; margin: 5px; }")
@@ -241,6 +267,10 @@ class SupriyaController(QMainWindow):
 
         main_layout.addLayout(sliders_layout)
 
+        # Output scope and spectrum, live once the server is up
+        self.scope = ScopeWidget()
+        main_layout.addWidget(self.scope)
+
         # Instructions
         instructions = QLabel(
             "Instructions:\n"
@@ -259,25 +289,16 @@ class SupriyaController(QMainWindow):
         # Spacer
         main_layout.addStretch()
 
-    def show_code_panel(self, title, code, description=None):
-        """Display a panel with relevant Supriya code"""
-        # Display description if provided
-        if description:
-            self.console.print(f"[dim]{description}[/dim]")
-
-        # Display syntax-highlighted code in a panel
-        syntax = Syntax(code, "python", theme="monokai", line_numbers=True)
-        self.console.print(
-            Panel(
-                syntax, title=f"📝 {title}", border_style="bright_cyan", padding=(1, 2)
-            )
-        )
-        self.console.print()  # Add spacing
+    def show_code_panel(self, title, code, description=None, key=None):
+        """Display a panel with relevant Supriya code; ``key`` for live values"""
+        self.console.code_panel(title, code, description, key=key)
 
     def setup_supriya(self):
         """Initialize Supriya server and SynthDef"""
         try:
-            rprint("[bold blue]🎵 Initializing Supriya server...[/bold blue]")
+            self.console.print(
+                "[bold blue]🎵 Initializing Supriya server...[/bold blue]"
+            )
 
             # Show server setup code
             server_code = """# Create and boot SuperCollider server
@@ -289,9 +310,17 @@ server.boot()"""
                 "Creating and booting the SuperCollider audio server:",
             )
 
-            # Create and boot server
+            # Create the server; it boots in the background so the window stays live
             self.server = supriya.Server()
-            self.server.boot()
+            if self.metrics_enabled:
+                # Count the GUI's OSC traffic from the first boot message on
+                self.metrics = OscMetrics(self.server).start()
+                self.console.print(
+                    f"[dim]Writing OSC metrics to {self.metrics.directory}[/dim]"
+                )
+            self.booter = ServerBooter(self.server, attach=self.attach, parent=self)
+            self.booter.booted.connect(self.on_server_booted)
+            self.booter.failed.connect(self.on_server_boot_failed)
 
             # Show advanced SynthDef creation code
             synthdef_code = """# Define noise-modulated SynthDef with controllable parameters
@@ -320,43 +349,74 @@ server.add_synthdefs(sine_test)"""
                 "Creating a noise-modulated synthesizer with pitch and amplitude variation:",
             )
 
-            # Define the noise-modulated SynthDef with controllable parameters
-            @supriya.synthdef()
-            def sine_test(noise_hz=8, amp_noise_hz=12, note_offset=50):
-                note = (
-                    (supriya.ugens.LFNoise0.kr(frequency=noise_hz) + 1) * 8
-                ) + note_offset
-                freq = note.midi_to_hz()
-                amp = supriya.ugens.LFNoise1.kr(frequency=amp_noise_hz) * 0.01 + 0.02
-                sig = supriya.ugens.SinOsc.ar(frequency=[freq, freq * 2]) * amp
-                supriya.ugens.Out.ar(bus=0, source=sig)
-
-            # Add SynthDef to server
-            self.sine_test_synthdef = sine_test
-            self.server.add_synthdefs(self.sine_test_synthdef)
-
-            self.update_status("✅ Server ready - SuperCollider connected")
-            rprint(
-                "[bold green]✅ Supriya server initialized successfully![/bold green]"
-            )
+            # sine_test itself is registered in synthdefs.py; its compiled form
+            # is cached on disk and loaded by scsynth in bulk while booting
+
+            self.update_status("⏳ Booting SuperCollider server...")
+            self.booter.start()
 
         except Exception as e:
-            error_msg = f"❌ Failed to initialize Supriya: {str(e)}"
-            self.update_status(error_msg)
-            rprint(f"[bold red]{error_msg}[/bold red]")
-
-            # Show error dialog
-            QMessageBox.critical(
-                self,
-                "Supriya Error",
-                f"Failed to connect to SuperCollider server:\n\n{str(e)}\n\n"
-                "Make sure SuperCollider is installed and try again.\n\n"
-                "Application will now exit.",
-            )
+            self.on_server_boot_failed(str(e))
+
+    def on_server_booted(self, server):
+        """Finish setup once the server has booted and loaded its SynthDefs"""
+        # Slider changes are coalesced and rate-limited before reaching the server
+        self.dispatcher = ParameterDispatcher(
+            self.server,
+            max_rate=(CONFIG.get("control") or {}).get("max_rate", 60),
+        )
+
+        # Parameters live on control buses that synths are mapped to, so a
+        # slider change is one /c_set however many synths are playing
+        self.controls = MappedControls(
+            self.server,
+            noise_hz=self.current_noise_hz,
+            amp_noise_hz=self.current_amp_noise,
+            note_offset=self.current_note_offset,
+        )
 
-            # Exit the application since server boot failed
-            QApplication.quit()
-            sys.exit(1)
+        # Mirror the node tree from notifications instead of querying it
+        self.node_tree = NodeTreeMirror(
+            self.server,
+            reconcile_interval=(CONFIG.get("control") or {}).get(
+                "reconcile_interval", 10
+            ),
+        ).start()
+
+        # Tap the main outputs for the scope, which reads them on its own thread
+        self.scope_tap = ScopeTap(self.server).start()
+        self.scope_reader = ScopeReader(self.scope_tap).start()
+        self.node_tree.track(self.scope_tap.synth)
+        self.scope.attach(self.scope_reader)
+
+        # Watch the server's load so overload shows before audio drops out
+        self.status_poller = StatusPoller.for_server(self.server)
+        self.status_sampled.connect(self.on_status_sampled)
+        self.status_poller.subscribe(self.status_sampled.emit)
+        self.status_poller.start()
+
+        self.set_controls_enabled(True)
+        self.update_status("✅ Server ready - SuperCollider connected")
+        self.console.print(
+            "[bold green]✅ Supriya server initialized successfully![/bold green]"
+        )
+
+    def on_server_boot_failed(self, message):
+        """Report a failed boot; controls stay locked"""
+        error_msg = f"❌ Failed to initialize Supriya: {message}"
+        self.update_status(error_msg)
+        self.status_label.setStyleSheet("QLabel { color: #C0392B; margin: 5px; }")
+        self.console.print(f"[bold red]{error_msg}[/bold red]")
+        self.console.print(
+            "[yellow]Make sure SuperCollider is installed, then restart the controller.[/yellow]"
+        )
+
+    def set_controls_enabled(self, enabled):
+        """Lock or unlock the synth controls"""
+        self.start_button.setEnabled(enabled and self.synth is None)
+        self.noise_freq_slider.setEnabled(enabled)
+        self.amp_noise_slider.setEnabled(enabled)
+        self.note_offset_slider.setEnabled(enabled)
 
     def on_noise_freq_changed(self, value):
         """Handle noise frequency slider changes"""
@@ -371,7 +431,7 @@ server.add_synthdefs(sine_test)"""
                 # Show real-time parameter update code (only on significant changes)
                 if value % 50 == 0:  # Show occasionally
                     update_code = f"""# Real-time noise frequency control
-synth.set(noise_hz={freq:.1f})  # Update pitch randomness speed
+controls.set(noise_hz={freq:.1f})  # Update pitch randomness speed
 
 # Higher values = faster pitch changes
 # Lower values = slower, more gradual pitch evolution"""
@@ -379,13 +439,17 @@ synth.set(noise_hz={freq:.1f})  # Update pitch randomness speed
                         "Pitch Modulation Control",
                         update_code,
                         "Controlling the speed of pitch randomness:",
+                        key="noise_hz",
                     )
 
-                self.synth.set(noise_hz=freq)
+                self.dispatcher.set(self.controls, noise_hz=freq)
                 self.update_synth_info()
-                rprint(f"[cyan]🎲 Noise frequency updated to {freq:.1f} Hz[/cyan]")
+                self.console.print(
+                    f"[cyan]🎲 Noise frequency updated to {freq:.1f} Hz[/cyan]",
+                    key="noise_hz",
+                )
             except Exception as e:
-                rprint(f"[red]❌ Error updating noise frequency: {e}[/red]")
+                self.console.print(f"[red]❌ Error updating noise frequency: {e}[/red]")
 
     def on_amp_noise_changed(self, value):
         """Handle amplitude noise frequency slider changes"""
@@ -400,7 +464,7 @@ synth.set(noise_hz={freq:.1f})  # Update pitch randomness speed
                 # Show real-time parameter update code (only on significant changes)
                 if value % 50 == 0:  # Show occasionally
                     update_code = f"""# Real-time amplitude modulation control
-synth.set(amp_noise_hz={freq:.1f})  # Update volume tremolo speed
+controls.set(amp_noise_hz={freq:.1f})  # Update volume tremolo speed
 
 # Higher values = faster amplitude changes
 # Lower values = slower, more subtle amplitude modulation"""
@@ -408,15 +472,19 @@ synth.set(amp_noise_hz={freq:.1f})  # Update volume tremolo speed
                         "Amplitude Modulation Control",
                         update_code,
                         "Controlling the speed of amplitude tremolo:",
+                        key="amp_noise_hz",
                     )
 
-                self.synth.set(amp_noise_hz=freq)
+                self.dispatcher.set(self.controls, amp_noise_hz=freq)
                 self.update_synth_info()
-                rprint(
-                    f"[magenta]🔊 Amp noise frequency updated to {freq:.1f} Hz[/magenta]"
+                self.console.print(
+                    f"[magenta]🔊 Amp noise frequency updated to {freq:.1f} Hz[/magenta]",
+                    key="amp_noise_hz",
                 )
             except Exception as e:
-                rprint(f"[red]❌ Error updating amp noise frequency: {e}[/red]")
+                self.console.print(
+                    f"[red]❌ Error updating amp noise frequency: {e}[/red]"
+                )
 
     def on_note_offset_changed(self, value):
         """Handle note offset slider changes"""
@@ -431,7 +499,7 @@ synth.set(amp_noise_hz={freq:.1f})  # Update volume tremolo speed
                 # Show real-time parameter update code (only on significant changes)
                 if value % 50 == 0:  # Show occasionally
                     update_code = f"""# Real-time note offset control
-synth.set(note_offset={note:.1f})  # Update base MIDI note range
+controls.set(note_offset={note:.1f})  # Update base MIDI note range
 
 # This shifts the entire pitch range:
 # note_offset=50 → MIDI notes 50-66 (D3 to F#4)
@@ -441,15 +509,17 @@ synth.set(note_offset={note:.1f})  # Update base MIDI note range
                         "Note Range Control",
                         update_code,
                         "Controlling the base MIDI note range:",
+                        key="note_offset",
                     )
 
-                self.synth.set(note_offset=note)
+                self.dispatcher.set(self.controls, note_offset=note)
                 self.update_synth_info()
-                rprint(
-                    f"[yellow]🎼 Note offset updated to {note:.1f} (range: {note:.1f}-{note+16:.1f})[/yellow]"
+                self.console.print(
+                    f"[yellow]🎼 Note offset updated to {note:.1f} (range: {note:.1f}-{note+16:.1f})[/yellow]",
+                    key="note_offset",
                 )
             except Exception as e:
-                rprint(f"[red]❌ Error updating note offset: {e}[/red]")
+                self.console.print(f"[red]❌ Error updating note offset: {e}[/red]")
 
     def update_synth_info(self):
         """Update the synth info display"""
@@ -465,24 +535,29 @@ synth.set(note_offset={note:.1f})  # Update base MIDI note range
         """Start a noise-modulated synth with current slider values"""
         try:
             if self.synth is not None:
-                rprint(
+                self.console.print(
                     "[yellow]⚠️  Synth already running, freeing existing synth first[/yellow]"
                 )
                 self.synth.free()
+                self.node_tree.forget(self.synth)
 
-            rprint(
+            self.console.print(
                 f"[bold cyan]🎵 Starting noise-modulated synth (pitch noise: {self.current_noise_hz:.1f}Hz)...[/bold cyan]"
             )
 
             # Show synth creation code
-            create_code = f"""# Create noise-modulated synth instance with all parameters
-synth = server.add_synth(
-    sine_test,  # Our noise-modulated SynthDef
+            create_code = f"""# Keep all parameters on control buses
+controls = MappedControls(
+    server,
     noise_hz={self.current_noise_hz:.1f},        # Control pitch randomness speed
     amp_noise_hz={self.current_amp_noise:.1f},   # Control amplitude tremolo speed
     note_offset={self.current_note_offset:.1f}   # Control base MIDI note range
 )
 
+# Create a noise-modulated synth reading those buses; one controls.set(...)
+# updates every synth mapped this way
+synth = server.add_synth(sine_test, **controls.settings())
+
 # This synth will:
 # - Generate random pitches between MIDI notes {self.current_note_offset:.1f}-{self.current_note_offset+16:.1f}
 # - Use LFNoise0 for stepped pitch changes at {self.current_noise_hz:.1f} Hz
@@ -494,13 +569,18 @@ synth = server.add_synth(
                 "Creating a fully controllable noise-modulated synthesizer:",
             )
 
-            # Create synth with current slider parameters
-            self.synth = self.server.add_synth(
-                self.sine_test_synthdef,
-                noise_hz=self.current_noise_hz,
-                amp_noise_hz=self.current_amp_noise,
-                note_offset=self.current_note_offset,
-            )
+            # Create synth mapped to the buses, which are brought up to date
+            # with sliders moved while nothing was playing
+            with self.server.at():
+                self.controls.set(
+                    noise_hz=self.current_noise_hz,
+                    amp_noise_hz=self.current_amp_noise,
+                    note_offset=self.current_note_offset,
+                )
+                self.synth = self.server.add_synth(
+                    registry["sine_test"], **self.controls.settings()
+                )
+            self.node_tree.track(self.synth, parent=self.server.default_group)
 
             # Update UI
             self.update_synth_info()
@@ -512,24 +592,26 @@ synth = server.add_synth(
             self.amp_noise_slider.setEnabled(True)
             self.note_offset_slider.setEnabled(True)
 
-            rprint(
+            self.console.print(
                 "[bold green]✅ Noise-modulated synth started successfully![/bold green]"
             )
-            rprint(f"[dim]Server tree: {self.server.query_tree()}[/dim]")
+            self.console.print(f"[dim]Server tree: {self.node_tree.snapshot()}[/dim]")
 
         except Exception as e:
             error_msg = f"❌ Failed to start synth: {str(e)}"
             self.update_status(error_msg)
-            rprint(f"[bold red]{error_msg}[/bold red]")
+            self.console.print(f"[bold red]{error_msg}[/bold red]")
 
     def free_synth(self):
         """Free (stop) the current synth"""
         try:
             if self.synth is None:
-                rprint("[yellow]⚠️  No synth to free[/yellow]")
+                self.console.print("[yellow]⚠️  No synth to free[/yellow]")
                 return
 
-            rprint("[bold yellow]🔇 Freeing noise-modulated synth...[/bold yellow]")
+            self.console.print(
+                "[bold yellow]🔇 Freeing noise-modulated synth...[/bold yellow]"
+            )
 
             # Show synth cleanup code
             cleanup_code = """# Stop and remove noise synth from server
@@ -546,8 +628,9 @@ synth = None
                 "Properly stopping and cleaning up noise-modulated synth:",
             )
 
-            # Free the synth
+            # Free the synth; the buses keep the slider values for the next one
             self.synth.free()
+            self.node_tree.forget(self.synth)
             self.synth = None
 
             # Update UI
@@ -558,46 +641,76 @@ synth = None
 
             # Keep sliders enabled for setting next synth parameters
 
-            rprint(
+            self.console.print(
                 "[bold green]✅ Noise-modulated synth freed successfully![/bold green]"
             )
-            rprint(f"[dim]Server tree: {self.server.query_tree()}[/dim]")
+            self.console.print(f"[dim]Server tree: {self.node_tree.snapshot()}[/dim]")
 
         except Exception as e:
             error_msg = f"❌ Failed to free synth: {str(e)}"
             self.update_status(error_msg)
-            rprint(f"[bold red]{error_msg}[/bold red]")
+            self.console.print(f"[bold red]{error_msg}[/bold red]")
+
+    def on_status_sampled(self, sample):
+        """Show the server's latest load, coloured by how close it is to overload"""
+        color = {"ok": "#2E7D32", "warn": "#F18F01", "overload": "#C0392B"}[
+            self.status_poller.level()
+        ]
+        late = "" if sample.late is None else f" · {sample.late} late"
+        self.health_label.setText(
+            f"Server load: {sample.average_cpu:.1f}% avg / {sample.peak_cpu:.1f}% peak"
+            f" · {sample.synths} synths · {sample.ugens} UGens{late}"
+        )
+        self.health_label.setStyleSheet(f"QLabel {{ color: {color}; margin: 5px; }}")
 
     def update_status(self, message):
         """Update the status label"""
         self.status_label.setText(f"Status: {message}")
-        rprint(f"[dim]Status: {message}[/dim]")
+        self.console.print(f"[dim]Status: {message}[/dim]", key="status")
 
     def closeEvent(self, event):
         """Handle application closure"""
-        rprint("[bold blue]🔄 Shutting down Supriya controller...[/bold blue]")
+        self.console.print(
+            "[bold blue]🔄 Shutting down Supriya controller...[/bold blue]"
+        )
+
+        # Stop dispatching parameter changes, mirroring the node tree, scoping
+        # and polling the server's status
+        if self.dispatcher is not None:
+            self.dispatcher.close()
+        if self.node_tree is not None:
+            self.node_tree.stop()
+        if self.scope_reader is not None:
+            self.scope.detach()
+            self.scope_reader.stop()
+            self.scope_tap.stop()
+        if self.status_poller is not None:
+            self.status_poller.stop()
 
         # Free any active synth
         if self.synth is not None:
             try:
                 self.synth.free()
-                rprint("[green]✅ Noise synth freed on shutdown[/green]")
+                self.console.print("[green]✅ Noise synth freed on shutdown[/green]")
             except Exception as e:
-                rprint(f"[red]❌ Error freeing synth on shutdown: {e}[/red]")
+                self.console.print(f"[red]❌ Error freeing synth on shutdown: {e}[/red]")
 
-        # Quit server
+        # Quit the server, or just detach when sharing the `serve` daemon
         if self.server is not None:
             try:
-                self.server.quit()
-                rprint("[green]✅ Supriya server shutdown[/green]")
+                release_server(self.server)
+                self.console.print("[green]✅ Supriya server shutdown[/green]")
             except Exception as e:
-                rprint(f"[red]❌ Error shutting down server: {e}[/red]")
+                self.console.print(f"[red]❌ Error shutting down server: {e}[/red]")
+        if self.metrics is not None:
+            self.metrics.stop()
 
-        rprint("[bold blue]👋 Goodbye![/bold blue]")
+        self.console.print("[bold blue]👋 Goodbye![/bold blue]")
+        self.console.close()
         event.accept()
 
 
-def main():
+def main(attach=False, metrics=False):
     """Main application entry point"""
     rprint("[bold blue]🎛️ Starting Supriya Real-time Control Example 2[/bold blue]")
 
@@ -609,7 +722,7 @@ def main():
     app.setOrganizationName("Strudel Music")
 
     # Create and show main window
-    controller = SupriyaController()
+    controller = SupriyaController(attach=attach, metrics=metrics)
     controller.show()
 
     # Run the application
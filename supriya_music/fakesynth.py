@@ -0,0 +1,742 @@
+"""
+Fake scsynth for headless testing.
+
+``FakeScsynth`` answers enough of scsynth's OSC protocol for
+``supriya.Server`` to boot or connect against it and for the toolkit's
+commands to run:
+
+- ``/notify``, ``/status``, ``/sync``, ``/quit`` and ``/version``;
+- ``/d_recv``, ``/d_load`` and ``/d_loadDir``, including completion messages;
+- ``/g_new``, ``/s_new``, ``/n_set``, ``/n_run``, ``/n_free``,
+  ``/g_freeAll`` and ``/g_queryTree`` against a node tree of its own, with
+  ``/n_go``, ``/n_end``, ``/n_on`` and ``/n_off`` sent to registered
+  clients. A synth is freed as soon as its ``gate`` closes, as if every
+  envelope ended at once;
+- ``/b_alloc``, ``/b_allocRead``, ``/b_read``, ``/b_setn``, ``/b_getn``,
+  ``/b_free``, ``/c_set``, ``/c_setn``, ``/c_fill`` and ``/c_get``;
+  ``/b_setn`` and ``/b_getn`` fail outside an allocated buffer, as on
+  scsynth.
+
+Bundles run at their timetags, and ones arriving after them are counted;
+as the scsynth stand-in they are also reported on standard output, as
+scsynth does ("late 0.012..."). ``/status`` reports a nominal CPU load per
+running synth. Every request it receives is counted, and optionally logged
+to a JSON-lines file. ``latency`` delays every reply and notification, and
+``loss`` drops that fraction of packets in both directions, to see how
+clients behave on a bad link. No audio is produced.
+
+It runs in two ways:
+
+- ``supriya_music fake-scsynth`` listens on the configured port and
+  registers itself the way ``serve`` does, so every ``--attach`` command
+  talks to it;
+- ``python -m supriya_music.fakesynth`` takes scsynth's own ``-u`` and
+  ``-l`` arguments and prints scsynth's ready line. Point
+  ``SUPRIYA_SERVER_EXECUTABLE`` at a script running it, and ``Server.boot``
+  starts the fake instead of scsynth.
+"""
+
+import argparse
+import array
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import select
+import signal
+import socket
+import struct
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+import typer
+from rich.console import Console
+from rich.table import Table
+from supriya.osc import NTP_DELTA, OscBundle, OscMessage
+
+from .config import CONFIG
+
+console = Console()
+
+ADD_TO_HEAD, ADD_TO_TAIL, ADD_BEFORE, ADD_AFTER, REPLACE = range(5)
+
+# Average CPU percentage /status reports per running synth
+CPU_PER_SYNTH = 0.1
+
+
+def synthdef_names(data):
+    """Names of the definitions in compiled (version 2) ``.scsyndef`` data"""
+    names = []
+    offset = 10
+
+    def integer(size):
+        nonlocal offset
+        offset += size
+        return int.from_bytes(data[offset - size : offset], "big", signed=True)
+
+    def string():
+        nonlocal offset
+        length = data[offset]
+        offset += 1 + length
+        return data[offset - length : offset].decode()
+
+    for _ in range(int.from_bytes(data[8:10], "big")):
+        names.append(string())
+        # Read counts before skipping: ``offset += 4 * integer(4)`` would load
+        # offset before integer() moves it
+        constant_count = integer(4)
+        offset += 4 * constant_count
+        parameter_count = integer(4)
+        offset += 4 * parameter_count  # initial values
+        for _ in range(integer(4)):  # parameter names
+            string()
+            offset += 4
+        for _ in range(integer(4)):  # UGens
+            string()
+            offset += 1
+            input_count = integer(4)
+            output_count = integer(4)
+            offset += 2 + 8 * input_count + output_count
+        for _ in range(integer(2)):  # variants
+            string()
+            offset += 4 * parameter_count
+    return names
+
+
+def _decode(datagram):
+    """
+    An OSC packet, keeping blobs as bytes.
+
+    ``OscMessage.from_datagram`` tries to decode every blob as OSC, which
+    garbles SynthDef data that happens to parse.
+    """
+    if datagram.startswith(b"#bundle\0"):
+        (timetag,) = struct.unpack_from(">Q", datagram, 8)
+        contents = []
+        offset = 16
+        while offset < len(datagram):
+            (size,) = struct.unpack_from(">i", datagram, offset)
+            contents.append(_decode(datagram[offset + 4 : offset + 4 + size]))
+            offset += 4 + size
+        timestamp = None if timetag == 1 else timetag / 2**32 - NTP_DELTA
+        return OscBundle(timestamp=timestamp, contents=contents)
+
+    def string(offset):
+        stop = datagram.index(0, offset)
+        return datagram[offset:stop].decode(), (stop + 4) & ~3
+
+    address, offset = string(0)
+    tags, offset = string(offset)
+    arguments = []
+    stack = [arguments]
+    for tag in tags[1:]:
+        if tag in "ifdh":
+            code = {"i": ">i", "f": ">f", "d": ">d", "h": ">q"}[tag]
+            stack[-1].append(struct.unpack_from(code, datagram, offset)[0])
+            offset += struct.calcsize(code)
+        elif tag == "s":
+            value, offset = string(offset)
+            stack[-1].append(value)
+        elif tag == "b":
+            (size,) = struct.unpack_from(">i", datagram, offset)
+            stack[-1].append(datagram[offset + 4 : offset + 4 + size])
+            offset = (offset + 4 + size + 3) & ~3
+        elif tag in "TFN":
+            stack[-1].append({"T": True, "F": False, "N": None}[tag])
+        elif tag == "[":
+            stack[-1].append([])
+            stack.append(stack[-1][-1])
+        elif tag == "]":
+            stack.pop()
+        else:
+            raise ValueError(f"Unsupported OSC type tag {tag!r}")
+    return OscMessage(address, *arguments)
+
+
+class FakeScsynth:
+    """A stand-in for scsynth that keeps a node tree but makes no sound"""
+
+    def __init__(
+        self,
+        port=57110,
+        ip_address="127.0.0.1",
+        maximum_logins=8,
+        latency=0.0,
+        loss=0.0,
+        log_path=None,
+        default_groups=False,
+        sample_rate=48000,
+        seed=None,
+        print_late=False,
+    ):
+        self.port = port
+        self.ip_address = ip_address
+        self.maximum_logins = maximum_logins
+        self.latency = latency
+        self.loss = loss
+        self.sample_rate = sample_rate
+        self.received = Counter()
+        self.dropped = 0
+        self.late = 0
+        # Only as the scsynth stand-in, where supriya reads the output
+        self.print_late = print_late
+
+        self._random = random.Random(seed)
+        self._log = open(log_path, "a") if log_path else None
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((ip_address, port))
+        self._clients = {}
+        self._client_ids = itertools.count()
+        self._children = {0: []}
+        self._parents = {0: None}
+        self._synths = {}
+        self._synthdefs = set()
+        self._buffers = {}
+        # Contents of buffers written with /b_setn; the rest read as silence
+        self._samples = {}
+        self._buses = {}
+        # (due, order, packet or None, address): bundles to run or replies to send
+        self._queue = []
+        self._order = itertools.count()
+        self._stopped = threading.Event()
+        self._thread = None
+        # Like scsynth, start with the definitions on SC_SYNTHDEF_PATH
+        for directory in filter(
+            None, os.environ.get("SC_SYNTHDEF_PATH", "").split(":")
+        ):
+            self._load_directory(directory)
+        if default_groups:
+            # Normally created by the client that boots scsynth
+            for client_id in range(maximum_logins):
+                self._add_node(client_id + 1, ADD_TO_TAIL, 0, group=True)
+
+    def start(self):
+        """Serve on a background thread"""
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="FakeScsynth", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def serve_forever(self):
+        try:
+            while not self._stopped.is_set():
+                timeout = 0.1
+                if self._queue:
+                    timeout = min(timeout, max(self._queue[0][0] - time.time(), 0.0))
+                if select.select([self._socket], [], [], timeout)[0]:
+                    datagram, address = self._socket.recvfrom(65536)
+                    if self.loss and self._random.random() < self.loss:
+                        self.dropped += 1
+                    else:
+                        self._receive(datagram, address)
+                self._run_due()
+        finally:
+            self._socket.close()
+            if self._log is not None:
+                self._log.close()
+
+    @property
+    def node_count(self):
+        return len(self._parents) - 1
+
+    def _receive(self, datagram, address):
+        try:
+            packet = _decode(datagram)
+        except Exception as e:
+            logging.warning(f"Ignoring malformed packet from {address}: {e}")
+            return
+        now = time.time()
+        if isinstance(packet, OscBundle) and (packet.timestamp or 0) > now:
+            heapq.heappush(
+                self._queue, (packet.timestamp, next(self._order), packet, address)
+            )
+            return
+        if isinstance(packet, OscBundle) and packet.timestamp is not None:
+            self.late += 1
+            if self.print_late:
+                # scsynth reports late bundles on its output, like this
+                print(f"late {now - packet.timestamp:.9f}", flush=True)
+        self._perform(packet, address)
+
+    def _run_due(self):
+        now = time.time()
+        while self._queue and self._queue[0][0] <= now:
+            _, _, packet, address = heapq.heappop(self._queue)
+            if isinstance(packet, bytes):
+                self._socket.sendto(packet, address)
+            else:
+                self._perform(packet, address)
+
+    def _perform(self, packet, address):
+        if isinstance(packet, OscBundle):
+            for item in packet.contents:
+                self._perform(item, address)
+            return
+        self.received[packet.address] += 1
+        if self._log is not None:
+            self._log.write(
+                json.dumps(
+                    {
+                        "time": time.time(),
+                        "from": f"{address[0]}:{address[1]}",
+                        "address": packet.address,
+                        "arguments": [
+                            f"<{len(x)} bytes>" if isinstance(x, bytes) else x
+                            for x in packet.contents
+                        ],
+                    }
+                )
+                + "\n"
+            )
+        handler = getattr(self, "_do" + packet.address.replace("/", "_"), None)
+        if handler is None:
+            return
+        try:
+            handler(address, *packet.contents)
+        except Exception as e:
+            self._send(address, OscMessage("/fail", packet.address, str(e)))
+
+    def _send(self, address, message):
+        if self.loss and self._random.random() < self.loss:
+            self.dropped += 1
+            return
+        datagram = message.to_datagram()
+        if self.latency:
+            heapq.heappush(
+                self._queue,
+                (time.time() + self.latency, next(self._order), datagram, address),
+            )
+        else:
+            self._socket.sendto(datagram, address)
+
+    def _notify(self, message):
+        for address in list(self._clients):
+            self._send(address, message)
+
+    def _completion(self, address, message):
+        """Run the completion message some asynchronous commands carry"""
+        if isinstance(message, bytes) and message:
+            self._receive(message, address)
+
+    def _load_directory(self, path):
+        for match in Path(path).glob("*.scsyndef"):
+            self._synthdefs.update(synthdef_names(match.read_bytes()))
+
+    # Nodes
+
+    def _add_node(self, node_id, action, target, group=False):
+        if node_id in self._parents:
+            raise ValueError(f"duplicate node ID {node_id}")
+        if target not in self._parents:
+            raise ValueError(f"target node {target} not found")
+        if action in (ADD_TO_HEAD, ADD_TO_TAIL):
+            if target not in self._children:
+                raise ValueError(f"target {target} is not a group")
+            parent, siblings = target, self._children[target]
+            index = 0 if action == ADD_TO_HEAD else len(siblings)
+        else:
+            parent = self._parents[target]
+            siblings = self._children[parent]
+            index = siblings.index(target) + (action != ADD_BEFORE)
+        siblings.insert(index, node_id)
+        self._parents[node_id] = parent
+        if group:
+            self._children[node_id] = []
+        if action == REPLACE:
+            self._free_node(target)
+
+    def _node_info(self, node_id):
+        parent = self._parents[node_id]
+        siblings = self._children[parent]
+        index = siblings.index(node_id)
+        info = [
+            node_id,
+            parent,
+            siblings[index - 1] if index else -1,
+            siblings[index + 1] if index + 1 < len(siblings) else -1,
+        ]
+        if node_id in self._children:
+            children = self._children[node_id]
+            info += [
+                1,
+                children[0] if children else -1,
+                children[-1] if children else -1,
+            ]
+        else:
+            info.append(0)
+        return info
+
+    def _free_node(self, node_id):
+        for child in list(self._children.get(node_id, [])):
+            self._free_node(child)
+        info = self._node_info(node_id)
+        self._children[self._parents[node_id]].remove(node_id)
+        del self._parents[node_id]
+        self._children.pop(node_id, None)
+        self._synths.pop(node_id, None)
+        self._notify(OscMessage("/n_end", *info))
+
+    def _synths_in(self, node_id):
+        if node_id in self._synths:
+            yield node_id
+        for child in self._children.get(node_id, []):
+            yield from self._synths_in(child)
+
+    # Commands, named after their address
+
+    def _do_notify(self, address, flag, *args):
+        if flag:
+            if address not in self._clients:
+                if len(self._clients) >= self.maximum_logins:
+                    self._send(
+                        address, OscMessage("/fail", "/notify", "too many users")
+                    )
+                    return
+                self._clients[address] = next(self._client_ids)
+            self._send(
+                address,
+                OscMessage(
+                    "/done", "/notify", self._clients[address], self.maximum_logins
+                ),
+            )
+        else:
+            self._clients.pop(address, None)
+            self._send(address, OscMessage("/done", "/notify"))
+
+    def _do_status(self, address):
+        synths = len(self._synths)
+        # A nominal load, so status views have something to show
+        cpu = min(100.0, synths * CPU_PER_SYNTH)
+        self._send(
+            address,
+            OscMessage(
+                "/status.reply",
+                1,
+                0,
+                synths,
+                len(self._children),
+                len(self._synthdefs),
+                cpu,
+                min(100.0, cpu * 1.25),
+                float(self.sample_rate),
+                float(self.sample_rate),
+            ),
+        )
+
+    def _do_version(self, address):
+        self._send(
+            address, OscMessage("/version.reply", "scsynth (fake)", 3, 13, ".0", "", "")
+        )
+
+    def _do_sync(self, address, sync_id):
+        self._send(address, OscMessage("/synced", sync_id))
+
+    def _do_quit(self, address):
+        self._send(address, OscMessage("/done", "/quit"))
+        self._stopped.set()
+
+    def _do_d_recv(self, address, data, completion=None):
+        self._synthdefs.update(synthdef_names(data))
+        self._send(address, OscMessage("/done", "/d_recv"))
+        self._completion(address, completion)
+
+    def _do_d_load(self, address, path, completion=None):
+        # The path may contain wildcards
+        for match in Path(path).parent.glob(Path(path).name):
+            self._synthdefs.update(synthdef_names(match.read_bytes()))
+        self._send(address, OscMessage("/done", "/d_load"))
+        self._completion(address, completion)
+
+    def _do_d_loadDir(self, address, path, completion=None):
+        self._load_directory(path)
+        self._send(address, OscMessage("/done", "/d_loadDir"))
+        self._completion(address, completion)
+
+    def _do_g_new(self, address, *args):
+        for node_id, action, target in zip(args[::3], args[1::3], args[2::3]):
+            self._add_node(node_id, action, target, group=True)
+            self._notify(OscMessage("/n_go", *self._node_info(node_id)))
+
+    _do_p_new = _do_g_new
+
+    def _do_s_new(self, address, name, node_id=-1, action=0, target=0, *controls):
+        if node_id == -1:
+            node_id = -(10000 + next(self._order))
+        if name not in self._synthdefs:
+            raise ValueError(f"SynthDef {name} not found")
+        self._add_node(node_id, action, target)
+        self._synths[node_id] = (name, dict(zip(controls[::2], controls[1::2])))
+        self._notify(OscMessage("/n_go", *self._node_info(node_id)))
+
+    def _do_n_set(self, address, node_id, *controls):
+        if node_id not in self._parents:
+            raise ValueError(f"Node {node_id} not found")
+        for synth_id in list(self._synths_in(node_id)):
+            settings = self._synths[synth_id][1]
+            was_open = settings.get("gate", 1) > 0
+            settings.update(zip(controls[::2], controls[1::2]))
+            if was_open and settings.get("gate", 1) <= 0:
+                # There is no audio, so every envelope ends as its gate closes
+                self._free_node(synth_id)
+
+    def _do_n_run(self, address, *pairs):
+        for node_id, running in zip(pairs[::2], pairs[1::2]):
+            if node_id not in self._parents:
+                raise ValueError(f"Node {node_id} not found")
+            reply = "/n_on" if running else "/n_off"
+            self._notify(OscMessage(reply, *self._node_info(node_id)))
+
+    def _do_n_free(self, address, *node_ids):
+        for node_id in node_ids:
+            if node_id in self._parents:
+                self._free_node(node_id)
+
+    def _do_g_freeAll(self, address, *group_ids):
+        for group_id in group_ids:
+            for child in list(self._children.get(group_id, [])):
+                self._free_node(child)
+
+    _do_g_deepFree = _do_g_freeAll
+
+    def _do_g_queryTree(self, address, group_id=0, flag=0):
+        contents = [flag]
+
+        def walk(node_id):
+            contents.append(node_id)
+            if node_id in self._children:
+                contents.append(len(self._children[node_id]))
+                for child in self._children[node_id]:
+                    walk(child)
+                return
+            name, controls = self._synths[node_id]
+            contents.extend([-1, name])
+            if flag:
+                contents.append(len(controls))
+                for control, value in controls.items():
+                    contents.extend([control, value])
+
+        walk(group_id)
+        self._send(address, OscMessage("/g_queryTree.reply", *contents))
+
+    def _do_b_alloc(self, address, buffer_id, frames, channels=1, completion=None):
+        self._buffers[buffer_id] = (frames, channels)
+        self._samples.pop(buffer_id, None)
+        self._send(address, OscMessage("/done", "/b_alloc", buffer_id))
+        self._completion(address, completion)
+
+    def _do_b_allocRead(self, address, buffer_id, path, start=0, frames=0, *rest):
+        file_frames, channels = _wav_info(path)
+        self._buffers[buffer_id] = (frames or file_frames - start, channels)
+        self._samples.pop(buffer_id, None)
+        self._send(address, OscMessage("/done", "/b_allocRead", buffer_id))
+        self._completion(address, rest[0] if rest else None)
+
+    def _do_b_read(self, address, buffer_id, path, *rest):
+        if buffer_id not in self._buffers:
+            raise ValueError(f"Buffer {buffer_id} not allocated")
+        _wav_info(path)
+        self._send(address, OscMessage("/done", "/b_read", buffer_id))
+        self._completion(address, rest[5] if len(rest) > 5 else None)
+
+    def _do_b_setn(self, address, buffer_id, *args):
+        frames, channels = self._buffers.get(buffer_id, (0, 0))
+        while args:
+            start, count = args[0], args[1]
+            if start < 0 or start + count > frames * channels:
+                raise ValueError(f"Index out of range for buffer {buffer_id}")
+            samples = self._samples.setdefault(
+                buffer_id, array.array("f", bytes(4 * frames * channels))
+            )
+            samples[start : start + count] = array.array("f", args[2 : 2 + count])
+            args = args[2 + count :]
+
+    def _do_b_getn(self, address, buffer_id, *args):
+        frames, channels = self._buffers.get(buffer_id, (0, 0))
+        samples = self._samples.get(buffer_id)
+        contents = [buffer_id]
+        for start, count in zip(args[::2], args[1::2]):
+            if start < 0 or start + count > frames * channels:
+                raise ValueError(f"Index out of range for buffer {buffer_id}")
+            values = samples[start : start + count] if samples else [0.0] * count
+            contents.extend([start, count, *values])
+        self._send(address, OscMessage("/b_setn", *contents))
+
+    def _do_b_free(self, address, buffer_id, completion=None):
+        self._buffers.pop(buffer_id, None)
+        self._samples.pop(buffer_id, None)
+        self._send(address, OscMessage("/done", "/b_free", buffer_id))
+        self._completion(address, completion)
+
+    def _do_b_query(self, address, *buffer_ids):
+        contents = []
+        for buffer_id in buffer_ids:
+            frames, channels = self._buffers.get(buffer_id, (0, 0))
+            contents.extend([buffer_id, frames, channels, float(self.sample_rate)])
+        self._send(address, OscMessage("/b_info", *contents))
+
+    def _do_c_set(self, address, *args):
+        self._buses.update(zip(args[::2], args[1::2]))
+
+    def _do_c_setn(self, address, *args):
+        while args:
+            start, count = args[0], args[1]
+            self._buses.update(zip(range(start, start + count), args[2 : 2 + count]))
+            args = args[2 + count :]
+
+    def _do_c_fill(self, address, *args):
+        for start, count, value in zip(args[::3], args[1::3], args[2::3]):
+            self._buses.update(dict.fromkeys(range(start, start + count), value))
+
+    def _do_c_get(self, address, *indices):
+        contents = []
+        for index in indices:
+            contents.extend([index, float(self._buses.get(index, 0.0))])
+        self._send(address, OscMessage("/c_set", *contents))
+
+
+def _wav_info(path):
+    """``(frames, channels)`` from a WAV header, PCM or float"""
+    with open(path, "rb") as file:
+        riff, _, kind = struct.unpack("<4sI4s", file.read(12))
+        if (riff, kind) != (b"RIFF", b"WAVE"):
+            raise ValueError(f"{path} is not a WAV file")
+        block_align = channels = None
+        while True:
+            header = file.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data")
+            chunk, size = struct.unpack("<4sI", header)
+            if chunk == b"fmt ":
+                fmt = file.read(size + size % 2)
+                channels, block_align = struct.unpack("<2xH8xH", fmt[:14])
+            elif chunk == b"data" and block_align:
+                return size // block_align, channels
+            else:
+                file.seek(size + size % 2, 1)
+
+
+def _summary(fake, elapsed):
+    table = Table(title="Requests received", show_header=True)
+    table.add_column("Address")
+    table.add_column("Count", justify="right")
+    table.add_column("Per second", justify="right")
+    for address, count in fake.received.most_common():
+        table.add_row(address, str(count), f"{count / max(elapsed, 1e-9):.1f}")
+    console.print(table)
+    if fake.dropped:
+        console.print(f"{fake.dropped} packets dropped.")
+    if fake.late:
+        console.print(f"{fake.late} bundles arrived late.")
+
+
+def fake_scsynth(
+    port: int = typer.Option(57110, "--port", "-p", help="UDP port to listen on."),
+    latency: Optional[float] = typer.Option(
+        None, "--latency", help="Seconds to delay every reply and notification."
+    ),
+    loss: Optional[float] = typer.Option(
+        None, "--loss", help="Fraction of packets to drop in each direction."
+    ),
+    log: Optional[Path] = typer.Option(
+        None, "--log", help="Append every request received to a JSON-lines file."
+    ),
+):
+    """Run a silent scsynth stand-in that --attach commands connect to."""
+    from .daemon import STATE_PATH, SHARED_OPTIONS, pid_alive, read_state
+
+    state = read_state()
+    if state is not None and pid_alive(state["scsynth_pid"]):
+        console.print(
+            "[yellow]A shared server is already running; stop it with "
+            "'serve stop' first.[/yellow]"
+        )
+        raise typer.Exit(1)
+
+    settings = CONFIG.get("fake_scsynth") or {}
+    latency = settings.get("latency", 0.0) if latency is None else latency
+    loss = settings.get("loss", 0.0) if loss is None else loss
+    log = log or settings.get("log")
+    maximum_logins = (CONFIG.get("server") or {}).get("maximum_logins", 8)
+    try:
+        fake = FakeScsynth(
+            port=port,
+            maximum_logins=maximum_logins,
+            latency=latency,
+            loss=loss,
+            log_path=log,
+            default_groups=True,
+        )
+    except OSError as e:
+        console.print(f"[bold red]Cannot listen on port {port}: {e}[/bold red]")
+        raise typer.Exit(1)
+
+    import supriya
+
+    options = supriya.Options(port=port, maximum_logins=maximum_logins)
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    STATE_PATH.write_text(
+        json.dumps(
+            {
+                "pid": os.getpid(),
+                "scsynth_pid": os.getpid(),
+                "started": time.time(),
+                "fake": True,
+                "options": {name: getattr(options, name) for name in SHARED_OPTIONS},
+            },
+            indent=2,
+        )
+    )
+    # `serve stop` sends SIGTERM; treat it like Ctrl-C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    console.print(
+        f"[bold green]Fake scsynth on 127.0.0.1:{port} "
+        f"(latency {latency * 1000:g} ms, loss {loss:.0%}). "
+        "Use --attach to connect; press Ctrl-C to stop.[/bold green]"
+    )
+    start = time.time()
+    try:
+        fake.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        STATE_PATH.unlink(missing_ok=True)
+    _summary(fake, time.time() - start)
+
+
+def main(argv=None):
+    """Entry point with scsynth's own command line, for SUPRIYA_SERVER_EXECUTABLE"""
+    parser = argparse.ArgumentParser(prog="fakesynth")
+    parser.add_argument("-u", type=int, default=57110, dest="port")
+    parser.add_argument("-l", type=int, default=64, dest="maximum_logins")
+    parser.add_argument("-S", type=int, default=48000, dest="sample_rate")
+    arguments, _ = parser.parse_known_args(argv)
+    settings = CONFIG.get("fake_scsynth") or {}
+    fake = FakeScsynth(
+        port=arguments.port,
+        maximum_logins=arguments.maximum_logins,
+        latency=settings.get("latency", 0.0),
+        loss=settings.get("loss", 0.0),
+        log_path=settings.get("log"),
+        sample_rate=arguments.sample_rate or 48000,
+        print_late=True,
+    )
+    print("SuperCollider 3 server ready (fake).", flush=True)
+    try:
+        fake.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
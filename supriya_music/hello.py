@@ -1,15 +1,26 @@
+import asyncio
 import sys
 import time
+from pathlib import Path
+from typing import Optional
 
 import supriya
-from supriya import Envelope, synthdef
-from supriya.exceptions import ServerCannotBoot
-from supriya.ugens import EnvGen, Out, SinOsc
 from rich.console import Console
 from rich.panel import Panel
 from rich.tree import Tree
+from supriya.enums import BootStatus
 
-from .config import CONFIG, CONFIG_PATH
+from .daemon import open_server, release_server
+from .metrics import OscMetrics
+from .mixer import Mixer
+from .nodetree import NodeTreeMirror
+from .render import RenderFailed, new_score, render_score, sample_rate
+from .scheduler import Scheduler
+from .synthdefs import registry
+
+# One octave apart: A3, A4, A5
+FREQUENCIES = [220 * (2**i) for i in range(3)]
+NOTE_SECONDS = 1
 
 
 def _explain():
@@ -39,19 +50,23 @@ def _explain():
 
     # Synthesis process
     synth_branch = tree.add("🎶 [bold cyan]Synthesis Process[/bold cyan]")
-    synth_branch.add("Add synthdef to server")
+    synth_branch.add("Load cached synthdefs on the server")
     synth_branch.add("Synchronize server state")
     synth_branch.add("Create group to organize synths")
+    synth_branch.add("Mirror the node tree from server notifications")
 
     play_branch = synth_branch.add("Play sequence:")
     play_branch.add("Create synth at 220 Hz (A3)")
     play_branch.add("Create synth at 440 Hz (A4) - one octave higher")
     play_branch.add("Create synth at 880 Hz (A5) - two octaves higher")
-    play_branch.add("Each synth plays for 1 second")
+    play_branch.add("Each synth starts 1 second after the previous one")
+    play_branch.add(
+        "Requests are sent ahead of time as timestamped bundles (lookahead scheduler)"
+    )
 
     cleanup_branch = synth_branch.add("Cleanup:")
     cleanup_branch.add("Free each synth individually")
-    cleanup_branch.add("Wait 1 second between each release")
+    cleanup_branch.add("Release them 1 second apart, also as timestamped bundles")
 
     # Server teardown
     teardown_branch = tree.add("🔚 [bold red]Server Teardown[/bold red]")
@@ -79,71 +94,161 @@ def _explain():
     console.print("• [cyan]Frequencies[/cyan] - Each octave doubles the frequency")
 
 
-def hello(explain: bool = False):
+def _render(path, console, preview=False):
+    """Render the same note sequence offline instead of playing it"""
+    simple_sine = registry["simple_sine"]
+    duration = 2 * len(FREQUENCIES) * NOTE_SECONDS
+    # Each note starts NOTE_SECONDS after the previous one and is released in
+    # the same order once all of them are playing, as in the realtime loop
+    notes = [
+        (i * NOTE_SECONDS, (i + len(FREQUENCIES)) * NOTE_SECONDS, frequency)
+        for i, frequency in enumerate(FREQUENCIES)
+    ]
+
+    engine = "NumPy preview" if preview else "non-realtime"
+    console.print(f"Rendering to {path} ({engine})...")
+    start = time.perf_counter()
+    try:
+        if preview:
+            _render_preview(simple_sine, notes, path, duration)
+        else:
+            score = new_score()
+            with score.at(0):
+                score.add_synthdefs(simple_sine)
+                group = score.add_group()
+            synths = []
+            for onset, _, frequency in notes:
+                with score.at(onset):
+                    synths.append(
+                        group.add_synth(simple_sine, frequency=frequency, amplitude=0.1)
+                    )
+            for synth, (_, release, _) in zip(synths, notes):
+                with score.at(release):
+                    synth.free()
+            render_score(score, path, duration=duration)
+    except (RenderFailed, RuntimeError) as e:
+        console.print(str(e), style="bold red", markup=False)
+        sys.exit(1)
+    console.print(
+        f"[bold green]Rendered {path} in {time.perf_counter() - start:.2f} s.[/bold green]"
+    )
+
+
+def _render_preview(synthdef, notes, path, duration):
+    """Mix one NumPy-rendered synth per note"""
+    import numpy as np
+
+    from .preview import render_preview, write_wav
+
+    if Path(path).suffix.lower() != ".wav":
+        raise RenderFailed("Previews can only be written as .wav files.")
+    rate = sample_rate()
+    mix = np.zeros((2, int(round(duration * rate))), np.float32)
+    for onset, release, frequency in notes:
+        # Cut off at the release, as the score and live playback free the
+        # synth there instead of letting the envelope's release tail play
+        timeline = [(0, {"frequency": frequency, "amplitude": 0.1})]
+        audio = render_preview(synthdef, release - onset, timeline, sample_rate=rate)
+        offset = int(round(onset * rate))
+        mix[:, offset : offset + audio.shape[1]] += audio[:, : mix.shape[1] - offset]
+    write_wav(path, mix, rate)
+
+
+async def _play(server, group, synthdef, node_tree, console, controls=None):
+    """Start one note per NOTE_SECONDS, then release them in the same order"""
+    async with Scheduler(server) as scheduler:
+        synths = []
+        for i, frequency in enumerate(FREQUENCIES):
+            async with scheduler.at(i * NOTE_SECONDS):
+                synth = group.add_synth(
+                    synthdef, frequency=frequency, amplitude=0.1, **(controls or {})
+                )
+            node_tree.track(synth)
+            synths.append(synth)
+
+        await scheduler.sleep_until(len(FREQUENCIES) * NOTE_SECONDS, lookahead=False)
+        console.print(node_tree.snapshot())
+
+        for i, synth in enumerate(synths, start=len(FREQUENCIES)):
+            async with scheduler.at(i * NOTE_SECONDS):
+                synth.free()
+        # Hold the last note for its full slot; notes are freed, not released,
+        # so nothing rings on after this
+        await scheduler.sleep_until(
+            2 * len(FREQUENCIES) * NOTE_SECONDS, lookahead=False
+        )
+
+
+def hello(
+    explain: bool = False,
+    attach: bool = False,
+    render: Optional[Path] = None,
+    preview: bool = False,
+    metrics: bool = False,
+    reverb: float = 0.0,
+):
     console = Console()
     if explain:
         _explain()
         return
+    if render is not None:
+        _render(render, console, preview)
+        return
 
-    # Construct a Supriya server
-
-    # Boot the server - Start a SCSynth process
-    # Use configuration options if available
-    if CONFIG.get("audio"):
-        console.print(f"Booting server with audio configuration from {CONFIG_PATH}.")
-        console.print("Attempting Configuration:", CONFIG["audio"])
-
-        options = supriya.Options(**CONFIG["audio"])
-        try:
-
-            server = supriya.Server()
-            server.boot(options=options)
-        except ServerCannotBoot:
-            console.print(
-                f"[bold red]Failed to boot server with provided options, doublecheck your configuration in {CONFIG_PATH}.[/bold red]"
-            )
-            console.print(
-                "[bold red]For more information try running 'supriya_music info devices' (`python -m supriya_music info devices`) to "
-                "list available audio devices.[/bold red]"
-            )
-            sys.exit(1)
-    else:
-        console.print(
-            "No audio configuration found, booting server with default options."
-        )
-        server = supriya.Server()
-        server.boot()
+    server = supriya.Server()
+    osc_metrics = None
+    if metrics:
+        # Counts from the first message on, boot included
+        osc_metrics = OscMetrics(server).start()
+        console.print(f"Writing OSC metrics to {osc_metrics.directory}.")
 
-    # Define a simple sine wave synthdef
-    @synthdef()
-    def simple_sine(frequency=440, amplitude=0.1, gate=1):
-        sine = SinOsc.ar(frequency=frequency) * amplitude
-        envelope = EnvGen.kr(envelope=Envelope.adsr(), gate=gate, done_action=2)
-        Out.ar(bus=0, source=[sine * envelope] * 2)
+    # Attach to the shared server, or boot one with the configured options
+    open_server(console, attach, server)
 
-    try:
-        # Add the synthdef to the server
-        server.add_synthdefs(simple_sine)
+    # The simple_sine synthdef is defined in synthdefs.py
+    simple_sine = registry["simple_sine"]
 
-        # Ensure the server is synchronized
+    node_tree = None
+    mixer = group = None
+    try:
+        # Make sure the cached synthdefs are on the server (booted servers
+        # already loaded them from SC_SYNTHDEF_PATH) and synchronize
+        registry.load(server)
         server.sync()
 
-        # Create a group to hold the synths
-        group = server.add_group()
-
-        # Create and play multiple synths with different frequencies
-        for i in range(3):
-            freq = 220 * (2**i)
-            synth = group.add_synth(simple_sine, frequency=freq, amplitude=0.1)
-            time.sleep(1)
-
-        # Free each synth after a delay
-        for synth in group.children:
-            synth.free()
-            time.sleep(1)
+        # Mirror the node tree so it can be shown without a /g_queryTree round-trip
+        node_tree = NodeTreeMirror(server).start()
+
+        controls = {}
+        if reverb > 0:
+            # The synths play in the mixer's source group and send to one
+            # shared reverb running after it
+            mixer = Mixer(server).start()
+            node_tree.track(mixer.add_send("reverb", registry["reverb"]).effect)
+            group = mixer.sources
+            controls = mixer.send_settings("reverb", reverb)
+        else:
+            # Create a group to hold the synths
+            group = server.add_group()
+
+        # Play the sequence on the lookahead scheduler: requests are sent
+        # ahead of time as timestamped bundles, so Python's sleep jitter
+        # doesn't shift the notes
+        asyncio.run(_play(server, group, simple_sine, node_tree, console, controls))
     finally:
-        # Quit the server
-        server.quit()
+        if node_tree is not None:
+            node_tree.stop()
+        # Free what this run added, so nothing is left playing on a shared
+        # server after detaching
+        if server.boot_status == BootStatus.ONLINE:
+            if mixer is not None:
+                mixer.stop()
+            elif group is not None:
+                group.free()
+        # Quit the server (or detach, leaving a shared server running)
+        release_server(server)
+        if osc_metrics is not None:
+            osc_metrics.stop()
 
 
 if __name__ == "__main__":
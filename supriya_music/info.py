@@ -1,11 +1,9 @@
+from typing import Optional
+
 import typer
 from rich.console import Console
 from rich.table import Table
 
-import pandas as pd
-import sounddevice as sd
-import supriya.scsynth
-
 
 info_app = typer.Typer(
     name="info",
@@ -18,13 +16,23 @@ console = Console()
 
 @info_app.callback(invoke_without_command=True)
 def info(ctx: typer.Context):
+    # Subcommands talk to a server over OSC and don't need scsynth installed
+    if ctx.invoked_subcommand is not None:
+        return
     console.print("[bold green]Supriya Music Toolkit[/bold green]")
     console.print("Version: [cyan]1.0.0[/cyan]")
     console.print(
         "Description: [cyan]A toolkit for music synthesis and algorithmic composition using Supriya.[/cyan]"
     )
-    scsynth_location = supriya.scsynth.find()
-    console.print(f"scsynth Location: [cyan]{scsynth_location}[/cyan]")
+    # Imported per command so each one only pays for what it uses
+    import supriya.scsynth
+
+    try:
+        scsynth_location = f"[cyan]{supriya.scsynth.find()}[/cyan]"
+    except RuntimeError:
+        # Fine for watching a server that runs elsewhere
+        scsynth_location = "[yellow]not found[/yellow]"
+    console.print(f"scsynth Location: {scsynth_location}")
 
 
 @info_app.command(name="devices")
@@ -33,6 +41,9 @@ def devices(
         None, "--columns", "-c", help="Specify columns to display."
     )
 ):
+    import pandas as pd
+    import sounddevice as sd
+
     console.print("[bold green]Audio Devices[/bold green]")
     devices = list(sd.query_devices())
 
@@ -47,3 +58,84 @@ def devices(
     for _, row in df.iterrows():
         table.add_row(*[str(row[col]) for col in df.columns])
     console.print(table)
+
+
+@info_app.command(name="tree")
+def tree(
+    ip_address: str = typer.Option(
+        "127.0.0.1", "--ip", help="IP address of the running scsynth."
+    ),
+    port: int = typer.Option(
+        57110, "--port", "-p", help="Port of the running scsynth."
+    ),
+):
+    """Display the node tree of a running scsynth server."""
+    import supriya
+
+    from .daemon import seed_node_state
+    from .nodetree import NodeTreeMirror
+
+    server = supriya.Server()
+    try:
+        server.connect(ip_address=ip_address, port=port)
+        seed_node_state(server)
+    except Exception as e:
+        console.print(
+            f"[bold red]Could not connect to scsynth at {ip_address}:{port}: {e}[/bold red]"
+        )
+        raise typer.Exit(1)
+    node_tree = NodeTreeMirror(server)
+    try:
+        node_tree.start()
+        console.print("[bold green]Node Tree[/bold green]")
+        console.print(str(node_tree.snapshot()), markup=False, highlight=False)
+    finally:
+        node_tree.stop()
+        server.disconnect()
+
+
+@info_app.command(name="status")
+def status(
+    ip_address: str = typer.Option(
+        "127.0.0.1", "--ip", help="IP address of the running scsynth."
+    ),
+    port: int = typer.Option(
+        57110, "--port", "-p", help="Port of the running scsynth."
+    ),
+    watch: bool = typer.Option(
+        False, "--watch", "-w", help="Keep sampling and updating until Ctrl-C."
+    ),
+    interval: Optional[float] = typer.Option(
+        None, "--interval", "-i", help="Seconds between /status requests."
+    ),
+):
+    """Display the load of a running scsynth server."""
+    import time
+
+    from .status import StatusPoller, status_table
+
+    poller = StatusPoller(ip_address, port, interval=interval).start()
+    try:
+        if not watch:
+            deadline = time.monotonic() + max(2.0, 2 * poller.interval)
+            while poller.latest is None and time.monotonic() < deadline:
+                time.sleep(0.02)
+            if poller.latest is None:
+                console.print(
+                    f"[bold red]No /status reply from scsynth at {ip_address}:{port}.[/bold red]"
+                )
+                raise typer.Exit(1)
+            console.print(status_table(poller))
+            return
+
+        from rich.live import Live
+
+        with Live(status_table(poller), console=console, auto_refresh=False) as live:
+            try:
+                while True:
+                    time.sleep(poller.interval)
+                    live.update(status_table(poller), refresh=True)
+            except KeyboardInterrupt:
+                pass
+    finally:
+        poller.stop()
@@ -0,0 +1,70 @@
+"""
+Lazily imported CLI commands.
+
+Most commands pull in supriya, PyQt6, pandas or sounddevice, which together
+take most of a second to import. ``LazyTyperGroup`` only knows each
+command's import path and short help up front; the module behind a command
+is imported when that command is actually invoked, so ``--help`` and every
+other command skip the cost.
+"""
+
+import importlib
+
+import click
+import typer
+from typer.core import TyperGroup
+
+
+class LazyTyperGroup(TyperGroup):
+    """
+    Typer group resolving some of its commands from import paths on demand.
+
+    Subclasses fill ``lazy_commands`` with ``name: (import_path, help)``,
+    where ``import_path`` is ``"package.module:attribute"`` and the attribute
+    is either a ``typer.Typer`` or a plain command function.
+    """
+
+    lazy_commands = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loaded = {}
+        self._listing = False
+
+    def list_commands(self, ctx):
+        return list(self.lazy_commands) + [
+            name
+            for name in super().list_commands(ctx)
+            if name not in self.lazy_commands
+        ]
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in self.lazy_commands:
+            return super().get_command(ctx, cmd_name)
+        if self._listing and cmd_name not in self._loaded:
+            # Only the name and help are needed to list commands
+            return click.Command(cmd_name, help=self.lazy_commands[cmd_name][1])
+        return self.load_command(cmd_name)
+
+    def format_help(self, ctx, formatter):
+        self._listing = True
+        try:
+            return super().format_help(ctx, formatter)
+        finally:
+            self._listing = False
+
+    def load_command(self, cmd_name):
+        """Import a lazy command's module and build its click command"""
+        if cmd_name not in self._loaded:
+            import_path, help = self.lazy_commands[cmd_name]
+            module_name, attribute = import_path.split(":")
+            target = getattr(importlib.import_module(module_name), attribute)
+            if isinstance(target, typer.Typer):
+                command = typer.main.get_group(target)
+            else:
+                app = typer.Typer(add_completion=False)
+                app.command(name=cmd_name, help=help)(target)
+                command = typer.main.get_command(app)
+            command.name = cmd_name
+            self._loaded[cmd_name] = command
+        return self._loaded[cmd_name]
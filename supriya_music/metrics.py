@@ -0,0 +1,283 @@
+"""
+Opt-in OSC traffic metrics.
+
+``OscMetrics`` hooks into supriya's capture mechanism, which sees every
+message and bundle a server's OSC protocol sends or receives, but keeps
+running totals instead of a list of entries:
+
+- messages and bytes sent per address, and messages per bundle;
+- round-trip times of ``/sync``, ``/g_queryTree`` and ``/status``, matched
+  to their ``/synced``, ``/g_queryTree.reply`` and ``/status.reply``.
+
+Every ``interval`` seconds a snapshot is appended to ``metrics.jsonl`` and
+``metrics.prom`` is rewritten in the Prometheus text format, so it can be
+served by any static file exporter. Measuring sizes re-encodes each sent
+message, which is why this only runs with ``--metrics``.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from pathlib import Path
+
+from supriya.osc import Capture, OscBundle
+
+from .config import CACHE_DIR, CONFIG
+
+# Round-trip histogram buckets, in seconds
+ROUND_TRIP_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+)
+# Messages per bundle
+BUNDLE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+# Requests whose round trip is measured, and the reply that completes them
+REPLIES = {
+    "/synced": "/sync",
+    "/g_queryTree.reply": "/g_queryTree",
+    "/status.reply": "/status",
+}
+
+
+class Histogram:
+    """Cumulative histogram in the Prometheus style"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """``(upper bound, observations at or below it)``, ending with +Inf"""
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            yield bound, total
+
+    def to_json(self):
+        return {
+            "buckets": {str(bound): total for bound, total in self.cumulative()},
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class OscMetrics(Capture):
+    """Counts a server's OSC traffic and writes periodic snapshots"""
+
+    def __init__(self, server, directory=None, interval=None):
+        settings = CONFIG.get("metrics") or {}
+        super().__init__(server.osc_protocol)
+        self.directory = Path(
+            directory or settings.get("directory") or Path(CACHE_DIR) / "metrics"
+        )
+        self.interval = interval or settings.get("interval", 5.0)
+
+        self.sent = Counter()
+        self.sent_bytes = Counter()
+        self.received = Counter()
+        self.bundle_sizes = Histogram(BUNDLE_BUCKETS)
+        self.round_trips = {
+            request: Histogram(ROUND_TRIP_BUCKETS) for request in REPLIES.values()
+        }
+
+        self._lock = threading.Lock()
+        # Send times of unanswered requests: /sync by ID, the others in order
+        self._pending_syncs = {}
+        self._pending = {
+            request: deque(maxlen=64)
+            for request in REPLIES.values()
+            if request != "/sync"
+        }
+        self._started = None
+        self._last = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.osc_protocol.captures.add(self)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._started = self._last = (time.time(), 0)
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="OscMetrics", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop counting and write a final snapshot"""
+        self.osc_protocol.captures.discard(self)
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self.write()
+
+    def add_entry(self, timestamp, label, message, raw_message=None):
+        with self._lock:
+            if label == "S":
+                self._count_sent(timestamp, message)
+                self.sent_bytes[_address(message)] += len(message.to_datagram())
+            else:
+                self._count_received(timestamp, message)
+
+    def _count_sent(self, timestamp, message):
+        if isinstance(message, OscBundle):
+            self.bundle_sizes.observe(len(message.contents))
+            for item in message.contents:
+                self._count_sent(timestamp, item)
+            return
+        self.sent[message.address] += 1
+        if message.address == "/sync":
+            self._pending_syncs[message.contents[0]] = timestamp
+        elif message.address in self._pending:
+            self._pending[message.address].append(timestamp)
+
+    def _count_received(self, timestamp, message):
+        self.received[message.address] += 1
+        request = REPLIES.get(message.address)
+        if request == "/sync":
+            sent = self._pending_syncs.pop(message.contents[0], None)
+        elif request is not None and self._pending[request]:
+            sent = self._pending[request].popleft()
+        else:
+            return
+        if sent is not None:
+            self.round_trips[request].observe(timestamp - sent)
+
+    def snapshot(self):
+        """Current totals, with the send rate since the previous snapshot"""
+        now = time.time()
+        with self._lock:
+            total_bytes = sum(self.sent_bytes.values())
+            last_time, last_bytes = self._last
+            self._last = (now, total_bytes)
+            return {
+                "time": now,
+                "elapsed": now - self._started[0],
+                "messages_sent": dict(self.sent),
+                "bytes_sent": dict(self.sent_bytes),
+                "bytes_per_second": (total_bytes - last_bytes)
+                / max(now - last_time, 1e-9),
+                "messages_received": dict(self.received),
+                "bundle_sizes": self.bundle_sizes.to_json(),
+                "round_trips": {
+                    request: histogram.to_json()
+                    for request, histogram in self.round_trips.items()
+                },
+            }
+
+    def write(self):
+        snapshot = self.snapshot()
+        with open(self.directory / "metrics.jsonl", "a") as file:
+            file.write(json.dumps(snapshot) + "\n")
+        # Replace the file atomically so scrapers never read half of it
+        path = self.directory / "metrics.prom"
+        temporary = path.with_suffix(".prom.tmp")
+        temporary.write_text(self.prometheus(snapshot))
+        os.replace(temporary, path)
+
+    def prometheus(self, snapshot=None):
+        snapshot = snapshot or self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{labels} {value}")
+
+        metric(
+            "supriya_osc_messages_sent_total",
+            "counter",
+            "OSC messages sent, by address.",
+            [
+                (f'{{address="{address}"}}', count)
+                for address, count in sorted(snapshot["messages_sent"].items())
+            ],
+        )
+        metric(
+            "supriya_osc_bytes_sent_total",
+            "counter",
+            "OSC bytes sent, by address (bundles under #bundle).",
+            [
+                (f'{{address="{address}"}}', count)
+                for address, count in sorted(snapshot["bytes_sent"].items())
+            ],
+        )
+        metric(
+            "supriya_osc_bytes_sent_per_second",
+            "gauge",
+            "OSC bytes sent per second since the previous snapshot.",
+            [("", round(snapshot["bytes_per_second"], 3))],
+        )
+        metric(
+            "supriya_osc_messages_received_total",
+            "counter",
+            "OSC messages received, by address.",
+            [
+                (f'{{address="{address}"}}', count)
+                for address, count in sorted(snapshot["messages_received"].items())
+            ],
+        )
+        lines.extend(
+            _histogram_lines(
+                "supriya_osc_bundle_messages",
+                "Messages per sent bundle.",
+                {"": snapshot["bundle_sizes"]},
+            )
+        )
+        lines.extend(
+            _histogram_lines(
+                "supriya_osc_round_trip_seconds",
+                "Request to reply time.",
+                {
+                    f'request="{request}"': histogram
+                    for request, histogram in snapshot["round_trips"].items()
+                },
+            )
+        )
+        return "\n".join(lines) + "\n"
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                # Keep counting; the next interval tries again
+                logging.warning(f"Failed to write OSC metrics: {e}")
+
+
+def _address(message):
+    return "#bundle" if isinstance(message, OscBundle) else message.address
+
+
+def _histogram_lines(name, help_text, histograms):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in histograms.items():
+        prefix = f"{labels}," if labels else ""
+        for bound, total in histogram["buckets"].items():
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {total}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {histogram['sum']}")
+        lines.append(f"{name}_count{suffix} {histogram['count']}")
+    return lines
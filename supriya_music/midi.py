@@ -0,0 +1,326 @@
+"""
+MIDI input bridged to the server.
+
+Each source reads on a thread of its own (rtmidi's input thread for ports,
+a replay thread for files) that does nothing but timestamp messages and
+hand them to the dispatcher through a ``queue.SimpleQueue``, a C queue
+without the Python-level lock of ``queue.Queue``. A slow request therefore
+never delays reading the next message. The dispatcher thread turns them
+into requests:
+
+- note-on starts a voice from a ``VoicePool`` and note-off releases it; when
+  every voice is in use one is stolen, following ``midi: steal:``;
+- control changes listed under ``midi: cc:`` in the config either set a
+  control on every sounding voice (``/n_set``) or, marked ``bus: true``,
+  write a control bus every voice starts mapped to (one ``/c_set`` however
+  many are sounding), scaled from 0-127 onto ``min``-``max``. The buses are
+  allocated by the bridge and freed when it stops.
+
+Sources are a MIDI input port or, for testing without hardware, a Standard
+MIDI File replayed in real time. Every request's delay from the MIDI
+message's arrival to its OSC send is recorded for the latency report.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from .buses import MappedControls
+from .config import CONFIG
+from .voices import VoicePool
+
+console = Console()
+
+
+class PortReader:
+    """
+    Messages from a MIDI input port.
+
+    They are handed off straight from rtmidi's own input thread, instead of
+    polling the port like ``receive()`` does.
+    """
+
+    def __init__(self, handoff, name=None):
+        import mido
+
+        self.handoff = handoff
+        self.port = mido.open_input(name, callback=self._receive)
+        self._closed = threading.Event()
+
+    def _receive(self, message):
+        self.handoff.put((time.perf_counter(), message))
+
+    def start(self):
+        pass
+
+    def is_alive(self):
+        return not self._closed.is_set()
+
+    def join(self, timeout=None):
+        self._closed.wait(timeout)
+
+    def stop(self):
+        self._closed.set()
+        self.port.close()
+
+
+class FileReader(threading.Thread):
+    """A Standard MIDI File replayed in real time on its own thread"""
+
+    def __init__(self, handoff, path, speed=1.0):
+        import mido
+
+        super().__init__(name="FileReader", daemon=True)
+        self.handoff = handoff
+        self.midi_file = mido.MidiFile(path)
+        self.speed = speed
+        self.stopped = threading.Event()
+
+    def run(self):
+        for message in self.messages():
+            self.handoff.put((time.perf_counter(), message))
+
+    def stop(self):
+        self.stopped.set()
+
+    def messages(self):
+        start = time.perf_counter()
+        elapsed = 0.0
+        for message in self.midi_file:
+            elapsed += message.time / self.speed
+            # Sleep until the absolute due time, so rounding doesn't accumulate
+            delay = start + elapsed - time.perf_counter()
+            if delay > 0 and self.stopped.wait(delay):
+                return
+            if not message.is_meta:
+                yield message
+
+
+class MidiBridge:
+    """Turns MIDI messages from the handoff queue into server requests"""
+
+    def __init__(self, server, synthdef, target=None, polyphony=None, cc=None):
+        settings = CONFIG.get("midi") or {}
+        self.server = server
+        self.synthdef = synthdef
+        self.target = target or server.default_group
+        self.polyphony = polyphony or settings.get("polyphony", 16)
+        self.cc = {
+            int(number): spec
+            for number, spec in (cc or settings.get("cc") or {}).items()
+        }
+        # Bus-mapped controls start at the SynthDef's default, else at min
+        mapped = {
+            spec["control"]: _default(synthdef, spec)
+            for spec in self.cc.values()
+            if spec.get("bus")
+        }
+        self.mapped = MappedControls(server, **mapped) if mapped else None
+        self.pool = VoicePool(
+            server,
+            synthdef,
+            size=self.polyphony,
+            target=self.target,
+            policy=settings.get("steal", "oldest"),
+            preallocate=settings.get("preallocate", False),
+        )
+        self.handoff = queue.SimpleQueue()
+        # Seconds from MIDI arrival to OSC send, for the most recent requests
+        self.latencies = deque(maxlen=100000)
+
+        self._voices = {}
+        self._controls = {}
+        self._thread = threading.Thread(
+            target=self._run, name="MidiBridge", daemon=True
+        )
+
+    @property
+    def stolen(self):
+        return self.pool.stolen
+
+    def start(self):
+        self.pool.start()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Handle everything queued so far, release all voices and stop"""
+        self.handoff.put(None)
+        self._thread.join()
+        self.pool.stop()
+        self._voices.clear()
+        if self.mapped is not None:
+            self.mapped.free()
+
+    def _run(self):
+        while True:
+            item = self.handoff.get()
+            if item is None:
+                return
+            received, message = item
+            try:
+                if self._handle(message):
+                    self.latencies.append(time.perf_counter() - received)
+            except Exception as e:
+                logging.warning(f"Failed to handle {message}: {e}")
+
+    def _handle(self, message):
+        """Send the requests for one message; False if it maps to nothing"""
+        if message.type == "note_on" and message.velocity > 0:
+            self._note_on(message.channel, message.note, message.velocity)
+        elif message.type in ("note_on", "note_off"):
+            voice = self._voices.pop((message.channel, message.note), None)
+            if voice is None:
+                return False
+            self.pool.release(voice)
+        elif message.type == "control_change" and message.control in self.cc:
+            self._control_change(self.cc[message.control], message.value)
+        else:
+            return False
+        return True
+
+    def _note_on(self, channel, note, velocity):
+        key = (channel, note)
+        if key in self._voices:
+            # Retriggered before its note-off
+            self.pool.release(self._voices.pop(key))
+        controls = dict(self._controls)
+        if "frequency" in self.synthdef.parameters:
+            controls["frequency"] = 440.0 * 2 ** ((note - 69) / 12)
+        if "amplitude" in self.synthdef.parameters:
+            controls.setdefault("amplitude", 0.2)
+            controls["amplitude"] *= velocity / 127
+        if self.mapped is not None:
+            # Mapped controls follow their bus instead
+            controls.update(self.mapped.settings())
+        self._voices[key] = self.pool.note_on(**controls)
+
+    def _control_change(self, spec, value):
+        scaled = (
+            spec.get("min", 0.0)
+            + (spec.get("max", 1.0) - spec.get("min", 0.0)) * value / 127
+        )
+        name = spec["control"]
+        if spec.get("bus"):
+            self.mapped.set(**{name: scaled})
+            return
+        # New voices start from the latest value too
+        self._controls[name] = scaled
+        self.pool.set_all(**{name: scaled})
+
+    def report(self):
+        """Latency percentiles in milliseconds, or None without any requests"""
+        if not self.latencies:
+            return None
+        import numpy as np
+
+        milliseconds = np.array(self.latencies) * 1000
+        report = {f"p{q}": float(np.percentile(milliseconds, q)) for q in (50, 90, 99)}
+        report["max"] = float(milliseconds.max())
+        report["count"] = len(milliseconds)
+        return report
+
+
+def _default(synthdef, spec):
+    parameter, _ = synthdef.parameters.get(spec["control"], (None, None))
+    if parameter is not None and len(parameter.value) == 1:
+        return parameter.value[0]
+    return spec.get("min", 0.0)
+
+
+def midi(
+    port: Optional[str] = typer.Option(
+        None, "--port", help="MIDI input port (default: the configured or first one)."
+    ),
+    file: Optional[Path] = typer.Option(
+        None, "--file", help="Replay a Standard MIDI File instead of a port."
+    ),
+    speed: float = typer.Option(1.0, "--speed", help="Playback speed for --file."),
+    synthdef: str = typer.Option(
+        None, "--synthdef", help="SynthDef to play (default: simple_sine)."
+    ),
+    list_ports: bool = typer.Option(
+        False, "--list", help="List MIDI input ports and exit."
+    ),
+    attach: bool = typer.Option(
+        False, "--attach", help="Use the shared server started by 'serve'."
+    ),
+):
+    """Play the toolkit's SynthDefs from MIDI input or a MIDI file."""
+    import mido
+
+    from .daemon import open_server, release_server
+    from .synthdefs import registry
+
+    if list_ports:
+        for name in mido.get_input_names():
+            console.print(name)
+        return
+
+    settings = CONFIG.get("midi") or {}
+    synthdef = synthdef or settings.get("synthdef", "simple_sine")
+    if synthdef not in list(registry):
+        console.print(
+            f"[red]Unknown synthdef {synthdef!r}; choose from {', '.join(registry)}.[/red]"
+        )
+        raise typer.Exit(1)
+
+    server = open_server(console, attach)
+    bridge = None
+    reader = None
+    try:
+        registry.load(server)
+        bridge = MidiBridge(server, registry[synthdef]).start()
+        try:
+            if file is not None:
+                reader = FileReader(bridge.handoff, file, speed)
+                console.print(
+                    f"Replaying {file} ({reader.midi_file.length / speed:.1f} s)."
+                )
+            else:
+                reader = PortReader(bridge.handoff, port or settings.get("port"))
+                console.print(f"Listening to {reader.port.name}.")
+        except (OSError, IOError, ValueError) as e:
+            console.print(f"[bold red]Cannot open MIDI input: {e}[/bold red]")
+            raise typer.Exit(1)
+        console.print("Press Ctrl-C to stop.")
+        reader.start()
+        try:
+            while reader.is_alive():
+                reader.join(timeout=0.5)
+        except KeyboardInterrupt:
+            pass
+    finally:
+        if reader is not None:
+            reader.stop()
+        if bridge is not None:
+            bridge.stop()
+            _print_report(bridge)
+        release_server(server)
+
+
+def _print_report(bridge):
+    report = bridge.report()
+    if report is None:
+        console.print("No MIDI messages were mapped to requests.")
+        return
+    table = Table(title="MIDI to OSC latency", show_header=True)
+    for column in ("Requests", "p50", "p90", "p99", "Max"):
+        table.add_column(column, justify="right")
+    table.add_row(
+        str(report["count"]),
+        *(f"{report[key]:.3f} ms" for key in ("p50", "p90", "p99", "max")),
+    )
+    console.print(table)
+    if bridge.stolen:
+        console.print(
+            f"{bridge.stolen} voices were stolen (polyphony {bridge.polyphony})."
+        )
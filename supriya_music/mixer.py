@@ -0,0 +1,88 @@
+"""
+Shared effects on send buses.
+
+Rather than giving every voice an effect of its own, ``Mixer`` runs one
+instance of each effect, reading a private stereo audio bus. Voices play in
+the ``sources`` group and add a scaled copy of their output to a send bus,
+so an effect costs the same whether one voice or hundreds feed it.
+
+Node order does the routing: the ``effects`` group sits right after
+``sources``, so within every control block all voices have written their
+sends before the effects read them, and the effects (in the order they were
+added) add their output to the main bus after the dry signal.
+
+A voice SynthDef takes part through three controls, as ``simple_sine``
+does: ``out`` for its dry output, ``send`` for the send bus and
+``send_level`` for how much it sends. ``send_settings`` gives those for a
+named send; effect SynthDefs read ``in_bus`` and write to ``out``.
+"""
+
+from typing import NamedTuple
+
+from supriya import BusGroup, Synth
+
+
+class Send(NamedTuple):
+    """A send bus and the effect reading it"""
+
+    name: str
+    bus_group: BusGroup
+    effect: Synth
+
+
+class Mixer:
+    """Source and effects groups plus a send bus and effect per send"""
+
+    def __init__(self, server, target=None, out=0, channel_count=2):
+        self.server = server
+        self.target = target or server.default_group
+        self.out = out
+        self.channel_count = channel_count
+        self.sources = None
+        self.effects = None
+        self.sends = {}
+
+    def start(self):
+        with self.server.at():
+            self.sources = self.target.add_group(add_action="ADD_TO_TAIL")
+            self.effects = self.sources.add_group(add_action="ADD_AFTER")
+        return self
+
+    def stop(self):
+        """Free the groups, and with them every voice and effect"""
+        with self.server.at():
+            self.effects.free()
+            self.sources.free()
+        for send in self.sends.values():
+            send.bus_group.free()
+        self.sends.clear()
+
+    def add_send(self, name, synthdef, **controls):
+        """Add a send bus and the one effect reading it, after earlier effects"""
+        if name in self.sends:
+            raise ValueError(f"Send {name!r} already exists")
+        bus_group = self.server.add_bus_group(
+            calculation_rate="audio", count=self.channel_count
+        )
+        effect = self.effects.add_synth(
+            synthdef,
+            add_action="ADD_TO_TAIL",
+            in_bus=int(bus_group[0]),
+            out=self.out,
+            **controls,
+        )
+        self.sends[name] = Send(name, bus_group, effect)
+        return self.sends[name]
+
+    def remove_send(self, name):
+        send = self.sends.pop(name)
+        send.effect.free()
+        send.bus_group.free()
+
+    def send_settings(self, name, level):
+        """Voice controls routing its dry output out and ``level`` to a send"""
+        return {
+            "out": self.out,
+            "send": int(self.sends[name].bus_group[0]),
+            "send_level": level,
+        }
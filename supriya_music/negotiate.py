@@ -0,0 +1,160 @@
+"""
+Boot negotiation over a ladder of audio options.
+
+Booting with a device that is missing, busy or running at another sample
+rate fails, and with Bluetooth devices it often hangs for a while first.
+``BootNegotiator`` tries candidate ``supriya.Options`` built from
+``CONFIG["audio"]`` in priority order, giving each a short timeout: the
+configured settings, then the other sample rates, then the system default
+input, then the system default devices. The settings that worked are saved
+per audio device list, so the next boot on the same hardware starts with
+them.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+
+import supriya
+import supriya.scsynth
+from supriya.exceptions import ServerCannotBoot
+
+from .config import CACHE_DIR, CONFIG
+
+STATE_PATH = Path(CACHE_DIR) / "boot.json"
+
+DEFAULT_SAMPLE_RATES = (48000, 44100)
+
+
+def device_fingerprint():
+    """Hash of the current audio device list, or "unknown" without PortAudio"""
+    try:
+        import sounddevice as sd
+
+        devices = sd.query_devices()
+    except Exception:
+        return "unknown"
+    description = [
+        (
+            device["name"],
+            device["hostapi"],
+            device["max_input_channels"],
+            device["max_output_channels"],
+        )
+        for device in devices
+    ]
+    return hashlib.sha1(json.dumps(description).encode("utf-8")).hexdigest()
+
+
+class BootNegotiator:
+    """Boot a server with the first candidate audio options that work"""
+
+    def __init__(self, audio=None, overrides=None, timeout=None, sample_rates=None):
+        settings = CONFIG.get("boot") or {}
+        if audio is None:
+            audio = CONFIG.get("audio") or {}
+        self.audio = dict(audio)
+        self.overrides = dict(overrides or {})
+        self.timeout = timeout or settings.get("timeout", 5.0)
+        self.sample_rates = tuple(
+            sample_rates or settings.get("sample_rates", DEFAULT_SAMPLE_RATES)
+        )
+        # (settings, error or None, seconds) for every boot attempted
+        self.attempts = []
+
+    def candidates(self, fingerprint=None):
+        """Audio settings to try, most likely to work first"""
+        ladder = []
+        remembered = _read_state().get(fingerprint) if fingerprint else None
+        # Only reuse a winner found for the current configuration
+        if remembered and remembered.get("config") == self.audio:
+            ladder.append(remembered["audio"])
+
+        devices = [self.audio]
+        if self.audio.get("input_device"):
+            devices.append({**self.audio, "input_device": None})
+        if self.audio.get("input_device") or self.audio.get("output_device"):
+            devices.append({**self.audio, "input_device": None, "output_device": None})
+        for settings in devices:
+            rates = [settings.get("sample_rate")] + [
+                rate
+                for rate in self.sample_rates
+                if rate != settings.get("sample_rate")
+            ]
+            for rate in rates:
+                ladder.append({**settings, "sample_rate": rate})
+
+        unique = []
+        for settings in ladder:
+            settings = {
+                key: value for key, value in settings.items() if value is not None
+            }
+            if settings not in unique:
+                unique.append(settings)
+        return unique
+
+    def boot(self, server, on_attempt=None):
+        """
+        Boot ``server``, trying each candidate until one works.
+
+        ``on_attempt(settings)`` is called before each try. Raises
+        ``ServerCannotBoot`` listing every failure if none of them boot.
+        """
+        # Fail fast with a readable error when scsynth isn't installed
+        supriya.scsynth.find()
+        fingerprint = device_fingerprint()
+        self.attempts = []
+        for settings in self.candidates(fingerprint):
+            if on_attempt is not None:
+                on_attempt(settings)
+            options = supriya.Options(**{**settings, **self.overrides})
+            start = time.perf_counter()
+            error = _boot_with_timeout(server, options, self.timeout)
+            self.attempts.append((settings, error, time.perf_counter() - start))
+            if error is None:
+                _write_state(fingerprint, self.audio, settings)
+                return server
+        raise ServerCannotBoot(
+            "No audio configuration booted:\n"
+            + "\n".join(
+                f"  {settings}: {error}" for settings, error, _ in self.attempts
+            )
+        )
+
+
+def _boot_with_timeout(server, options, timeout):
+    """Boot in a helper thread, killing scsynth if it hangs; return the error"""
+    errors = []
+
+    def run():
+        try:
+            server.boot(options=options)
+        except Exception as e:
+            errors.append(str(e) or type(e).__name__)
+
+    thread = threading.Thread(target=run, name="BootNegotiator", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        process = getattr(server.process_protocol, "process", None)
+        if process is not None:
+            process.kill()
+        thread.join(timeout)
+        return f"timed out after {timeout:g} s"
+    return errors[0] if errors else None
+
+
+def _read_state():
+    try:
+        return json.loads(STATE_PATH.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_state(fingerprint, config, settings):
+    state = _read_state()
+    state[fingerprint] = {"config": config, "audio": settings, "booted": time.time()}
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    STATE_PATH.write_text(json.dumps(state, indent=2))
@@ -0,0 +1,201 @@
+"""
+Client-side mirror of the server's node tree.
+
+``/g_queryTree`` is a blocking round-trip, so printing the tree after every
+synth change stalls the caller. ``NodeTreeMirror`` follows the ``/n_go``,
+``/n_end``, ``/n_move``, ``/n_on`` and ``/n_off`` notifications the server
+already sends to registered clients, and only runs a full query to seed or
+periodically reconcile its state.
+"""
+
+import logging
+import threading
+
+from supriya.contexts.responses import QueryTreeGroup, QueryTreeSynth
+
+
+class NodeTreeMirror:
+    """Node tree kept up to date from server notifications"""
+
+    def __init__(self, server, reconcile_interval=None):
+        self.server = server
+        self.reconcile_interval = reconcile_interval
+
+        self._lock = threading.RLock()
+        self._children = {0: []}
+        self._parents = {}
+        self._active = {}
+        self._synthdef_names = {}
+        self._callbacks = []
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self, reconcile=True):
+        """Subscribe to node notifications and optionally seed from a full query"""
+        for address, procedure in [
+            ("/n_go", self._handle_n_go),
+            ("/n_end", self._handle_n_end),
+            ("/n_move", self._handle_n_move),
+            ("/n_on", self._handle_n_on),
+            ("/n_off", self._handle_n_off),
+        ]:
+            self._callbacks.append(
+                self.server.register_osc_callback(
+                    pattern=[address], procedure=procedure
+                )
+            )
+        if reconcile:
+            self.reconcile()
+        if self.reconcile_interval:
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="NodeTreeMirror", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Unsubscribe from notifications and stop periodic reconciliation"""
+        self._stopped.set()
+        for callback in self._callbacks:
+            try:
+                self.server.unregister_osc_callback(callback)
+            except Exception:
+                pass
+        self._callbacks.clear()
+
+    def reconcile(self):
+        """Replace the mirrored state with the result of a full ``/g_queryTree``"""
+        tree = self.server.query_tree(include_controls=False)
+        children, parents, names = {}, {}, {}
+
+        def walk(node, parent_id):
+            if parent_id is not None:
+                parents[node.node_id] = parent_id
+                children[parent_id].append(node.node_id)
+            if isinstance(node, QueryTreeGroup):
+                children[node.node_id] = []
+                for child in node.children:
+                    walk(child, node.node_id)
+            else:
+                names[node.node_id] = node.synthdef_name
+
+        walk(tree, None)
+        with self._lock:
+            self._children = children
+            self._parents = parents
+            self._active = {
+                node_id: self._active.get(node_id, True) for node_id in parents
+            }
+            self._synthdef_names = names
+
+    def track(self, synth, parent=None):
+        """
+        Record a synth this client just created.
+
+        Notifications don't carry SynthDef names, so the name is remembered here.
+        With a ``parent`` the synth is also placed at the head of that group right
+        away; the ``/n_go`` that follows simply confirms it.
+        """
+        node_id = int(synth)
+        with self._lock:
+            self._synthdef_names[node_id] = synth.synthdef.effective_name
+            if parent is not None and node_id not in self._parents:
+                self._active[node_id] = True
+                self._insert(node_id, int(parent), -1, -1)
+
+    def forget(self, node):
+        """Drop a node this client just freed, ahead of its ``/n_end``"""
+        node_id = int(node)
+        with self._lock:
+            self._remove(node_id)
+            self._active.pop(node_id, None)
+            self._synthdef_names.pop(node_id, None)
+
+    def snapshot(self, node_id=0):
+        """Return the mirrored tree as a ``QueryTreeGroup``, without a round-trip"""
+        with self._lock:
+            return self._build(node_id)
+
+    def __contains__(self, node_id):
+        with self._lock:
+            return int(node_id) in self._parents
+
+    def __len__(self):
+        with self._lock:
+            return len(self._parents)
+
+    def _build(self, node_id):
+        if node_id in self._children:
+            return QueryTreeGroup(
+                node_id=node_id,
+                children=[self._build(child) for child in self._children[node_id]],
+            )
+        return QueryTreeSynth(
+            node_id=node_id,
+            synthdef_name=self._synthdef_names.get(node_id),
+            annotation=None if self._active.get(node_id, True) else "paused",
+        )
+
+    def _insert(self, node_id, parent_id, previous_id, next_id):
+        self._parents[node_id] = parent_id
+        children = self._children.setdefault(parent_id, [])
+        if previous_id == -1:
+            children.insert(0, node_id)
+        elif next_id == -1:
+            children.append(node_id)
+        elif previous_id in children:
+            children.insert(children.index(previous_id) + 1, node_id)
+        elif next_id in children:
+            children.insert(children.index(next_id), node_id)
+        else:
+            children.append(node_id)
+
+    def _remove(self, node_id):
+        parent_id = self._parents.pop(node_id, None)
+        if node_id in self._children.get(parent_id, []):
+            self._children[parent_id].remove(node_id)
+
+    def _handle_n_go(self, message):
+        node_id, parent_id, previous_id, next_id, is_group = message.contents[:5]
+        with self._lock:
+            self._remove(node_id)
+            if is_group:
+                self._children.setdefault(node_id, [])
+            self._active[node_id] = True
+            self._insert(node_id, parent_id, previous_id, next_id)
+
+    def _handle_n_end(self, message):
+        node_id = message.contents[0]
+        with self._lock:
+            self._remove(node_id)
+            # A freed group takes its whole subtree with it
+            stack = [node_id]
+            while stack:
+                current = stack.pop()
+                for child in self._children.pop(current, []):
+                    self._parents.pop(child, None)
+                    stack.append(child)
+                self._active.pop(current, None)
+                self._synthdef_names.pop(current, None)
+
+    def _handle_n_move(self, message):
+        node_id, parent_id, previous_id, next_id = message.contents[:4]
+        with self._lock:
+            self._remove(node_id)
+            self._insert(node_id, parent_id, previous_id, next_id)
+
+    def _handle_n_on(self, message):
+        with self._lock:
+            self._active[message.contents[0]] = True
+
+    def _handle_n_off(self, message):
+        with self._lock:
+            self._active[message.contents[0]] = False
+
+    def _run(self):
+        while not self._stopped.wait(self.reconcile_interval):
+            try:
+                self.reconcile()
+            except Exception as e:
+                logging.warning(f"Node tree reconciliation failed: {e}")
@@ -0,0 +1,352 @@
+"""
+Tidal-style mini-notation patterns.
+
+Parses the mini-notation used in tidalcycles/start.tidal into pattern
+objects that can be queried for the events starting in a time span. Time is
+measured in cycles. Supported syntax:
+
+- ``a b c``: a sequence, dividing the cycle into equal steps
+- ``[a b]``: a subdivided step
+- ``<a b>``: alternation, one element per cycle
+- ``a, b``: a stack, playing its layers at the same time
+- ``~``: a rest
+- ``a*2`` and ``a/2``: play a step faster or slower
+
+Every pattern repeats after a whole number of cycles (its ``period``).
+``compile_pattern`` caches compiled patterns by source, and each compiled
+pattern indexes the events of a cycle the first time the cycle is queried.
+Later queries are then just a binary search of a sorted list, however
+deeply the pattern is nested.
+"""
+
+import math
+import re
+from bisect import bisect_left
+from fractions import Fraction
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+
+class PatternError(Exception):
+    pass
+
+
+class Event(NamedTuple):
+    """One event: starts at ``begin`` and lasts until ``end``, in cycles"""
+
+    begin: float
+    end: float
+    value: Any
+
+
+def _cycles(begin, end):
+    """Whole cycles touched by the span ``[begin, end)``"""
+    return range(math.floor(begin), math.ceil(end))
+
+
+class _Atom:
+    period = 1
+
+    def __init__(self, value):
+        self.value = value
+
+    def query(self, begin, end):
+        return [
+            (cycle, cycle + 1, self.value)
+            for cycle in range(math.ceil(begin), math.ceil(end))
+        ]
+
+
+class _Rest:
+    period = 1
+
+    def query(self, begin, end):
+        return []
+
+
+class _Sequence:
+    """Steps sharing each cycle equally"""
+
+    def __init__(self, steps):
+        self.steps = steps
+        self.period = math.lcm(*(step.period for step in steps))
+
+    def query(self, begin, end):
+        count = len(self.steps)
+        events = []
+        for cycle in _cycles(begin, end):
+            for i, step in enumerate(self.steps):
+                start = cycle + Fraction(i, count)
+                span_begin = max(begin, start)
+                span_end = min(end, start + Fraction(1, count))
+                if span_begin >= span_end:
+                    continue
+                # The step sees one whole cycle squeezed into its slot
+                for event_begin, event_end, value in step.query(
+                    cycle + (span_begin - start) * count,
+                    cycle + (span_end - start) * count,
+                ):
+                    events.append(
+                        (
+                            start + (event_begin - cycle) / count,
+                            start + (event_end - cycle) / count,
+                            value,
+                        )
+                    )
+        return events
+
+
+class _Stack:
+    """Layers playing at the same time"""
+
+    def __init__(self, layers):
+        self.layers = layers
+        self.period = math.lcm(*(layer.period for layer in layers))
+
+    def query(self, begin, end):
+        return [event for layer in self.layers for event in layer.query(begin, end)]
+
+
+class _Alternation:
+    """One element per cycle; each element's own cycles only advance when it plays"""
+
+    def __init__(self, elements):
+        self.elements = elements
+        self.period = len(elements) * math.lcm(
+            *(element.period for element in elements)
+        )
+
+    def query(self, begin, end):
+        count = len(self.elements)
+        events = []
+        for cycle in _cycles(begin, end):
+            span_begin, span_end = max(begin, cycle), min(end, cycle + 1)
+            if span_begin >= span_end:
+                continue
+            shift = cycle - cycle // count
+            element = self.elements[cycle % count]
+            for event_begin, event_end, value in element.query(
+                span_begin - shift, span_end - shift
+            ):
+                events.append((event_begin + shift, event_end + shift, value))
+        return events
+
+
+class _Fast:
+    """A step sped up (factor > 1) or slowed down (factor < 1)"""
+
+    def __init__(self, pattern, factor):
+        self.pattern = pattern
+        self.factor = factor
+        # Smallest whole number of cycles after which both repeat
+        cycles = pattern.period * factor.denominator
+        self.period = cycles // math.gcd(cycles, factor.numerator)
+
+    def query(self, begin, end):
+        return [
+            (event_begin / self.factor, event_end / self.factor, value)
+            for event_begin, event_end, value in self.pattern.query(
+                begin * self.factor, end * self.factor
+            )
+        ]
+
+
+_TOKEN = re.compile(r"\s*(?:([\[\]<>,~*/])|([^\s\[\]<>,~*/]+))")
+
+
+def _value(word):
+    for kind in (int, float):
+        try:
+            return kind(word)
+        except ValueError:
+            pass
+    return word
+
+
+class _Parser:
+    def __init__(self, source):
+        self.source = source
+        self.tokens = []
+        position = 0
+        source = source.rstrip()
+        while position < len(source):
+            match = _TOKEN.match(source, position)
+            if match is None:
+                raise PatternError(f"Unexpected character at {position}: {source!r}")
+            self.tokens.append((match.group(1) or match.group(2), match.start()))
+            position = match.end()
+        self.index = 0
+
+    def peek(self):
+        if self.index < len(self.tokens):
+            return self.tokens[self.index][0]
+        return None
+
+    def take(self):
+        token = self.peek()
+        if token is None:
+            raise PatternError(f"Unexpected end of pattern: {self.source!r}")
+        self.index += 1
+        return token
+
+    def error(self, message):
+        if not self.tokens:
+            return PatternError(f"{message}: {self.source!r}")
+        position = self.tokens[min(self.index, len(self.tokens) - 1)][1]
+        return PatternError(f"{message} at {position}: {self.source!r}")
+
+    def parse(self):
+        pattern = self.layers("[")
+        if self.peek() is not None:
+            raise self.error(f"Unexpected {self.peek()!r}")
+        return pattern
+
+    def layers(self, bracket):
+        """Comma-separated layers up to a closing bracket (or the end)"""
+        closing = {"[": "]", "<": ">"}[bracket]
+        layers = [[]]
+        while self.peek() not in (closing, None):
+            if self.peek() == ",":
+                self.take()
+                layers.append([])
+            else:
+                layers[-1].append(self.step())
+        if any(not steps for steps in layers):
+            raise self.error("Empty pattern")
+        kind = _Alternation if bracket == "<" else _Sequence
+        patterns = [
+            steps[0] if len(steps) == 1 and kind is _Sequence else kind(steps)
+            for steps in layers
+        ]
+        return patterns[0] if len(patterns) == 1 else _Stack(patterns)
+
+    def step(self):
+        token = self.take()
+        if token in ("[", "<"):
+            pattern = self.layers(token)
+            if self.peek() is None:
+                raise self.error(f"Unclosed {token!r}")
+            self.take()
+        elif token == "~":
+            pattern = _Rest()
+        elif token in ("]", ">", ",", "*", "/"):
+            self.index -= 1
+            raise self.error(f"Unexpected {token!r}")
+        else:
+            pattern = _Atom(_value(token))
+        while self.peek() in ("*", "/"):
+            operator = self.take()
+            try:
+                factor = Fraction(self.take())
+            except ValueError:
+                self.index -= 1
+                raise self.error(f"Expected a number after {operator!r}")
+            if factor <= 0:
+                raise self.error(f"{operator!r} needs a positive number")
+            pattern = _Fast(pattern, factor if operator == "*" else 1 / factor)
+        return pattern
+
+
+class Pattern:
+    """A compiled pattern, queried with ``query(begin, end)`` in cycles"""
+
+    def __init__(self, source):
+        self.source = source
+        self._root = _Parser(source).parse()
+        self.period = self._root.period
+        # Per cycle of the period: sorted onsets for bisecting and the events
+        self._index = {}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.source!r})"
+
+    def _cycle(self, cycle):
+        try:
+            return self._index[cycle]
+        except KeyError:
+            pass
+        events = sorted(
+            (
+                Event(float(begin - cycle), float(end - cycle), value)
+                for begin, end, value in self._root.query(cycle, cycle + 1)
+            ),
+            key=lambda event: event.begin,
+        )
+        entry = self._index[cycle] = ([event.begin for event in events], events)
+        return entry
+
+    def query(self, begin, end):
+        """Events starting in ``[begin, end)``, sorted by start time"""
+        events = []
+        for cycle in _cycles(begin, end):
+            onsets, cycle_events = self._cycle(cycle % self.period)
+            low = bisect_left(onsets, begin - cycle) if begin > cycle else 0
+            high = bisect_left(onsets, end - cycle) if end < cycle + 1 else len(onsets)
+            for i in range(low, high):
+                event = cycle_events[i]
+                events.append(
+                    Event(event.begin + cycle, event.end + cycle, event.value)
+                )
+        return events
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(source):
+    """Compiled pattern for ``source``, shared between callers"""
+    return Pattern(source)
+
+
+_DEFINITION = re.compile(r'^\s*(?:let\s+)?(\w+)\s*=\s*"([^"]*)"')
+
+
+def tidal_definitions(path):
+    """String patterns bound with ``let`` in a .tidal file, by name"""
+    definitions = {}
+    with open(path) as file:
+        for line in file:
+            match = _DEFINITION.match(line)
+            if match:
+                definitions[match.group(1)] = match.group(2)
+    return definitions
+
+
+def show(
+    source: str = typer.Argument(
+        ..., help="Mini-notation, or a name defined in the --tidal file."
+    ),
+    cycles: float = typer.Option(1.0, "--cycles", "-n", help="Cycles to list."),
+    start: float = typer.Option(0.0, "--from", help="Cycle to start listing from."),
+    tidal: Optional[Path] = typer.Option(
+        None, "--tidal", help="Look SOURCE up in a .tidal file's let bindings."
+    ),
+):
+    """List the events of a mini-notation pattern."""
+    if tidal is not None:
+        definitions = tidal_definitions(tidal)
+        if source in definitions:
+            source = definitions[source]
+    try:
+        pattern = compile_pattern(source)
+    except PatternError as e:
+        console.print(str(e), style="red", markup=False)
+        raise typer.Exit(1)
+
+    table = Table(title=source, show_header=True, header_style="bold magenta")
+    for column in ("Cycle", "Begin", "End", "Value"):
+        table.add_column(column)
+    for event in pattern.query(start, start + cycles):
+        table.add_row(
+            str(math.floor(event.begin)),
+            f"{event.begin:.4g}",
+            f"{event.end:.4g}",
+            str(event.value),
+        )
+    console.print(table)
+    console.print(f"Repeats every {pattern.period} cycles.")
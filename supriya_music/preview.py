@@ -0,0 +1,435 @@
+"""
+NumPy preview renderer for the toolkit's SynthDefs.
+
+Evaluates a supriya ``SynthDef`` graph directly in NumPy, without scsynth,
+for quick previews and for machines without SuperCollider. Audio is produced
+in chunks of control blocks: control-rate signals hold one value per block
+and audio-rate signals one value per sample, as in scsynth, and every UGen
+processes a whole chunk at once.
+
+Only the UGens this project uses are covered: ``Control``, ``SinOsc``,
+``EnvGen``, ``LFNoise0``, ``LFNoise1``, ``Impulse``, ``Out``, ``MulAdd``,
+arithmetic and the common unary operators such as ``midi_to_hz``. It is a
+preview, not a bit-exact match for scsynth: control-rate inputs to
+audio-rate UGens are held for the block rather than interpolated, and the
+noise generators use NumPy's random numbers.
+"""
+
+import wave
+
+import numpy as np
+from supriya.enums import BinaryOperator, CalculationRate, UnaryOperator
+
+BINARY_OPERATORS = {
+    BinaryOperator.ADDITION: np.add,
+    BinaryOperator.SUBTRACTION: np.subtract,
+    BinaryOperator.MULTIPLICATION: np.multiply,
+    BinaryOperator.FLOAT_DIVISION: np.divide,
+    BinaryOperator.MODULO: np.mod,
+    BinaryOperator.POWER: np.power,
+    BinaryOperator.MINIMUM: np.minimum,
+    BinaryOperator.MAXIMUM: np.maximum,
+    BinaryOperator.LESS_THAN: lambda a, b: np.less(a, b).astype(float),
+    BinaryOperator.GREATER_THAN: lambda a, b: np.greater(a, b).astype(float),
+}
+
+UNARY_OPERATORS = {
+    UnaryOperator.NEGATIVE: np.negative,
+    UnaryOperator.ABSOLUTE_VALUE: np.abs,
+    UnaryOperator.SQUARED: np.square,
+    UnaryOperator.CUBED: lambda x: np.power(x, 3),
+    UnaryOperator.SQUARE_ROOT: np.sqrt,
+    UnaryOperator.RECIPROCAL: np.reciprocal,
+    UnaryOperator.MIDI_TO_HZ: lambda x: 440.0 * np.power(2.0, (x - 69.0) / 12.0),
+    UnaryOperator.HZ_TO_MIDI: lambda x: 69.0 + 12.0 * np.log2(x / 440.0),
+    UnaryOperator.DB_TO_AMPLITUDE: lambda x: np.power(10.0, x / 20.0),
+    UnaryOperator.AMPLITUDE_TO_DB: lambda x: 20.0 * np.log10(x),
+    UnaryOperator.SIN: np.sin,
+    UnaryOperator.COS: np.cos,
+    UnaryOperator.TANH: np.tanh,
+}
+
+
+class PreviewError(Exception):
+    pass
+
+
+class _Evaluator:
+    """Evaluates one UGen chunk by chunk, keeping its state in between"""
+
+    def __init__(self, ugen, renderer):
+        self.ugen = ugen
+        self.renderer = renderer
+        self.rate = ugen.calculation_rate
+
+    def at_rate(self, signal, n_blocks):
+        """Convert an input to this UGen's rate"""
+        if self.rate == CalculationRate.AUDIO:
+            return self.renderer.audio(signal, n_blocks)
+        if self.rate == CalculationRate.CONTROL:
+            return self.renderer.control(signal, n_blocks)
+        return signal
+
+    def sample_rate(self):
+        if self.rate == CalculationRate.AUDIO:
+            return self.renderer.sample_rate
+        return self.renderer.sample_rate / self.renderer.block_size
+
+    def process(self, inputs, n_blocks):
+        raise NotImplementedError
+
+
+class _Control(_Evaluator):
+    def process(self, inputs, n_blocks):
+        return self.renderer.control_values(self.ugen, n_blocks)
+
+
+class _BinaryOp(_Evaluator):
+    def process(self, inputs, n_blocks):
+        function = BINARY_OPERATORS.get(BinaryOperator(self.ugen.special_index))
+        if function is None:
+            raise PreviewError(
+                f"Unsupported operator {BinaryOperator(self.ugen.special_index).name}"
+            )
+        left, right = (self.at_rate(signal, n_blocks) for signal in inputs)
+        return [function(left, right)]
+
+
+class _UnaryOp(_Evaluator):
+    def process(self, inputs, n_blocks):
+        function = UNARY_OPERATORS.get(UnaryOperator(self.ugen.special_index))
+        if function is None:
+            raise PreviewError(
+                f"Unsupported operator {UnaryOperator(self.ugen.special_index).name}"
+            )
+        return [function(self.at_rate(inputs[0], n_blocks))]
+
+
+class _MulAdd(_Evaluator):
+    def process(self, inputs, n_blocks):
+        source, multiplier, addend = (
+            self.at_rate(signal, n_blocks) for signal in inputs
+        )
+        return [source * multiplier + addend]
+
+
+class _Phasor(_Evaluator):
+    """Shared phase accumulator, in cycles, for the oscillators and noises"""
+
+    def __init__(self, ugen, renderer):
+        super().__init__(ugen, renderer)
+        self.phase = 0.0
+
+    def advance(self, frequency, length):
+        increments = np.broadcast_to(frequency / self.sample_rate(), (length,))
+        phases = self.phase + np.concatenate(([0.0], np.cumsum(increments)))
+        self.phase = phases[-1]
+        return phases[:-1]
+
+    def length(self, n_blocks):
+        if self.rate == CalculationRate.AUDIO:
+            return n_blocks * self.renderer.block_size
+        return n_blocks
+
+
+class _SinOsc(_Phasor):
+    def process(self, inputs, n_blocks):
+        frequency, phase = (self.at_rate(signal, n_blocks) for signal in inputs)
+        cycles = self.advance(frequency, self.length(n_blocks))
+        # Keep the accumulator small so long renders don't lose precision
+        self.phase %= 1.0
+        return [np.sin(2 * np.pi * cycles + phase)]
+
+
+class _Impulse(_Phasor):
+    def __init__(self, ugen, renderer):
+        super().__init__(ugen, renderer)
+        self.previous = None
+
+    def process(self, inputs, n_blocks):
+        frequency, phase = (self.at_rate(signal, n_blocks) for signal in inputs)
+        if self.previous is None:
+            self.phase = float(np.atleast_1d(phase)[0])
+            # Just below the start, so a phase of 0 fires on the first sample
+            self.previous = self.phase - 1e-9
+        cycles = self.advance(frequency, self.length(n_blocks))
+        previous = np.concatenate(([self.previous], cycles[:-1]))
+        fired = np.floor(cycles) > np.floor(previous)
+        whole = np.floor(cycles[-1])
+        self.previous = cycles[-1] - whole
+        self.phase -= whole
+        return [fired.astype(float)]
+
+
+class _LFNoise(_Phasor):
+    """LFNoise0 holds each random value, LFNoise1 ramps between them"""
+
+    def __init__(self, ugen, renderer, interpolate):
+        super().__init__(ugen, renderer)
+        self.interpolate = interpolate
+        self.values = renderer.random.uniform(-1.0, 1.0, 2)
+
+    def process(self, inputs, n_blocks):
+        frequency = self.at_rate(inputs[0], n_blocks)
+        cycles = self.advance(frequency, self.length(n_blocks))
+        index = np.floor(cycles).astype(int)
+        needed = int(index.max(initial=0)) + 2
+        if needed > len(self.values):
+            fresh = self.renderer.random.uniform(-1.0, 1.0, needed - len(self.values))
+            self.values = np.concatenate((self.values, fresh))
+        if self.interpolate:
+            fraction = cycles - index
+            start, end = self.values[index], self.values[index + 1]
+            output = start + (end - start) * fraction
+        else:
+            output = self.values[index]
+        # Rebase so the accumulator and the value table stay small
+        whole = int(np.floor(self.phase))
+        self.phase -= whole
+        self.values = self.values[whole:]
+        return [output]
+
+
+class _EnvGen(_Evaluator):
+    """Breakpoint envelope with sustain (release) node, stepped per block"""
+
+    def __init__(self, ugen, renderer):
+        super().__init__(ugen, renderer)
+        self.level = None
+        self.segment = None
+        self.position = 0.0
+        self.start_level = 0.0
+        self.previous_gate = 0.0
+        self.done = False
+
+    def process(self, inputs, n_blocks):
+        gate, level_scale, level_bias, time_scale, done_action = (
+            self.renderer.control(signal, n_blocks) for signal in inputs[:5]
+        )
+        envelope = [float(np.atleast_1d(value)[0]) for value in inputs[5:]]
+        initial_level, count, release_node = envelope[:3]
+        release_node = int(release_node)
+        segments = [envelope[4 + 4 * i : 8 + 4 * i] for i in range(int(count))]
+        if self.level is None:
+            self.level = initial_level
+
+        block_seconds = self.renderer.block_size / self.renderer.sample_rate
+        output = np.empty(n_blocks)
+        for block in range(n_blocks):
+            if gate[block] > 0 and self.previous_gate <= 0:
+                self._enter(0)
+            elif gate[block] <= 0 < self.previous_gate and 0 <= release_node:
+                # Release from wherever the attack/decay or sustain got to
+                if not self.done and (
+                    self.segment is None or self.segment < release_node
+                ):
+                    self._enter(release_node)
+            self.previous_gate = gate[block]
+
+            segment = self.segment
+            if segment is not None and segment < len(segments):
+                target, duration, shape, curve = segments[segment]
+                duration *= time_scale[block]
+                fraction = 1.0 if duration <= 0 else min(self.position / duration, 1.0)
+                self.level = _shape(self.start_level, target, fraction, shape, curve)
+                self.position += block_seconds
+                if fraction >= 1.0:
+                    self.level = target
+                    if segment + 1 == release_node and gate[block] > 0:
+                        # Hold at the sustain node until the gate closes
+                        self.segment = None
+                    elif segment + 1 >= len(segments):
+                        self.segment = None
+                        self.done = True
+                        if done_action[block] >= 2:
+                            self.renderer.free(block)
+                    else:
+                        self._enter(segment + 1)
+            output[block] = self.level * level_scale[block] + level_bias[block]
+        return [self.at_rate(output, n_blocks)]
+
+    def _enter(self, segment):
+        self.segment = segment
+        self.position = 0.0
+        self.start_level = self.level
+        self.done = False
+
+
+class _Out(_Evaluator):
+    def process(self, inputs, n_blocks):
+        bus = int(np.atleast_1d(inputs[0])[0])
+        for offset, source in enumerate(inputs[1:]):
+            self.renderer.write_bus(bus + offset, self.renderer.audio(source, n_blocks))
+        return []
+
+
+EVALUATORS = {
+    "Control": _Control,
+    "BinaryOpUGen": _BinaryOp,
+    "UnaryOpUGen": _UnaryOp,
+    "MulAdd": _MulAdd,
+    "SinOsc": _SinOsc,
+    "Impulse": _Impulse,
+    "LFNoise0": lambda ugen, renderer: _LFNoise(ugen, renderer, interpolate=False),
+    "LFNoise1": lambda ugen, renderer: _LFNoise(ugen, renderer, interpolate=True),
+    "EnvGen": _EnvGen,
+    "Out": _Out,
+}
+
+
+def _shape(start, end, fraction, shape, curve):
+    """Level part-way through an envelope segment, per SuperCollider's shapes"""
+    shape = int(shape)
+    if shape == 0:  # step
+        return end
+    if shape == 2 and start * end > 0:  # exponential
+        return start * (end / start) ** fraction
+    if shape == 3:  # sine
+        return start + (end - start) * (0.5 - np.cos(np.pi * fraction) / 2)
+    if shape == 4:  # welch
+        if start < end:
+            return start + (end - start) * np.sin(np.pi / 2 * fraction)
+        return end - (end - start) * np.sin(np.pi / 2 * (1 - fraction))
+    if shape == 5 and abs(curve) >= 0.001:  # custom curvature
+        return start + (end - start) * (1 - np.exp(curve * fraction)) / (
+            1 - np.exp(curve)
+        )
+    if shape == 6:  # squared
+        root = np.sqrt(start) + (np.sqrt(end) - np.sqrt(start)) * fraction
+        return root * root
+    if shape == 7:  # cubed
+        root = np.cbrt(start) + (np.cbrt(end) - np.cbrt(start)) * fraction
+        return root**3
+    if shape == 8:  # hold
+        return start if fraction < 1 else end
+    return start + (end - start) * fraction  # linear
+
+
+class PreviewRenderer:
+    """Render one synth of a SynthDef to a NumPy array"""
+
+    def __init__(
+        self,
+        synthdef,
+        sample_rate=48000,
+        block_size=64,
+        channels=2,
+        chunk_blocks=256,
+        seed=None,
+    ):
+        self.synthdef = synthdef
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.channels = channels
+        self.chunk_blocks = chunk_blocks
+        self.random = np.random.default_rng(seed)
+
+        self._evaluators = []
+        for ugen in synthdef.ugens:
+            factory = EVALUATORS.get(type(ugen).__name__)
+            if factory is None:
+                raise PreviewError(
+                    f"{synthdef.effective_name}: {type(ugen).__name__} is not supported"
+                )
+            self._evaluators.append(factory(ugen, self))
+        self._controls = None
+        self._chunk_start = 0
+        self._buses = None
+        self._freed_at = None
+
+    def render(self, duration, timeline=()):
+        """
+        Render ``duration`` seconds; returns a ``(channels, frames)`` array.
+
+        ``timeline`` holds ``(seconds, {control: value})`` pairs, the format
+        of ``render.parse_timeline``; a ``gate`` of 0 releases the envelope.
+        """
+        total_blocks = int(np.ceil(duration * self.sample_rate / self.block_size))
+        self._controls = self._control_arrays(total_blocks, timeline)
+        output = np.zeros((self.channels, total_blocks * self.block_size))
+        self._freed_at = None
+        block = 0
+        while block < total_blocks and self._freed_at is None:
+            n_blocks = min(self.chunk_blocks, total_blocks - block)
+            self._chunk_start = block
+            self._buses = np.zeros((self.channels, n_blocks * self.block_size))
+            outputs = {}
+            for evaluator in self._evaluators:
+                inputs = [
+                    outputs[id(value.ugen)][value.index]
+                    if hasattr(value, "ugen")
+                    else float(value)
+                    for value in evaluator.ugen.inputs
+                ]
+                outputs[id(evaluator.ugen)] = evaluator.process(inputs, n_blocks)
+            frames = slice(
+                block * self.block_size, (block + n_blocks) * self.block_size
+            )
+            if self._freed_at is not None:
+                # Silence from the block the synth freed itself in onwards
+                self._buses[:, (self._freed_at + 1) * self.block_size :] = 0.0
+            output[:, frames] = self._buses
+            block += n_blocks
+        frames = int(round(duration * self.sample_rate))
+        return output[:, :frames].astype(np.float32)
+
+    def audio(self, signal, n_blocks):
+        length = n_blocks * self.block_size
+        if np.ndim(signal) == 0:
+            return np.full(length, float(signal))
+        if len(signal) == length:
+            return signal
+        return np.repeat(signal, self.block_size)
+
+    def control(self, signal, n_blocks):
+        if np.ndim(signal) == 0:
+            return np.full(n_blocks, float(signal))
+        if len(signal) == n_blocks:
+            return signal
+        return signal[:: self.block_size]
+
+    def control_values(self, ugen, n_blocks):
+        chunk = slice(self._chunk_start, self._chunk_start + n_blocks)
+        return [
+            self._controls[name][chunk]
+            for parameter in ugen.parameters
+            for name in [parameter.name] * len(parameter.value)
+        ]
+
+    def write_bus(self, bus, signal):
+        if 0 <= bus < self.channels:
+            self._buses[bus] += signal
+
+    def free(self, block):
+        """Called by ``EnvGen`` with a done action that frees the synth"""
+        if self._freed_at is None:
+            self._freed_at = block
+
+    def _control_arrays(self, total_blocks, timeline):
+        arrays = {}
+        for name, (parameter, _) in self.synthdef.parameters.items():
+            arrays[name] = np.full(total_blocks, float(parameter.value[0]))
+        for seconds, controls in sorted(timeline, key=lambda item: item[0]):
+            block = int(round(seconds * self.sample_rate / self.block_size))
+            for name, value in controls.items():
+                if name not in arrays:
+                    raise PreviewError(
+                        f"{self.synthdef.effective_name} has no control {name!r}"
+                    )
+                arrays[name][block:] = value
+        return arrays
+
+
+def render_preview(synthdef, duration, timeline=(), **kwargs):
+    """Render one synth of ``synthdef`` for ``duration`` seconds"""
+    return PreviewRenderer(synthdef, **kwargs).render(duration, timeline)
+
+
+def write_wav(path, audio, sample_rate=48000):
+    """Write a ``(channels, frames)`` float array as 16-bit PCM WAV"""
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as output:
+        output.setnchannels(audio.shape[0])
+        output.setsampwidth(2)
+        output.setframerate(sample_rate)
+        output.writeframes(pcm.T.tobytes())
@@ -0,0 +1,63 @@
+"""
+Non-blocking scsynth boot for the PyQt6 controllers.
+
+``Server.boot()`` blocks until scsynth is up, which freezes the window when it
+runs on the GUI thread. ``ServerBooter`` boots (or attaches to the shared
+server started by ``serve``) on a worker thread, negotiating the audio options
+unless explicit ones are given. It makes sure the cached SynthDefs and any
+queued extra ones are loaded once the server is ready, and reports back
+through Qt signals, which are delivered on the GUI thread.
+"""
+
+import threading
+
+import supriya.scsynth
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .daemon import attach_server
+from .negotiate import BootNegotiator
+from .synthdefs import registry
+
+
+class ServerBooter(QObject):
+    """Boot a supriya server off the GUI thread and signal the outcome"""
+
+    booted = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, server, options=None, attach=False, parent=None):
+        super().__init__(parent)
+        self.server = server
+        self.options = options
+        self.attach = attach
+        self.pending_synthdefs = []
+
+    def add_synthdefs(self, *synthdefs):
+        """Queue SynthDefs to be sent as soon as the server is ready"""
+        self.pending_synthdefs.extend(synthdefs)
+
+    def start(self):
+        """Start booting; returns immediately"""
+        threading.Thread(target=self._run, name="ServerBooter", daemon=True).start()
+
+    def _run(self):
+        try:
+            if self.attach:
+                attach_server(self.server)
+            elif self.options is not None:
+                # Fail fast with a readable error when scsynth isn't installed
+                supriya.scsynth.find()
+                registry.prepare_boot()
+                self.server.boot(options=self.options)
+            else:
+                registry.prepare_boot()
+                BootNegotiator().boot(self.server)
+            registry.load(self.server)
+            if self.pending_synthdefs:
+                self.server.add_synthdefs(*self.pending_synthdefs)
+                self.pending_synthdefs = []
+            self.server.sync()
+        except Exception as e:
+            self.failed.emit(str(e) or type(e).__name__)
+            return
+        self.booted.emit(self.server)
@@ -0,0 +1,113 @@
+"""
+Non-realtime rendering.
+
+Turns note sequences and parameter timelines into a supriya ``Score`` and
+renders it with scsynth's non-realtime mode (``-N``). Rendering runs as fast
+as scsynth can compute the audio, and needs neither an audio device nor a
+running server, so it suits CI and batch jobs. Single-synth renders can also
+go through the NumPy preview engine in preview.py, which needs no scsynth.
+"""
+
+from pathlib import Path
+
+import supriya
+import supriya.scsynth
+from supriya.enums import HeaderFormat
+
+from .config import CONFIG
+
+HEADER_FORMATS = {
+    ".wav": HeaderFormat.WAV,
+    ".aif": HeaderFormat.AIFF,
+    ".aiff": HeaderFormat.AIFF,
+}
+
+
+class RenderFailed(Exception):
+    pass
+
+
+def sample_rate():
+    return (CONFIG.get("audio") or {}).get("sample_rate", 44100)
+
+
+def parse_timeline(entries):
+    """
+    Parse ``"SECONDS:name=value,name=value"`` entries into a timeline.
+
+    Returns ``(seconds, {name: value})`` pairs sorted by time.
+    """
+    timeline = []
+    for entry in entries:
+        seconds, _, assignments = entry.partition(":")
+        controls = {}
+        for assignment in filter(None, assignments.split(",")):
+            name, _, value = assignment.partition("=")
+            controls[name.strip()] = float(value)
+        timeline.append((float(seconds), controls))
+    return sorted(timeline, key=lambda item: item[0])
+
+
+def new_score(channels=2):
+    return supriya.Score(output_bus_channel_count=channels)
+
+
+def timeline_score(synthdef, timeline, duration, channels=2):
+    """Score playing one ``synthdef`` synth, updated along ``timeline``"""
+    score = new_score(channels)
+    # Everything due at or before the start, later entries winning
+    initial = {}
+    for seconds, controls in sorted(timeline, key=lambda item: item[0]):
+        if seconds <= 0:
+            initial.update(controls)
+    with score.at(0):
+        score.add_synthdefs(synthdef)
+        synth = score.add_synth(synthdef, **initial)
+    for seconds, controls in timeline:
+        if seconds <= 0:
+            continue
+        with score.at(seconds):
+            synth.set(**controls)
+    with score.at(duration):
+        synth.free()
+    return score
+
+
+def render_score(score, output_path, duration):
+    """Render ``score`` to ``output_path``; the format follows its suffix"""
+    output_path = Path(output_path)
+    header_format = HEADER_FORMATS.get(output_path.suffix.lower())
+    if header_format is None:
+        raise RenderFailed(
+            f"Unsupported output format {output_path.suffix!r}; "
+            f"use one of {', '.join(HEADER_FORMATS)}."
+        )
+    # Fail fast with a readable error when scsynth isn't installed
+    supriya.scsynth.find()
+    with score.at(duration):
+        score.do_nothing()
+    path, exit_code = supriya.render(
+        score,
+        output_file_path=output_path,
+        duration=duration,
+        header_format=header_format,
+        sample_rate=sample_rate(),
+    )
+    if exit_code != 0 or path is None:
+        raise RenderFailed(f"scsynth exited with code {exit_code} while rendering.")
+    return path
+
+
+def render_preview_file(synthdef, timeline, output_path, duration):
+    """Render one synth with the NumPy preview engine instead of scsynth"""
+    from .preview import PreviewError, render_preview, write_wav
+
+    output_path = Path(output_path)
+    if output_path.suffix.lower() != ".wav":
+        raise RenderFailed("Previews can only be written as .wav files.")
+    try:
+        audio = render_preview(synthdef, duration, timeline, sample_rate=sample_rate())
+    except PreviewError as e:
+        raise RenderFailed(f"Preview failed: {e}")
+    write_wav(output_path, audio, sample_rate())
+    return output_path
@@ -0,0 +1,178 @@
+"""
+Sample library with lazily loaded buffers.
+
+SuperDirt loads every sample bank into buffers before it plays anything, so
+startup time and server memory grow with the collection. ``SampleIndex``
+instead reads only the WAV headers of a SuperDirt-style folder
+(``NAME/*.wav``), once, and keeps paths, lengths and channel counts in a
+JSON index under the cache directory; folders whose modification time
+hasn't changed are not scanned again.
+
+``SampleLibrary`` loads a sample with ``/b_allocRead`` the first time it is
+played and keeps loaded buffers in least-recently-used order. When more than
+``max_buffers`` buffers or ``max_megabytes`` of sample data are loaded, the
+least recently used are freed, except those that may still be playing.
+"""
+
+import hashlib
+import json
+import logging
+import time
+import wave
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+from .config import CACHE_DIR, CONFIG
+
+
+class Sample(NamedTuple):
+    path: str
+    frames: int
+    channels: int
+    sample_rate: int
+
+    @property
+    def duration(self):
+        return self.frames / self.sample_rate
+
+    @property
+    def size(self):
+        """Bytes of server memory when loaded; scsynth stores 32-bit floats"""
+        return self.frames * self.channels * 4
+
+
+class SampleIndex:
+    """Sample folders by name, read from WAV headers and cached on disk"""
+
+    def __init__(self, directory, cache_directory=None):
+        self.directory = Path(directory).expanduser().resolve()
+        key = hashlib.sha1(str(self.directory).encode("utf-8")).hexdigest()[:16]
+        self.path = Path(cache_directory or Path(CACHE_DIR) / "samples") / f"{key}.json"
+        self.banks = {}
+        self.scanned = 0
+
+    def load(self):
+        """Read the cached index and rescan the folders that changed"""
+        try:
+            cached = json.loads(self.path.read_text())["folders"]
+        except (FileNotFoundError, ValueError, KeyError):
+            cached = {}
+        folders = {}
+        for folder in sorted(self.directory.iterdir()):
+            if not folder.is_dir():
+                continue
+            mtime = folder.stat().st_mtime
+            entry = cached.get(folder.name)
+            if entry is None or entry["mtime"] != mtime:
+                entry = {"mtime": mtime, "samples": _scan(folder)}
+                self.scanned += 1
+            # Kept even without usable samples, so it isn't rescanned next time
+            folders[folder.name] = entry
+        if self.scanned or folders.keys() != cached.keys():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(
+                json.dumps({"directory": str(self.directory), "folders": folders})
+            )
+        self.banks = {
+            name: [Sample(*sample) for sample in entry["samples"]]
+            for name, entry in folders.items()
+            if entry["samples"]
+        }
+        return self
+
+    def __len__(self):
+        return sum(map(len, self.banks.values()))
+
+
+def _scan(folder):
+    samples = []
+    for path in sorted(folder.glob("*.wav")):
+        try:
+            with wave.open(str(path)) as file:
+                sample = Sample(
+                    str(path),
+                    file.getnframes(),
+                    file.getnchannels(),
+                    file.getframerate(),
+                )
+        except (OSError, wave.Error, EOFError) as e:
+            logging.warning(f"Skipping sample {path}: {e}")
+            continue
+        if sample.channels > 2:
+            logging.warning(f"Skipping sample {path}: {sample.channels} channels")
+            continue
+        samples.append(sample)
+    return samples
+
+
+class SampleLibrary:
+    """Buffers for an index's samples, loaded on first use, LRU-evicted"""
+
+    def __init__(self, server, index, max_buffers=None, max_megabytes=None):
+        settings = CONFIG.get("samples") or {}
+        self.server = server
+        self.index = index
+        self.max_buffers = max_buffers or settings.get("max_buffers", 1024)
+        self.max_bytes = (max_megabytes or settings.get("max_megabytes", 256)) * 2**20
+        # Seconds a buffer stays protected beyond the sample's own length,
+        # covering scheduling latency and slowed-down playback
+        self.margin = settings.get("margin", 2.0)
+
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+        self.loaded_bytes = 0
+        # (name, n) -> [buffer, sample, busy until], least recently used first
+        self._loaded = OrderedDict()
+
+    def __contains__(self, name):
+        return name in self.index.banks
+
+    def get(self, name, n=0):
+        """``(buffer_id, channel_count)`` of sample ``n`` in ``name``, or None"""
+        bank = self.index.banks.get(name)
+        if not bank:
+            return None
+        key = (name, n % len(bank))
+        entry = self._loaded.get(key)
+        if entry is None:
+            sample = bank[key[1]]
+            self._evict(sample.size)
+            entry = self._loaded[key] = [
+                self.server.add_buffer(file_path=sample.path),
+                sample,
+                0.0,
+            ]
+            self.loaded_bytes += sample.size
+            self.loads += 1
+        else:
+            self._loaded.move_to_end(key)
+            self.hits += 1
+        buffer, sample, _ = entry
+        entry[2] = time.monotonic() + sample.duration + self.margin
+        return int(buffer), sample.channels
+
+    def _evict(self, incoming):
+        """Free least recently used buffers until ``incoming`` bytes fit"""
+        now = time.monotonic()
+        for key in list(self._loaded):
+            if (
+                len(self._loaded) < self.max_buffers
+                and self.loaded_bytes + incoming <= self.max_bytes
+            ):
+                return
+            buffer, sample, busy_until = self._loaded[key]
+            if busy_until > now:
+                # Possibly still playing; over budget until it's done
+                continue
+            del self._loaded[key]
+            buffer.free()
+            self.loaded_bytes -= sample.size
+            self.evictions += 1
+
+    def free(self):
+        for buffer, _, _ in self._loaded.values():
+            buffer.free()
+        self._loaded.clear()
+        self.loaded_bytes = 0
@@ -0,0 +1,223 @@
+"""
+Lookahead scheduler sending timestamped OSC bundles.
+
+Sleeping between requests puts Python's wake-up jitter straight into the
+audio. ``Scheduler`` instead wakes up a little ahead of each event (the
+lookahead window) and sends its requests as a bundle stamped with the exact
+time the event should sound; scsynth then runs it on the right sample,
+however late Python woke up.
+
+Times are given in seconds from the scheduler's start. They are mapped to
+wall-clock timetags and corrected for the server's clock drift, which is
+measured by scheduling a probe group and timing its ``/n_go``.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from .config import CONFIG
+
+
+class ScheduledEvent:
+    """Handle for a callback registered with ``Scheduler.schedule``"""
+
+    def __init__(self, seconds, callback, args):
+        self.seconds = seconds
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class _Moment:
+    """``async with scheduler.at(seconds)``: wait, then bundle at a timetag"""
+
+    def __init__(self, scheduler, seconds):
+        self.scheduler = scheduler
+        self.seconds = seconds
+        self._moment = None
+
+    async def __aenter__(self):
+        await self.scheduler.sleep_until(self.seconds)
+        self._moment = self.scheduler.moment(self.seconds)
+        return self._moment.__enter__()
+
+    async def __aexit__(self, *args):
+        self._moment.__exit__(*args)
+
+
+class Scheduler:
+    """Schedule server requests on a timeline, sent ahead as timed bundles"""
+
+    def __init__(self, server, lookahead=None, probe_interval=None):
+        settings = CONFIG.get("scheduler") or {}
+        self.server = server
+        self.lookahead = lookahead or settings.get("lookahead", 0.2)
+        self.probe_interval = probe_interval or settings.get("probe_interval", 5.0)
+        # Seconds the server runs behind our clock, smoothed over probes
+        self.offset = 0.0
+        self.probes = 0
+        self.origin = None
+        self.dispatched = 0
+        self.late = 0
+        self.max_lateness = 0.0
+
+        self._events = []
+        self._counter = itertools.count()
+        self._wakeup = None
+        self._tasks = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    async def start(self):
+        """Start the timeline; time 0 is one lookahead window from now"""
+        self.origin = time.time() + self.lookahead
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run())]
+        if self.probe_interval:
+            self._tasks.append(asyncio.create_task(self._probe_loop()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    @property
+    def now(self):
+        """Current position on the timeline, in seconds"""
+        return time.time() - self.origin
+
+    def timestamp(self, seconds):
+        """Wall-clock timetag at which the server should act on ``seconds``"""
+        return self.origin + seconds - self.offset
+
+    def moment(self, seconds):
+        """``server.at`` context whose requests are stamped for ``seconds``"""
+        lateness = time.time() - self.timestamp(seconds)
+        self.dispatched += 1
+        if lateness > 0:
+            self.late += 1
+            self.max_lateness = max(self.max_lateness, lateness)
+        return self._timed(seconds)
+
+    def _timed(self, seconds):
+        # Server.at adds its own latency to the timestamp it is given
+        return self.server.at(self.timestamp(seconds) - self.server.latency)
+
+    def at(self, seconds):
+        """Async context manager bundling its requests for ``seconds``"""
+        return _Moment(self, seconds)
+
+    async def sleep_until(self, seconds, lookahead=True):
+        """Sleep until ``seconds``, or until its lookahead window opens"""
+        target = self.origin + seconds - (self.lookahead if lookahead else 0.0)
+        delay = target - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def schedule(self, seconds, callback, *args):
+        """
+        Call ``callback(*args)`` inside a moment for ``seconds``.
+
+        It runs once the lookahead window reaches ``seconds``, so any
+        requests it makes are sent ahead of time as one timed bundle.
+        """
+        event = ScheduledEvent(seconds, callback, args)
+        heapq.heappush(self._events, (seconds, next(self._counter), event))
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return event
+
+    async def _run(self):
+        while True:
+            horizon = self.now + self.lookahead
+            while self._events and self._events[0][0] <= horizon:
+                seconds, _, event = heapq.heappop(self._events)
+                if event.cancelled:
+                    continue
+                try:
+                    with self.moment(seconds):
+                        event.callback(*event.args)
+                except Exception as e:
+                    logging.warning(f"Scheduled event at {seconds:.3f} s failed: {e}")
+            self._wakeup.clear()
+            if self._events:
+                delay = self._events[0][0] - self.lookahead - self.now
+            else:
+                delay = None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _probe_loop(self):
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                logging.warning(f"Server clock probe failed: {e}")
+            await asyncio.sleep(self.probe_interval)
+
+    async def probe(self, timeout=1.0):
+        """
+        Measure how late the server acts on timetags and update the correction.
+
+        A group is created in a bundle stamped for a known time; the ``/n_go``
+        it triggers, minus half a ``/sync`` round trip, shows when the server
+        actually ran the bundle.
+        """
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        await loop.run_in_executor(None, self.server.sync)
+        one_way = (time.perf_counter() - start) / 2
+
+        received = loop.create_future()
+        expected = {}
+
+        def on_n_go(message):
+            arrived = time.time()
+            if message.contents[0] == expected.get("node_id"):
+                loop.call_soon_threadsafe(_resolve, received, arrived)
+
+        callback = self.server.register_osc_callback(
+            pattern=["/n_go"], procedure=on_n_go
+        )
+        seconds = self.now + self.lookahead
+        group = None
+        try:
+            # The bundle is only sent when the block exits, after the ID is known
+            with self._timed(seconds):
+                group = self.server.add_group()
+                expected["node_id"] = int(group)
+            arrived = await asyncio.wait_for(received, self.lookahead + timeout)
+        finally:
+            self.server.unregister_osc_callback(callback)
+            # Freed even if the /n_go never came, so failed probes don't
+            # leave groups behind
+            if group is not None:
+                with self.server.at():
+                    group.free()
+
+        # What is left over after the current correction was applied
+        residual = arrived - one_way - (self.origin + seconds)
+        # Trust the first measurement fully, then smooth out network jitter;
+        # the real drift changes slowly
+        self.offset += residual if not self.probes else 0.3 * residual
+        self.probes += 1
+        return residual
+
+
+def _resolve(future, value):
+    if not future.done():
+        future.set_result(value)
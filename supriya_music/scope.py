@@ -0,0 +1,364 @@
+"""
+Oscilloscope and spectrum of the server's output for the Qt controllers.
+
+scsynth's own scopes work through shared memory that only sclang can read,
+so ``ScopeTap`` runs a ``scope_tap`` synth at the tail of the root node. It
+writes a mono mix of the main outputs round a server buffer and puts its
+write position on a control bus.
+
+``ScopeReader`` pulls from that buffer on a background thread over a socket
+of its own. Each poll asks for the write position with ``/c_get`` and for
+the frames written since with ``/b_getn``, in pieces that fit scsynth's
+replies, and decodes the replies straight into a NumPy ring buffer. New
+audio is cut into overlapping windows that go through one batched ``rfft``
+per poll, and their magnitudes are smoothed into the current spectrum.
+
+``ScopeWidget`` repaints from a timer at the display's refresh rate,
+independent of how often data arrives, and only copies the latest waveform
+and spectrum out of the reader, so the GUI thread never waits on the
+network. Everything touched per frame is allocated up front, down to the
+``QPolygonF``s drawn, whose points are written through NumPy views.
+"""
+
+import logging
+import socket
+import struct
+import threading
+
+import numpy as np
+from PyQt6.QtCore import QPointF, Qt, QTimer
+from PyQt6.QtGui import QColor, QPainter, QPen, QPolygonF
+from PyQt6.QtWidgets import QWidget
+
+from .config import CONFIG
+from .synthdefs import registry
+
+# Most values per /b_getn. scsynth answers in one UDP datagram, which has
+# room for about 16000 (see buffers.CHUNK), but a poll rarely has more
+# than this many new frames and smaller replies decode sooner
+GETN_CHUNK = 1024
+
+
+class ScopeTap:
+    """The ``scope_tap`` synth and the buffer and bus it writes"""
+
+    def __init__(self, server, frame_count=None, in_bus=0):
+        settings = CONFIG.get("scope") or {}
+        self.server = server
+        self.frame_count = frame_count or settings.get("buffer_frames", 8192)
+        self.in_bus = in_bus
+        self.buffer = None
+        self.phase_bus = None
+        self.synth = None
+
+    def start(self):
+        """Start the tap; returns without waiting for the server"""
+        self.phase_bus = self.server.add_bus()
+        with self.server.at():
+            self.buffer = self.server.add_buffer(
+                channel_count=1, frame_count=self.frame_count
+            )
+            # The synth is the allocation's completion message, so it only
+            # starts writing once the buffer exists
+            with self.buffer.completion:
+                # After everything else, so it hears every synth's output
+                self.synth = self.server.root_node.add_synth(
+                    registry["scope_tap"],
+                    add_action="ADD_TO_TAIL",
+                    in_bus=self.in_bus,
+                    buffer_id=int(self.buffer),
+                    phase_bus=int(self.phase_bus),
+                )
+        return self
+
+    def stop(self):
+        with self.server.at():
+            self.synth.free()
+            self.buffer.free()
+        self.phase_bus.free()
+
+
+class ScopeReader:
+    """Background poller keeping the tap's latest audio and its spectrum"""
+
+    def __init__(self, tap, fft_size=None, scope_frames=1024, poll_rate=None):
+        settings = CONFIG.get("scope") or {}
+        self.tap = tap
+        self.size = tap.frame_count
+        self.fft_size = fft_size or settings.get("fft_size", 2048)
+        self.scope_frames = min(scope_frames, self.size)
+        self.hop = self.fft_size // 2
+        self.interval = 1.0 / (poll_rate or settings.get("poll_rate", 60))
+        self.smoothing = settings.get("smoothing", 0.6)
+        self.sample_rate = tap.server.options.sample_rate or (
+            CONFIG.get("audio") or {}
+        ).get("sample_rate", 44100)
+        if self.fft_size > self.size:
+            raise ValueError(
+                f"fft_size {self.fft_size} is larger than the tap's "
+                f"{self.size}-frame buffer"
+            )
+
+        # Incremented whenever new audio has been read
+        self.generation = 0
+        self.polls = 0
+        self.timeouts = 0
+
+        # The tap's buffer, written twice over so any window is one slice
+        self._ring = np.zeros(2 * self.size, dtype=np.float32)
+        self._head = None
+        self._unanalysed = 0
+        # Room for every window that one buffer's worth of new audio holds
+        self._max_batch = (self.size - self.fft_size) // self.hop + 1
+        self._window = np.hanning(self.fft_size).astype(np.float32)
+        # Amplitude of a full-scale sine's bin
+        self._window /= self._window.sum() / 2
+        self._windowed = np.zeros((self._max_batch, self.fft_size), np.float32)
+        self._spectra = np.zeros(
+            (self._max_batch, self.fft_size // 2 + 1), np.complex64
+        )
+        self._magnitudes = np.zeros(self._spectra.shape, np.float32)
+        self._batch = np.zeros(self.fft_size // 2 + 1, np.float32)
+        self._spectrum = np.zeros(self.fft_size // 2 + 1, np.float32)
+
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._socket = None
+        self._target = None
+        self._receive_buffer = bytearray(65536)
+        self._c_get = _message(b"/c_get", b",i", struct.pack(">i", int(tap.phase_bus)))
+
+    @property
+    def bin_count(self):
+        return self.fft_size // 2 + 1
+
+    def start(self):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.settimeout(max(self.interval * 4, 0.1))
+        self._target = (
+            self.tap.server.options.ip_address,
+            self.tap.server.options.port,
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="ScopeReader", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        if self._socket is not None:
+            self._socket.close()
+
+    def read(self, waveform, spectrum):
+        """Copy the newest samples and the spectrum out; returns the generation"""
+        with self._lock:
+            if self._head is not None:
+                start = (self._head - len(waveform)) % self.size
+                np.copyto(waveform, self._ring[start : start + len(waveform)])
+            np.copyto(spectrum, self._spectrum)
+            return self.generation
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self._poll()
+            except socket.timeout:
+                # A lost reply: the next poll asks again from the same place
+                self.timeouts += 1
+            except OSError as e:
+                if not self._stopped.is_set():
+                    logging.warning(f"Scope stopped reading: {e}")
+                return
+            self._stopped.wait(self.interval)
+
+    def _poll(self):
+        self.polls += 1
+        self._socket.sendto(self._c_get, self._target)
+        head = int(self._receive(b"/c_set")) % self.size
+        if self._head is None:
+            with self._lock:
+                self._head = head
+            return
+        count = (head - self._head) % self.size
+        if not count:
+            return
+        start = self._head
+        if count > self.size // 2:
+            # Fell far behind; skip ahead rather than read audio being overwritten
+            count = self.size // 4
+            start = (head - count) % self.size
+        pieces = []
+        offset, remaining = start, count
+        while remaining:
+            length = min(remaining, GETN_CHUNK, self.size - offset)
+            pieces.append(
+                _message(
+                    b"/b_getn",
+                    b",iii",
+                    struct.pack(">iii", int(self.tap.buffer), offset, length),
+                )
+            )
+            offset = (offset + length) % self.size
+            remaining -= length
+        for piece in pieces:
+            self._socket.sendto(piece, self._target)
+        for _ in pieces:
+            self._receive(b"/b_setn")
+        with self._lock:
+            self._head = head
+            self._analyse(count)
+            self.generation += 1
+
+    def _receive(self, address):
+        """Wait for a reply to ``address``; ``/b_setn`` goes into the ring"""
+        while True:
+            size = self._socket.recv_into(self._receive_buffer)
+            data = memoryview(self._receive_buffer)[:size]
+            if data[: len(address)] != address or data[len(address)] != 0:
+                continue
+            if address == b"/c_set":
+                # ",if" then bus index and value
+                return struct.unpack_from(">f", data, 16)[0]
+            # ",iii" and a tag per value, then a NUL and padding to four bytes
+            offset = (self._receive_buffer.find(b"\0", 8, size) // 4 + 1) * 4
+            _, start, count = struct.unpack_from(">iii", data, offset)
+            values = np.frombuffer(data, ">f4", count, offset + 12)
+            self._ring[start : start + count] = values
+            self._ring[start + self.size : start + self.size + count] = values
+            return count
+
+    def _analyse(self, count):
+        """FFT every complete hop of new audio in one batch; call with the lock held"""
+        self._unanalysed += count
+        batch = min(self._unanalysed // self.hop, self._max_batch)
+        if not batch:
+            return
+        # Windows end at the newest whole hop, each a hop after the last
+        last_end = self._head - self._unanalysed % self.hop
+        self._unanalysed %= self.hop
+        span = self.fft_size + self.hop * (batch - 1)
+        start = (last_end - span) % self.size
+        frames = np.lib.stride_tricks.sliding_window_view(
+            self._ring[start : start + span], self.fft_size
+        )[:: self.hop]
+        windowed = self._windowed[:batch]
+        np.multiply(frames, self._window, out=windowed)
+        np.fft.rfft(windowed, axis=1, out=self._spectra[:batch])
+        np.abs(self._spectra[:batch], out=self._magnitudes[:batch])
+        np.mean(self._magnitudes[:batch], axis=0, out=self._batch)
+        self._spectrum *= self.smoothing
+        self._batch *= 1 - self.smoothing
+        self._spectrum += self._batch
+
+
+def _message(address, tags, arguments):
+    """Encode an OSC message from pre-packed arguments"""
+    return b"".join(
+        (
+            address + b"\0" * (4 - len(address) % 4),
+            tags + b"\0" * (4 - len(tags) % 4),
+            arguments,
+        )
+    )
+
+
+def _polygon(count):
+    """A ``QPolygonF`` of ``count`` points and an (x, y) NumPy view of them"""
+    polygon = QPolygonF([QPointF(0, 0)] * count)
+    pointer = polygon.data()
+    pointer.setsize(count * 2 * 8)
+    return polygon, np.frombuffer(pointer, np.float64).reshape(count, 2)
+
+
+class ScopeWidget(QWidget):
+    """Waveform above, log-frequency spectrum below, redrawn every display frame"""
+
+    # Spectrum range drawn, in dB relative to full scale
+    FLOOR_DB = -96.0
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(180)
+        self.reader = None
+        self._generation = -1
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._refresh)
+        self._wave_pen = QPen(QColor("#2E86AB"), 1.2)
+        self._spectrum_pen = QPen(QColor("#F18F01"), 1.2)
+
+    def attach(self, reader):
+        """Start drawing ``reader``'s data; allocates everything up front"""
+        self.reader = reader
+        self._waveform = np.zeros(reader.scope_frames, np.float32)
+        self._spectrum = np.zeros(reader.bin_count, np.float32)
+        self._levels = np.zeros(reader.bin_count - 1, np.float64)
+        self._wave_polygon, self._wave_points = _polygon(reader.scope_frames)
+        self._spectrum_polygon, self._spectrum_points = _polygon(reader.bin_count - 1)
+        self._generation = -1
+        self._layout()
+        screen = self.screen()
+        refresh_rate = screen.refreshRate() if screen is not None else 0
+        self._timer.start(round(1000 / (refresh_rate or 60)))
+
+    def detach(self):
+        self._timer.stop()
+        self.reader = None
+        self.update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.reader is not None:
+            self._layout()
+            self._generation = -1
+
+    def _layout(self):
+        """X coordinates for the current size; they only change on resize"""
+        width = self.width()
+        self._wave_points[:, 0] = np.linspace(0, width, len(self._wave_points))
+        # Bins from the first above DC, on a log scale up to Nyquist
+        bins = np.arange(1, self.reader.bin_count)
+        self._spectrum_points[:, 0] = np.log(bins) / np.log(bins[-1]) * width
+
+    def _refresh(self):
+        generation = self.reader.read(self._waveform, self._spectrum)
+        if generation == self._generation:
+            return
+        self._generation = generation
+        half = self.height() / 2
+        # Waveform: -1..1 across the top half
+        y = self._wave_points[:, 1]
+        np.multiply(self._waveform, -half / 2, out=y)
+        y += half / 2
+        # Spectrum: FLOOR_DB..0 dB across the bottom half
+        levels = self._levels
+        np.maximum(self._spectrum[1:], 1e-9, out=levels)
+        np.log10(levels, out=levels)
+        levels *= 20 / self.FLOOR_DB
+        np.clip(levels, 0, 1, out=levels)
+        y = self._spectrum_points[:, 1]
+        np.multiply(levels, half, out=y)
+        y += half
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#1E1E1E"))
+        if self.reader is None:
+            painter.setPen(QColor("#888"))
+            painter.drawText(
+                self.rect(), Qt.AlignmentFlag.AlignCenter, "Scope: waiting for server"
+            )
+            return
+        painter.setPen(QColor("#333"))
+        half = self.height() // 2
+        painter.drawLine(0, half, self.width(), half)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(self._wave_pen)
+        painter.drawPolyline(self._wave_polygon)
+        painter.setPen(self._spectrum_pen)
+        painter.drawPolyline(self._spectrum_polygon)
@@ -0,0 +1,255 @@
+"""
+Server health over time.
+
+``/status`` answers with scsynth's average and peak CPU load, its UGen,
+synth, group and SynthDef counts and its nominal and actual sample rates,
+but only as a snapshot. ``StatusPoller`` asks for one at a fixed rate from
+a background thread, over a socket of its own so it takes no client login,
+and keeps the last ``history`` samples in a ring. Subscribers are called
+with each new sample on the poller's thread; the Qt controllers pass them
+on to the GUI thread through a signal.
+
+``/status`` doesn't count late bundles; scsynth only prints ``late ...`` on
+its output. When this process booted the server, ``count_late`` reads that
+output so samples carry a running count of late bundles; otherwise it is
+None.
+
+``level`` grades the latest sample against the ``warn_cpu`` and
+``overload_cpu`` thresholds, and calls it an overload for ``late_window``
+seconds after any late bundle, so trouble shows before audio drops out.
+"""
+
+import logging
+import socket
+import threading
+import time
+from collections import deque
+from typing import NamedTuple, Optional
+
+from rich.table import Table
+from supriya.contexts.responses import StatusInfo
+from supriya.osc import OscMessage
+
+from .config import CONFIG
+
+LEVEL_STYLES = {"ok": "green", "warn": "yellow", "overload": "bold red"}
+
+SPARKS = "▁▂▃▄▅▆▇█"
+
+
+class StatusSample(NamedTuple):
+    time: float
+    round_trip: float
+    average_cpu: float
+    peak_cpu: float
+    ugens: int
+    synths: int
+    groups: int
+    synthdefs: int
+    target_sample_rate: float
+    actual_sample_rate: float
+    late: Optional[int]
+
+
+class _LateCounter:
+    """Takes the place of a supriya output capture, counting late bundles"""
+
+    def __init__(self):
+        self.count = 0
+
+    def capture(self, line):
+        if line.startswith("late "):
+            self.count += 1
+
+
+class StatusPoller:
+    """Background ``/status`` sampling into a fixed-size history"""
+
+    def __init__(self, ip_address="127.0.0.1", port=57110, interval=None, history=None):
+        settings = CONFIG.get("status") or {}
+        self.ip_address = ip_address
+        self.port = port
+        self.interval = interval or settings.get("interval", 0.5)
+        self.warn_cpu = settings.get("warn_cpu", 70)
+        self.overload_cpu = settings.get("overload_cpu", 90)
+        # Seconds a late bundle keeps the level at "overload"
+        self.late_window = settings.get("late_window", 5.0)
+        self.samples = deque(maxlen=history or settings.get("history", 600))
+        self.missed = 0
+
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._socket = None
+        self._late = None
+        self._protocol = None
+
+    @classmethod
+    def for_server(cls, server, **kwargs):
+        """A poller for ``server``, counting late bundles if it can"""
+        poller = cls(server.options.ip_address, server.options.port, **kwargs)
+        poller.count_late(server)
+        return poller
+
+    def count_late(self, server):
+        """Count late bundles from scsynth's output; only when we booted it"""
+        if not server.is_owner:
+            return False
+        self._late = _LateCounter()
+        self._protocol = server._process_protocol
+        self._protocol.captures.add(self._late)
+        return True
+
+    def start(self):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.settimeout(max(self.interval, 0.25))
+        self._thread = threading.Thread(
+            target=self._run, name="StatusPoller", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        if self._socket is not None:
+            self._socket.close()
+        if self._protocol is not None:
+            self._protocol.captures.discard(self._late)
+
+    def subscribe(self, callback):
+        """Call ``callback(sample)`` on the poller's thread for every sample"""
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers.remove(callback)
+
+    @property
+    def latest(self):
+        with self._lock:
+            return self.samples[-1] if self.samples else None
+
+    def series(self, field, count=None):
+        """One field of the last ``count`` samples, oldest first"""
+        with self._lock:
+            samples = list(self.samples)
+        return [getattr(sample, field) for sample in samples[-(count or 0) :]]
+
+    def level(self):
+        """Grade the latest sample as "ok", "warn" or "overload"; None before any"""
+        with self._lock:
+            if not self.samples:
+                return None
+            latest = self.samples[-1]
+            # The newest sample from before the window, or else the oldest
+            baseline = self.samples[0]
+            for sample in reversed(self.samples):
+                if sample.time < latest.time - self.late_window:
+                    baseline = sample
+                    break
+        if latest.late is not None and latest.late > baseline.late:
+            return "overload"
+        if latest.peak_cpu >= self.overload_cpu:
+            return "overload"
+        if latest.peak_cpu >= self.warn_cpu:
+            return "warn"
+        return "ok"
+
+    def _run(self):
+        request = OscMessage("/status").to_datagram()
+        while not self._stopped.is_set():
+            started = time.perf_counter()
+            try:
+                self._socket.sendto(request, (self.ip_address, self.port))
+                sample = self._receive(started)
+            except socket.timeout:
+                self.missed += 1
+            except OSError as e:
+                if not self._stopped.is_set():
+                    logging.warning(f"Status polling stopped: {e}")
+                return
+            else:
+                with self._lock:
+                    self.samples.append(sample)
+                    subscribers = list(self._subscribers)
+                for callback in subscribers:
+                    try:
+                        callback(sample)
+                    except Exception as e:
+                        logging.warning(f"Status subscriber failed: {e}")
+            elapsed = time.perf_counter() - started
+            self._stopped.wait(max(0.0, self.interval - elapsed))
+
+    def _receive(self, started):
+        while True:
+            datagram = self._socket.recv(65536)
+            message = OscMessage.from_datagram(datagram)
+            if message.address != "/status.reply":
+                continue
+            info = StatusInfo.from_osc(message)
+            return StatusSample(
+                time=time.time(),
+                round_trip=time.perf_counter() - started,
+                average_cpu=info.average_cpu_usage,
+                peak_cpu=info.peak_cpu_usage,
+                ugens=info.ugen_count,
+                synths=info.synth_count,
+                groups=info.group_count,
+                synthdefs=info.synthdef_count,
+                target_sample_rate=info.target_sample_rate,
+                actual_sample_rate=info.actual_sample_rate,
+                late=self._late.count if self._late is not None else None,
+            )
+
+
+def sparkline(values, maximum=100.0):
+    """Unicode bars for ``values`` between 0 and ``maximum``"""
+    top = len(SPARKS) - 1
+    return "".join(
+        SPARKS[min(top, max(0, round(value / maximum * top)))] for value in values
+    )
+
+
+def status_table(poller, width=60):
+    """A rich table of the poller's latest sample and its recent peak CPU"""
+    table = Table(show_header=False)
+    table.add_row("Server", f"{poller.ip_address}:{poller.port}")
+    sample = poller.latest
+    if sample is None:
+        table.add_row("Health", "[red]no reply yet[/red]")
+        return table
+    level = poller.level()
+    style = LEVEL_STYLES[level]
+    peaks = poller.series("peak_cpu", width)
+    table.add_row(
+        "CPU (avg/peak)",
+        f"[{style}]{sample.average_cpu:.1f}% / {sample.peak_cpu:.1f}%[/{style}]",
+    )
+    table.add_row(
+        "Peak CPU history",
+        f"[{style}]{sparkline(peaks)}[/{style}] max {max(peaks):.1f}%",
+    )
+    table.add_row(
+        "UGens / synths / groups",
+        f"{sample.ugens} / {sample.synths} / {sample.groups}",
+    )
+    table.add_row("SynthDefs", str(sample.synthdefs))
+    table.add_row(
+        "Sample rate",
+        f"{sample.actual_sample_rate:.2f} Hz (nominal {sample.target_sample_rate:.0f})",
+    )
+    table.add_row(
+        "Late bundles",
+        str(sample.late)
+        if sample.late is not None
+        else "n/a (server booted elsewhere)",
+    )
+    table.add_row("Round trip", f"{sample.round_trip * 1000:.2f} ms")
+    table.add_row("Samples", f"{len(poller.samples)} ({poller.missed} missed)")
+    table.add_row("Health", f"[{style}]{level}[/{style}]")
+    return table
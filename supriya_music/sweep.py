@@ -0,0 +1,268 @@
+"""
+Parameter sweeps rendered on a process pool.
+
+Every combination of a parameter grid is rendered as its own non-realtime
+job. Each non-realtime scsynth uses one core, so jobs are spread over a
+process pool. Finished jobs are appended to ``manifest.jsonl`` in the output
+directory as they complete. Running the same sweep again skips every job
+the manifest records as rendered with the same SynthDef, duration and
+engine, so an interrupted sweep resumes where it stopped.
+"""
+
+import itertools
+import json
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional
+
+import typer
+from rich.console import Console
+from rich.progress import (
+    BarColumn,
+    MofNCompleteColumn,
+    Progress,
+    TextColumn,
+    TimeRemainingColumn,
+)
+
+console = Console()
+
+
+def parse_grid(entries):
+    """
+    Parse ``name=v1,v2,...`` or ``name=start:stop:step`` entries.
+
+    Returns ``{name: [values]}``; ranges include ``stop`` when a step lands on it.
+    """
+    grid = {}
+    for entry in entries:
+        name, _, values = entry.partition("=")
+        if not values:
+            raise ValueError(f"No values given for {name!r}")
+        if ":" in values:
+            start, stop, step = (float(part) for part in values.split(":"))
+            if step <= 0:
+                raise ValueError(f"Step for {name!r} must be positive")
+            count = int((stop - start) / step + 1e-9) + 1
+            grid[name.strip()] = [round(start + i * step, 9) for i in range(count)]
+        else:
+            grid[name.strip()] = [float(value) for value in values.split(",")]
+    return grid
+
+
+def combinations(grid):
+    """Every assignment of the grid, in a stable order"""
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def job_id(controls):
+    return "_".join(f"{name}={_format(value)}" for name, value in controls.items())
+
+
+def _format(value):
+    """Short form where it reads back exactly, else the full repr"""
+    short = f"{value:g}"
+    return short if float(short) == value else repr(value)
+
+
+def read_manifest(path, settings=None):
+    """
+    Completed jobs recorded in a manifest, keyed by job ID.
+
+    With ``settings``, only jobs rendered with those same settings count.
+    """
+    completed = {}
+    try:
+        with open(path) as manifest:
+            for line in manifest:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A partial line from an interrupted run
+                    continue
+                if record.get("error") is None and (
+                    settings is None or record.get("settings") == settings
+                ):
+                    completed[record["id"]] = record
+    except FileNotFoundError:
+        pass
+    return completed
+
+
+def _ignore_interrupts():
+    # Ctrl-C reaches the whole process group; workers, and the scsynth they
+    # start, leave it to the main process to stop the sweep
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def render_job(synthdef_name, controls, path, duration, preview=False):
+    """Render one combination; runs in a worker process"""
+    from .render import render_preview_file, render_score, timeline_score
+    from .synthdefs import registry
+
+    start = time.perf_counter()
+    synthdef = registry[synthdef_name]
+    if preview:
+        render_preview_file(synthdef, [(0, controls)], path, duration)
+    else:
+        render_score(
+            timeline_score(synthdef, [(0, controls)], duration), path, duration
+        )
+    return time.perf_counter() - start
+
+
+def sweep(
+    synthdef: str = typer.Argument(..., help="SynthDef to render, e.g. sine_test."),
+    param: List[str] = typer.Option(
+        ...,
+        "--param",
+        "-p",
+        help="Grid axis as 'name=v1,v2,...' or 'name=start:stop:step'.",
+    ),
+    output: Optional[Path] = typer.Option(
+        None, "--output", "-o", help="Output directory (default: sweep-SYNTHDEF)."
+    ),
+    duration: float = typer.Option(
+        2.0, "--duration", "-d", help="Seconds rendered per job."
+    ),
+    jobs: int = typer.Option(
+        os.cpu_count() or 1, "--jobs", "-j", help="Worker processes."
+    ),
+    restart: bool = typer.Option(
+        False, "--restart", help="Ignore the manifest and render everything again."
+    ),
+    preview: bool = typer.Option(
+        False, "--preview", help="Render with the NumPy preview engine, no scsynth."
+    ),
+):
+    """Render every combination of a parameter grid in parallel."""
+    from .synthdefs import registry
+
+    if synthdef not in list(registry):
+        console.print(
+            f"[red]Unknown synthdef {synthdef!r}; choose from {', '.join(registry)}.[/red]"
+        )
+        raise typer.Exit(1)
+    if preview:
+        from .preview import PreviewError, PreviewRenderer
+
+        try:
+            # Fails on the first UGen the preview engine can't evaluate
+            PreviewRenderer(registry[synthdef])
+        except PreviewError as e:
+            console.print(f"[red]Can't preview {synthdef}: {e}[/red]")
+            raise typer.Exit(1)
+    try:
+        grid = parse_grid(param)
+    except ValueError as e:
+        console.print(f"[red]Invalid --param: {e}[/red]")
+        raise typer.Exit(1)
+
+    output = output or Path(f"sweep-{synthdef}")
+    output.mkdir(parents=True, exist_ok=True)
+    manifest_path = output / "manifest.jsonl"
+    if restart:
+        manifest_path.unlink(missing_ok=True)
+    # A file only counts as rendered if these match the current run
+    settings = {"synthdef": synthdef, "duration": duration, "preview": preview}
+    completed = read_manifest(manifest_path, settings)
+
+    pending, skipped = [], 0
+    for controls in combinations(grid):
+        identifier = job_id(controls)
+        path = output / f"{identifier}.wav"
+        if identifier in completed and path.exists():
+            skipped += 1
+            continue
+        pending.append((identifier, controls, path))
+    console.print(
+        f"{len(pending) + skipped} combinations, {skipped} already rendered, "
+        f"{len(pending)} to go on {jobs} workers."
+    )
+
+    failures = 0
+    job_seconds = 0.0
+    recorded = 0
+    interrupted = False
+    start = time.perf_counter()
+    with open(manifest_path, "a") as manifest, Progress(
+        TextColumn("[bold blue]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TimeRemainingColumn(),
+        console=console,
+    ) as progress:
+        task = progress.add_task(f"Rendering {synthdef}", total=len(pending))
+
+        def write_record(future):
+            nonlocal failures, job_seconds, recorded
+            identifier, controls, path = futures[future]
+            record = {
+                "id": identifier,
+                "params": controls,
+                "settings": settings,
+                "file": path.name,
+            }
+            try:
+                record["seconds"] = round(future.result(), 4)
+                record["error"] = None
+                job_seconds += record["seconds"]
+            except Exception as e:
+                record["error"] = str(e) or type(e).__name__
+                failures += 1
+            # One line per finished job, flushed so an interrupted sweep resumes
+            manifest.write(json.dumps(record) + "\n")
+            manifest.flush()
+            recorded += 1
+            progress.advance(task)
+
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=_ignore_interrupts
+        ) as executor:
+            futures = {
+                executor.submit(
+                    render_job, synthdef, job[1], job[2], duration, preview
+                ): job
+                for job in pending
+            }
+            remaining = set(futures)
+            try:
+                for future in as_completed(futures):
+                    remaining.discard(future)
+                    write_record(future)
+            except KeyboardInterrupt:
+                interrupted = True
+                progress.console.print(
+                    "Interrupted; finishing the renders already running..."
+                )
+                # Drop queued jobs, but let running ones finish and record
+                # them, rather than rendering files the manifest never sees
+                executor.shutdown(wait=True, cancel_futures=True)
+                for future in remaining:
+                    if future.done() and not future.cancelled():
+                        write_record(future)
+
+    elapsed = time.perf_counter() - start
+    if interrupted:
+        console.print(
+            f"[yellow]Stopped after {recorded} of {len(pending)} jobs; "
+            f"run the same command again to resume.[/yellow]"
+        )
+        raise typer.Exit(130)
+    if pending:
+        console.print(
+            f"Rendered {len(pending) - failures} files in {elapsed:.1f} s "
+            f"({job_seconds:.1f} s of rendering, "
+            f"{job_seconds / elapsed if elapsed else 0:.1f}x parallel speedup)."
+        )
+    console.print(f"Manifest: {manifest_path}")
+    if failures:
+        console.print(
+            f"[red]{failures} jobs failed; see the manifest for errors.[/red]"
+        )
+        raise typer.Exit(1)
@@ -0,0 +1,185 @@
+"""
+The toolkit's SynthDefs and their on-disk compiled cache.
+
+Every SynthDef used by the commands is registered here. Compiled
+``.scsyndef`` files live in a cache directory, keyed by a hash of the
+definition's source and the supriya version, so a definition is only
+rebuilt when it changes. scsynth is pointed at that directory through
+``SC_SYNTHDEF_PATH`` and loads everything in bulk while booting, instead of
+receiving one ``/d_recv`` per definition; servers that are already running
+get a single ``/d_loadDir``.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from pathlib import Path
+
+import supriya
+from supriya import Envelope, synthdef
+from supriya.ugens import (
+    A2K,
+    Balance2,
+    BufFrames,
+    BufRateScale,
+    BufWr,
+    EnvGen,
+    FreeVerb,
+    In,
+    LFNoise0,
+    LFNoise1,
+    Out,
+    Pan2,
+    Phasor,
+    PlayBuf,
+    SinOsc,
+)
+
+from .config import CACHE_DIR
+
+
+class SynthDefRegistry:
+    """Named SynthDef builders with a compiled on-disk cache"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._builders = {}
+        self._synthdefs = {}
+
+    def register(self, function):
+        """Register a SynthDef builder function under its own name"""
+        self._builders[function.__name__] = function
+        return function
+
+    def __getitem__(self, name):
+        """Return the SynthDef, building its graph on first use only"""
+        if name not in self._synthdefs:
+            self._synthdefs[name] = synthdef()(self._builders[name])
+        return self._synthdefs[name]
+
+    def __iter__(self):
+        return iter(self._builders)
+
+    def key(self, name):
+        """Hash identifying a definition; changes whenever its graph can change"""
+        source = inspect.getsource(self._builders[name])
+        return hashlib.sha1(
+            f"{supriya.__version__}\n{source}".encode("utf-8")
+        ).hexdigest()
+
+    def ensure_cached(self):
+        """Compile stale or missing definitions; return the names rebuilt"""
+        index_path = self.directory / "index.json"
+        try:
+            index = json.loads(index_path.read_text())
+        except (FileNotFoundError, ValueError):
+            index = {}
+        rebuilt = []
+        for name in self._builders:
+            key = self.key(name)
+            path = self.directory / f"{name}.scsyndef"
+            if index.get(name) == key and path.exists():
+                continue
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(self[name].compile())
+            index[name] = key
+            rebuilt.append(name)
+        if rebuilt:
+            index_path.write_text(json.dumps(index, indent=2))
+        return rebuilt
+
+    def prepare_boot(self):
+        """Refresh the cache and have the next scsynth boot load it in bulk"""
+        self.ensure_cached()
+        os.environ["SC_SYNTHDEF_PATH"] = str(self.directory)
+
+    def load(self, server):
+        """Make sure a running server has the cached definitions"""
+        if server.is_owner and os.environ.get("SC_SYNTHDEF_PATH") == str(
+            self.directory
+        ):
+            # Already loaded from SC_SYNTHDEF_PATH while booting
+            return
+        self.ensure_cached()
+        server.load_synthdefs_directory(self.directory)
+        server.sync()
+
+
+registry = SynthDefRegistry(Path(CACHE_DIR) / "synthdefs")
+
+
+@registry.register
+def simple_sine(frequency=440, amplitude=0.1, gate=1, out=0, send=0, send_level=0):
+    sine = SinOsc.ar(frequency=frequency) * amplitude
+    envelope = EnvGen.kr(envelope=Envelope.adsr(), gate=gate, done_action=2)
+    signal = [sine * envelope] * 2
+    Out.ar(bus=out, source=signal)
+    # Post-fader send to a mixer effect bus; see mixer.py
+    Out.ar(bus=send, source=[channel * send_level for channel in signal])
+
+
+@registry.register
+def sine_synth(amplitude=0.1, frequency=440):
+    sine = SinOsc.ar(frequency=frequency)
+    scaled_sine = sine * amplitude
+    Out.ar(bus=0, source=scaled_sine)
+
+
+@registry.register
+def sine_test(noise_hz=8, amp_noise_hz=12, note_offset=50):
+    note = ((LFNoise0.kr(frequency=noise_hz) + 1) * 8) + note_offset
+    freq = note.midi_to_hz()
+    amp = LFNoise1.kr(frequency=amp_noise_hz) * 0.01 + 0.02
+    sig = SinOsc.ar(frequency=[freq, freq * 2]) * amp
+    Out.ar(bus=0, source=sig)
+
+
+# Sample players for the dirt receiver; pan runs from 0 (left) to 1 (right)
+@registry.register
+def dirt_sample_1(buffer_id=0, rate=1, amplitude=0.4, pan=0.5):
+    sample = PlayBuf.ar(
+        channel_count=1,
+        buffer_id=buffer_id,
+        rate=BufRateScale.kr(buffer_id=buffer_id) * rate,
+        done_action=2,
+    )
+    Out.ar(bus=0, source=Pan2.ar(source=sample * amplitude, position=pan * 2 - 1))
+
+
+@registry.register
+def dirt_sample_2(buffer_id=0, rate=1, amplitude=0.4, pan=0.5):
+    left, right = PlayBuf.ar(
+        channel_count=2,
+        buffer_id=buffer_id,
+        rate=BufRateScale.kr(buffer_id=buffer_id) * rate,
+        done_action=2,
+    )
+    Out.ar(
+        bus=0,
+        source=Balance2.ar(
+            left=left * amplitude, right=right * amplitude, position=pan * 2 - 1
+        ),
+    )
+
+
+# Shared effect for mixer sends: reads a send bus, adds only the wet signal
+@registry.register
+def reverb(in_bus=0, out=0, mix=1, room_size=0.7, damping=0.5):
+    source = In.ar(bus=in_bus, channel_count=2)
+    Out.ar(
+        bus=out,
+        source=FreeVerb.ar(
+            source=source, mix=mix, room_size=room_size, damping=damping
+        ),
+    )
+
+
+# Output tap for the controllers' scope: a mono mix of the main outputs
+# written round a buffer, with the write position on a control bus; see scope.py
+@registry.register
+def scope_tap(in_bus=0, buffer_id=0, phase_bus=0):
+    left, right = In.ar(bus=in_bus, channel_count=2)
+    phase = Phasor.ar(stop=BufFrames.kr(buffer_id=buffer_id))
+    BufWr.ar(source=(left + right) * 0.5, buffer_id=buffer_id, phase=phase)
+    Out.kr(bus=phase_bus, source=A2K.kr(source=phase))
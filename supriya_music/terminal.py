@@ -0,0 +1,138 @@
+"""
+Asynchronous Rich console output for the real-time controllers.
+
+Printing to the terminal from a Qt event handler adds terminal I/O to every
+parameter change. ``AsyncConsole`` moves rendering and writing onto a worker
+thread behind a bounded queue; when the terminal falls behind, messages are
+coalesced by key or dropped, and a summary of the dropped count is printed.
+"""
+
+import functools
+import queue
+import threading
+
+from rich.console import Console
+from rich.panel import Panel
+from rich.syntax import Syntax
+
+
+class AsyncConsole:
+    """Rich console whose rendering and I/O happen on a worker thread"""
+
+    def __init__(self, console=None, maxsize=256):
+        self.console = console or Console()
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name="AsyncConsole", daemon=True
+        )
+        self._thread.start()
+
+    def print(self, *objects, key=None, **kwargs):
+        """
+        Queue objects for printing without blocking the caller.
+
+        Messages sharing a ``key`` replace each other while queued, so only the
+        latest one is printed, e.g. one status line per burst of slider ticks.
+        """
+        self._queue_item("print", (objects, kwargs), key)
+
+    def code_panel(self, title, code, description=None, key=None):
+        """
+        Queue a syntax-highlighted code panel.
+
+        Panels without a ``key`` are static: each is rendered once and the
+        text reused. Panels showing live values pass a ``key`` instead, and
+        are coalesced like ``print``, so a slider drag renders only the
+        latest one.
+        """
+        self._queue_item("panel", (title, code, description, key is None), key)
+
+    def close(self, timeout=2.0):
+        """Flush queued output and stop the worker thread"""
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=timeout)
+
+    def _queue_item(self, kind, payload, key):
+        if key is None:
+            self._put((kind, payload))
+            return
+        key = (kind, key)
+        with self._lock:
+            pending = key in self._latest
+            self._latest[key] = payload
+        if not pending:
+            self._put(("latest", key))
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            if isinstance(item, tuple) and item[0] == "latest":
+                # Forget the key so the next message for it can be queued again
+                with self._lock:
+                    self._latest.pop(item[1], None)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._report_dropped()
+                break
+            try:
+                self._write(*item)
+            except Exception as e:
+                self.console.print(f"[red]❌ Console error: {e}[/red]")
+            if self._queue.empty():
+                self._report_dropped()
+
+    def _report_dropped(self):
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            self.console.print(f"[dim]… {dropped} console messages dropped[/dim]")
+
+    def _write(self, kind, payload):
+        if kind == "print":
+            objects, kwargs = payload
+            self.console.print(*objects, **kwargs)
+        elif kind == "latest":
+            with self._lock:
+                latest = self._latest.pop(payload)
+            self._write(payload[0], latest)
+        elif kind == "panel":
+            title, code, description, static = payload
+            render = _render_static_panel if static else _render_code_panel
+            self.console.file.write(
+                render(self.console, self.console.width, title, code, description)
+            )
+            self.console.file.flush()
+
+
+def _render_code_panel(console, width, title, code, description):
+    """Render a code panel ``width`` columns wide to ANSI text"""
+    with console.capture() as capture:
+        if description:
+            console.print(f"[dim]{description}[/dim]", width=width)
+        syntax = Syntax(code, "python", theme="monokai", line_numbers=True)
+        console.print(
+            Panel(
+                syntax, title=f"📝 {title}", border_style="bright_cyan", padding=(1, 2)
+            ),
+            width=width,
+        )
+        console.print()  # Add spacing
+    return capture.get()
+
+
+# Static panels are few and shown again and again; key includes the width
+# so a resized terminal gets freshly laid out panels
+_render_static_panel = functools.lru_cache(maxsize=64)(_render_code_panel)
@@ -0,0 +1,245 @@
+"""
+Polyphonic voice allocation.
+
+``VoicePool`` plays one SynthDef on a fixed set of node IDs reserved when it
+starts. A note takes a free ID from a deque and sends a single bundle, and
+``/n_end`` notifications hand IDs back, so starting a note costs the same
+however many are sounding.
+
+With ``preallocate``, every voice is instantiated up front, paused and with
+its gate closed; a note then wakes one with ``/n_set`` and ``/n_run``
+instead of building a synth, and a voice that frees itself at the end of its
+release is instantiated again, paused, as soon as its ``/n_end`` arrives.
+
+When every voice is busy one is stolen: the longest-releasing voice if any
+is releasing, otherwise the oldest (``policy="oldest"``) or the one started
+with the lowest ``amplitude`` (``policy="quietest"``).
+"""
+
+import threading
+from collections import Counter, OrderedDict, deque
+
+from supriya.osc import OscBundle, OscMessage
+
+from .daemon import allocate_node_ids
+
+POLICIES = ("oldest", "quietest")
+
+ADD_TO_TAIL = 1
+
+
+class Voice:
+    """One note's claim on a pooled node; stale once the node is stolen"""
+
+    __slots__ = ("node_id", "amplitude")
+
+    def __init__(self, node_id, amplitude):
+        self.node_id = node_id
+        self.amplitude = amplitude
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.node_id})"
+
+
+class VoicePool:
+    """A fixed number of voices of one SynthDef, with voice stealing"""
+
+    def __init__(
+        self,
+        server,
+        synthdef,
+        size=16,
+        target=None,
+        policy="oldest",
+        preallocate=False,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(
+                f"Unknown stealing policy {policy!r}; choose from {', '.join(POLICIES)}"
+            )
+        self.server = server
+        self.synthdef = synthdef
+        self.size = size
+        self.target = int(target if target is not None else server.default_group)
+        self.policy = policy
+        self.preallocate = preallocate
+        self.gated = "gate" in synthdef.parameters
+        self.stolen = 0
+
+        self.node_ids = range(0)
+        self._free = deque()
+        # Occupied voices by node ID, oldest first, and the ones releasing
+        self._voices = OrderedDict()
+        self._releasing = OrderedDict()
+        # /n_end notifications still due for nodes freed and reused at once
+        self._stale = Counter()
+        self._lock = threading.Lock()
+        self._callback = None
+
+    def start(self):
+        first = allocate_node_ids(self.server, self.size)
+        self.node_ids = range(first, first + self.size)
+        self._free.extend(self.node_ids)
+        self._callback = self.server.register_osc_callback(
+            pattern=("/n_end",), procedure=self._on_n_end
+        )
+        if self.preallocate:
+            # Keep each bundle well inside one UDP datagram
+            for i in range(0, self.size, 64):
+                self._send(
+                    [
+                        message
+                        for node_id in self.node_ids[i : i + 64]
+                        for message in self._paused(node_id)
+                    ]
+                )
+            self.server.sync()
+        return self
+
+    def stop(self):
+        """Release every voice and free the idle preallocated nodes"""
+        # First, so voices ending from here on aren't instantiated again
+        self.server.unregister_osc_callback(self._callback)
+        with self._lock:
+            voices = list(self._voices.values())
+        for voice in voices:
+            self.release(voice)
+        with self._lock:
+            if self.preallocate:
+                self._send([OscMessage("/n_free", *self._free)] if self._free else [])
+            self._free.clear()
+
+    @property
+    def active_count(self):
+        return len(self._voices) - len(self._releasing)
+
+    def note_on(self, timestamp=None, **controls):
+        """Start a note, stealing a voice if none is free; returns its ``Voice``"""
+        with self._lock:
+            if not self._free:
+                node_id = self._steal()
+                messages = [
+                    OscMessage("/n_free", node_id),
+                    self._new(node_id, controls),
+                ]
+            elif self.preallocate:
+                node_id = self._free.popleft()
+                messages = self._wake(node_id, controls)
+            else:
+                node_id = self._free.popleft()
+                messages = [self._new(node_id, controls)]
+            voice = self._voices[node_id] = Voice(
+                node_id, float(controls.get("amplitude", 1.0))
+            )
+            self._send(messages, timestamp)
+        return voice
+
+    def release(self, voice, timestamp=None):
+        """Release a note; does nothing if it ended or its voice was stolen"""
+        with self._lock:
+            node_id = voice.node_id
+            if self._voices.get(node_id) is not voice or node_id in self._releasing:
+                return
+            if self.gated:
+                # Back in the pool once the envelope frees the node
+                self._releasing[node_id] = None
+                self._send([OscMessage("/n_set", node_id, "gate", 0)], timestamp)
+                return
+            del self._voices[node_id]
+            if self.preallocate:
+                self._send([OscMessage("/n_run", node_id, 0)], timestamp)
+            else:
+                self._stale[node_id] += 1
+                self._send([OscMessage("/n_free", node_id)], timestamp)
+            self._free.append(node_id)
+
+    def set(self, voice, timestamp=None, **controls):
+        with self._lock:
+            if self._voices.get(voice.node_id) is voice:
+                self._send([_n_set(voice.node_id, controls)], timestamp)
+
+    def set_all(self, timestamp=None, **controls):
+        """Set controls on every sounding voice in one bundle"""
+        with self._lock:
+            self._send(
+                [
+                    _n_set(node_id, controls)
+                    for node_id in self._voices
+                    if node_id not in self._releasing
+                ],
+                timestamp,
+            )
+
+    def _steal(self):
+        """Take a voice from its note; it's freed and reused in one bundle"""
+        if self._releasing:
+            node_id = next(iter(self._releasing))
+        elif self.policy == "quietest":
+            node_id = min(
+                self._voices.values(), key=lambda voice: voice.amplitude
+            ).node_id
+        else:
+            node_id = next(iter(self._voices))
+        del self._voices[node_id]
+        self._releasing.pop(node_id, None)
+        self._stale[node_id] += 1
+        self.stolen += 1
+        return node_id
+
+    def _new(self, node_id, controls):
+        return OscMessage(
+            "/s_new",
+            self.synthdef.effective_name,
+            node_id,
+            ADD_TO_TAIL,
+            self.target,
+            *_pairs(controls),
+        )
+
+    def _paused(self, node_id):
+        controls = {"gate": 0} if self.gated else {}
+        return [self._new(node_id, controls), OscMessage("/n_run", node_id, 0)]
+
+    def _wake(self, node_id, controls):
+        if self.gated:
+            controls = {**controls, "gate": 1}
+        messages = [OscMessage("/n_run", node_id, 1)]
+        if controls:
+            messages.insert(0, _n_set(node_id, controls))
+        return messages
+
+    def _send(self, messages, timestamp=None):
+        if not messages:
+            return
+        if timestamp is None and len(messages) == 1:
+            self.server.send(messages[0])
+        else:
+            self.server.send(OscBundle(timestamp=timestamp, contents=messages))
+
+    def _on_n_end(self, message):
+        node_id = message.contents[0]
+        with self._lock:
+            if self._stale[node_id]:
+                self._stale[node_id] -= 1
+                return
+            if node_id not in self.node_ids:
+                return
+            occupied = self._voices.pop(node_id, None) is not None
+            self._releasing.pop(node_id, None)
+            if self.preallocate:
+                self._send(self._paused(node_id))
+            if occupied:
+                self._free.append(node_id)
+
+
+def _pairs(controls):
+    # Bus map symbols such as "c5" pass through as they are
+    return [
+        item
+        for name, value in controls.items()
+        for item in (name, value if isinstance(value, str) else float(value))
+    ]
+
+
+def _n_set(node_id, controls):
+    return OscMessage("/n_set", node_id, *_pairs(controls))